@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""Import-time regression benchmark for the segimage CLI.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters and
+reports the cumulative import time of the module, its slowest imports and
+whether any heavy dependency was pulled in. Exits non-zero when a forbidden
+module is imported or the best cumulative time exceeds `--max-ms`.
+
+    python scripts/importtime.py                      # segimage.cli.main
+    python scripts/importtime.py --max-ms 60 --top 15
+"""
+
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+# Modules the light CLI commands (info, formats, --help) must not import
+HEAVY_MODULES = ("numpy", "scipy", "PIL", "igraph", "skimage", "matplotlib")
+
+
+def measure(module: str) -> List[Tuple[str, int, int]]:
+    """Return (name, self_us, cumulative_us) for every import of `module`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def cumulative_ms(rows: List[Tuple[str, int, int]], module: str) -> float:
+    return max((cum for name, _, cum in rows if name == module), default=0) / 1000.0
+
+
+def imported_heavy(rows: List[Tuple[str, int, int]], forbidden=HEAVY_MODULES) -> List[str]:
+    top_level = {name.split(".")[0] for name, _, _ in rows}
+    return sorted(top_level.intersection(forbidden))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("module", nargs="?", default="segimage.cli.main")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to run (best time is reported)")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if the best cumulative time exceeds this")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list")
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.module) for _ in range(max(1, args.repeat))]
+    best = min(runs, key=lambda rows: cumulative_ms(rows, args.module))
+    best_ms = cumulative_ms(best, args.module)
+
+    slowest: Dict[str, int] = {}
+    for name, _, cum in best:
+        slowest[name] = max(cum, slowest.get(name, 0))
+    print(f"import {args.module}: {best_ms:.1f} ms (best of {len(runs)})")
+    for name, cum in sorted(slowest.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"  {cum / 1000.0:8.1f} ms  {name}")
+
+    status = 0
+    heavy = imported_heavy(best)
+    if heavy:
+        print(f"FAIL: heavy modules imported: {', '.join(heavy)}")
+        status = 1
+    if args.max_ms is not None and best_ms > args.max_ms:
+        print(f"FAIL: {best_ms:.1f} ms exceeds the {args.max_ms:.1f} ms budget")
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,13 +5,26 @@ A Python library for processing images with support for various formats
 including MATLAB .mat files and conversion to standard image formats (PNG, JPG, etc.).
 """
 
-from .processor import ImageProcessor
-from .cli import main
-
 __version__ = "0.0.1"
 __author__ = "Lucas Lopes Felipe"
 
 __all__ = [
     "ImageProcessor",
+    "Segmentation",
     "main",
+    "segment",
 ]
+
+
+def __getattr__(name):
+    # Resolved on first access so `import segimage` (and the CLI) stays cheap
+    if name == "ImageProcessor":
+        from .processor import ImageProcessor
+        return ImageProcessor
+    if name in ("segment", "Segmentation"):
+        from . import processors
+        return getattr(processors, name)
+    if name == "main":
+        from .cli import main
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
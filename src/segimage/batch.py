@@ -0,0 +1,179 @@
+"""
+Batch processing for segimage.
+
+Runs one processing type over many inputs, fanning the files out over a
+pool of worker processes. Workers are started once and import the
+processors up front, so the interpreter and library start-up cost is paid
+per worker instead of per file. Each worker's decoded-image cache gets an
+equal share of the parent's budget (see `segimage.loader`), so a pool of N
+workers holds no more cached images than a single process would.
+
+Inputs can be given as a directory (all supported files in it,
+recursively), a glob pattern, or a manifest file (`.lst`/`.txt`) listing
+one input path per line; relative manifest entries are resolved against
+the manifest's directory, and blank lines and `#` comments are ignored.
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from .formats import SUPPORTED_INPUT_FORMATS
+from .loader import get_image_cache, set_image_cache_budget
+from .logs import configure_logging, logging_config
+from .processor import ImageProcessor
+from .processors import available_processors, get_processor
+from .utils import write_meta_for_image
+
+
+MANIFEST_SUFFIXES = (".lst", ".txt")
+
+# Outputs that get a companion .meta file when requested
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".tif", ".tiff")
+
+
+class BatchResult(NamedTuple):
+    input_path: Path
+    output_path: Path
+    success: bool
+    error: Optional[str]
+    seconds: float
+
+
+def is_batch_spec(spec: str) -> bool:
+    """Return True if `spec` names more than a single input file."""
+    path = Path(spec)
+    return path.is_dir() or _is_glob(spec) or path.suffix.lower() in MANIFEST_SUFFIXES
+
+
+def _is_glob(spec: str) -> bool:
+    # Existing files named like "scan[1].png" are taken literally
+    return glob.has_magic(spec) and not Path(spec).exists()
+
+
+def collect_inputs(spec: str, input_formats: Optional[Sequence[str]] = None) -> List[Path]:
+    """Expand a directory, glob pattern or manifest file into input paths.
+
+    Raises OSError if a manifest file cannot be read.
+    """
+    formats = tuple(input_formats or SUPPORTED_INPUT_FORMATS)
+    path = Path(spec)
+    if path.is_dir():
+        candidates = (p for p in path.rglob("*") if p.is_file())
+        return sorted(p for p in candidates if p.suffix.lower() in formats)
+    if _is_glob(spec):
+        candidates = (Path(p) for p in glob.glob(spec, recursive=True))
+        return sorted(p for p in candidates if p.is_file() and p.suffix.lower() in formats)
+    if path.suffix.lower() in MANIFEST_SUFFIXES:
+        inputs = []
+        for line in path.read_text().splitlines():
+            entry = line.split("#", 1)[0].strip()
+            if entry:
+                item = Path(entry)
+                inputs.append(item if item.is_absolute() else path.parent / item)
+        return inputs
+    return [path]
+
+
+def output_path_for(input_path: Path, output_directory: Path, output_format: str, base: Optional[Path] = None) -> Path:
+    """Return `<output_directory>/<relative dir>/<stem>_processed<format>`.
+
+    With `base`, the input's directory relative to it is mirrored below the
+    output directory so equally named inputs from different folders do not
+    collide.
+    """
+    if not output_format.startswith("."):
+        output_format = "." + output_format
+    target_dir = output_directory
+    if base is not None:
+        try:
+            target_dir = output_directory / input_path.parent.relative_to(base)
+        except ValueError:
+            pass
+    return target_dir / f"{input_path.stem}_processed{output_format}"
+
+
+def process_one(
+    input_path: Path,
+    output_path: Path,
+    process_type: str,
+    options: Dict[str, Any],
+    save_meta: bool = False,
+    meta_format: str = "json",
+) -> BatchResult:
+    """Process a single input, never raising; failures are reported in the result."""
+    start = time.perf_counter()
+    try:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        processor = ImageProcessor()
+        success = processor.process_image(input_path, output_path, process_type, **options)
+        if not success:
+            return BatchResult(input_path, output_path, False, "processor reported failure", time.perf_counter() - start)
+        if save_meta and output_path.suffix.lower() in IMAGE_SUFFIXES:
+            if not write_meta_for_image(output_path, meta_format):
+                return BatchResult(input_path, output_path, False, "failed to write .meta file", time.perf_counter() - start)
+        return BatchResult(input_path, output_path, True, None, time.perf_counter() - start)
+    except Exception as e:
+        return BatchResult(input_path, output_path, False, str(e), time.perf_counter() - start)
+
+
+def _process_task(task: tuple) -> BatchResult:
+    return process_one(*task)
+
+
+def _warm_worker(process_type: str, log_config: Optional[Dict[str, Any]], cache_bytes: Optional[int] = None) -> None:
+    # Workers log like the parent, also when they are not forked from it
+    if log_config is not None:
+        configure_logging(**log_config)
+    if cache_bytes is not None:
+        set_image_cache_budget(cache_bytes)
+    # Import the batch's processor once per worker rather than once per file
+    if process_type.strip().lower() in available_processors():
+        try:
+            get_processor(process_type)
+        except ImportError:
+            # Reported for every file instead of breaking the pool
+            pass
+
+
+def run_batch(
+    inputs: Sequence[Path],
+    output_directory: Path,
+    process_type: str,
+    output_format: str,
+    options: Optional[Dict[str, Any]] = None,
+    *,
+    save_meta: bool = False,
+    meta_format: str = "json",
+    workers: Optional[int] = None,
+    chunk_size: int = 4,
+    base: Optional[Path] = None,
+    cache_bytes: Optional[int] = None,
+) -> Iterator[BatchResult]:
+    """Process `inputs` and yield one BatchResult per file, in input order.
+
+    `workers` defaults to the number of CPUs; with a single worker (or a
+    single input) everything runs in the current process. `cache_bytes` is
+    the total decoded-image cache budget, split evenly between workers
+    (default: this process's budget); 0 disables caching in the workers.
+    """
+    options = dict(options or {})
+    tasks = [
+        (Path(p), output_path_for(Path(p), output_directory, output_format, base), process_type, options, save_meta, meta_format)
+        for p in inputs
+    ]
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield _process_task(task)
+        return
+    workers = min(workers, len(tasks))
+    total_cache = get_image_cache().max_bytes if cache_bytes is None else int(cache_bytes)
+    initargs = (process_type, logging_config(), total_cache // workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker, initargs=initargs) as pool:
+        yield from pool.map(_process_task, tasks, chunksize=max(1, int(chunk_size)))
@@ -0,0 +1,301 @@
+"""
+Benchmark suite for segimage processors.
+
+Generates deterministic synthetic images (from 64x64 up to 8K) in a
+temporary directory, runs every processor over a set of representative
+options and records, per case and size:
+
+- wall time of each repetition and the best of them;
+- throughput in megapixels per second (based on the best run);
+- peak traced memory (tracemalloc, which includes NumPy buffers) from one
+  extra run, so that tracing does not distort the timings;
+- the per-stage breakdown (load, compute, colormap, encode, write) of the
+  best run.
+
+Results are plain JSON (see `run_benchmarks`) so runs from different
+commits or machines can be compared with `compare_results`.
+"""
+
+from __future__ import annotations
+
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .processor import ImageProcessor
+from .processors import available_processors, get_processor
+from .profiling import Profiler, profiling
+
+
+RESULTS_VERSION = 1
+
+# Size label -> (width, height)
+SIZES: Dict[str, Tuple[int, int]] = {
+    "64": (64, 64),
+    "256": (256, 256),
+    "512": (512, 512),
+    "1k": (1024, 1024),
+    "2k": (2048, 2048),
+    "4k": (3840, 2160),
+    "8k": (7680, 4320),
+}
+
+DEFAULT_SIZES = ("64", "256", "1k")
+
+
+class BenchCase(NamedTuple):
+    """One processor configuration to benchmark."""
+
+    processor: str
+    label: str
+    options: Dict[str, Any]
+    output_suffix: str = ".png"
+    # Larger inputs are skipped unless limits are disabled
+    max_pixels: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.processor}[{self.label}]"
+
+
+CASES: Tuple[BenchCase, ...] = (
+    BenchCase("mat_to_image", "png", {}),
+    BenchCase("mat_to_image", "jpg", {}, output_suffix=".jpg"),
+    BenchCase("color_cluster", "k2-bw", {"K": 2, "palette": "bw"}),
+    BenchCase("color_cluster", "k8-rainbow", {"K": 8, "palette": "rainbow"}),
+    BenchCase("color_cluster", "k16-kmeans", {"K": 16, "palette": "rainbow", "method": "kmeans"}),
+    BenchCase("color_cluster", "k16-median-cut", {"K": 16, "palette": "rainbow", "method": "median_cut"}),
+    BenchCase("lbp", "bw", {"palette": "bw"}),
+    BenchCase("lbp", "rainbow", {"palette": "rainbow"}),
+    BenchCase("slico", "n280", {"n_segments": 280, "compactness": 2.0, "sigma": 1.0}),
+    BenchCase("slico", "n2000", {"n_segments": 2000, "compactness": 10.0, "sigma": 1.0}),
+    # Edge lists are streamed; GraphML builds the whole igraph.Graph
+    BenchCase("graph", "c4-edgelist", {"connectivity": 4}, output_suffix=".edgelist"),
+    BenchCase("graph", "c8-graphml", {"connectivity": 8}, output_suffix=".graphml", max_pixels=1 << 20),
+)
+
+
+def parse_sizes(spec: str) -> List[str]:
+    """Parse a comma separated list of size labels ("all" for every size)."""
+    if spec.strip().lower() == "all":
+        return list(SIZES)
+    labels = [s.strip().lower() for s in spec.split(",") if s.strip()]
+    unknown = [s for s in labels if s not in SIZES]
+    if unknown:
+        raise ValueError(f"Unknown size(s): {', '.join(unknown)}. Known: {', '.join(SIZES)}")
+    return labels
+
+
+def select_cases(processors: Optional[Sequence[str]] = None) -> List[BenchCase]:
+    """Return the cases of the given processors (all by default)."""
+    if not processors:
+        return list(CASES)
+    wanted = {p.strip().lower() for p in processors}
+    known = {case.processor for case in CASES}
+    unknown = sorted(wanted - known)
+    if unknown:
+        raise ValueError(f"No benchmark cases for: {', '.join(unknown)}. Known: {', '.join(sorted(known))}")
+    return [case for case in CASES if case.processor in wanted]
+
+
+def synthetic_image(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """Deterministic RGB test image: gradients, flat regions and noise.
+
+    The mix gives the processors realistic work: smooth areas for
+    superpixels, edges and texture for LBP, and a spread of colors for
+    clustering.
+    """
+    rng = np.random.default_rng(seed)
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    x = (np.arange(width, dtype=np.uint32) * 255 // max(width - 1, 1)).astype(np.uint8)
+    # Blocks of roughly 1/8 of the image with a random base color each
+    block = max(1, min(width, height) // 8)
+    palette = rng.integers(0, 192, size=(height // block + 1, width // block + 1, 3), dtype=np.uint8)
+    cols = np.arange(width) // block
+    for y0 in range(0, height, block):
+        rows = slice(y0, min(y0 + block, height))
+        band = palette[y0 // block][cols]  # (width, 3)
+        image[rows] = band[None, :, :]
+        image[rows, :, 0] //= 2
+        image[rows, :, 0] += x[None, :] // 2
+        image[rows, :, 1] //= 2
+        image[rows, :, 1] += np.uint8(y0 * 127 // max(height - 1, 1))
+    noise = rng.integers(0, 32, size=image.shape, dtype=np.uint8)
+    np.minimum(image, 255 - 31, out=image)
+    image += noise
+    return image
+
+
+def write_input(image: np.ndarray, directory: Path, processor: str, label: str) -> Path:
+    """Write the input file a processor reads: a float .mat or a PNG."""
+    if processor == "mat_to_image":
+        from scipy.io import savemat
+
+        path = directory / f"{label}.mat"
+        if not path.exists():
+            luma = image.astype(np.float64) @ np.array([0.299, 0.587, 0.114])
+            savemat(str(path), {"data": luma})
+        return path
+    path = directory / f"{label}.png"
+    if not path.exists():
+        Image.fromarray(image).save(path, compress_level=1)
+    return path
+
+
+def _is_available(processor: str) -> bool:
+    return processor == "mat_to_image" or processor in available_processors()
+
+
+def _import_error(processor: str) -> Optional[str]:
+    """Import a backend outside the timed runs; return why that failed, if it did."""
+    if processor == "mat_to_image":
+        return None
+    try:
+        get_processor(processor)
+    except ImportError as e:
+        return str(e)
+    return None
+
+
+def run_case(case: BenchCase, input_path: Path, output_dir: Path, *, repeat: int = 3,
+             memory: bool = True) -> Dict[str, Any]:
+    """Time `case` on one input; returns the JSON-ready measurements."""
+    ip = ImageProcessor()
+    output_path = output_dir / f"{case.processor}-{case.label}{case.output_suffix}"
+    walls: List[float] = []
+    best_stages: Dict[str, float] = {}
+    success = True
+    for _ in range(max(1, repeat)):
+        with profiling(Profiler(memory=False)) as profiler:
+            start = time.perf_counter()
+            ok = ip.process_image(input_path, output_path, case.processor, **case.options)
+            wall = time.perf_counter() - start
+        success = success and ok
+        if not walls or wall < min(walls):
+            best_stages = {name: stats.wall for name, stats in profiler.stats.items()
+                           if not name.startswith("processor:")}
+        walls.append(wall)
+
+    peak_bytes = None
+    if memory:
+        with profiling(Profiler(memory=True)) as profiler:
+            ok = ip.process_image(input_path, output_path, case.processor, **case.options)
+        success = success and ok
+        span = profiler.stats.get(f"processor:{case.processor}")
+        peak_bytes = span.peak_bytes if span is not None else None
+
+    return {
+        "wall_s": walls,
+        "best_s": min(walls),
+        "mean_s": sum(walls) / len(walls),
+        "peak_bytes": peak_bytes,
+        "stages": best_stages,
+        "success": success,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine and library versions a run was made with."""
+    try:
+        from importlib.metadata import version
+        segimage_version = version("segimage")
+    except Exception:
+        from . import __version__ as segimage_version
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "segimage": segimage_version,
+    }
+
+
+def run_benchmarks(sizes: Iterable[str] = DEFAULT_SIZES, cases: Optional[Sequence[BenchCase]] = None, *,
+                   repeat: int = 3, memory: bool = True, limits: bool = True, seed: int = 0,
+                   progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Run every case at every size and return the results document.
+
+    `progress` is called with each result entry as soon as it is measured.
+    """
+    cases = list(CASES if cases is None else cases)
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="segimage-bench-") as tmp:
+        tmp_dir = Path(tmp)
+        for size in sizes:
+            width, height = SIZES[size]
+            pixels = width * height
+            image = synthetic_image(width, height, seed)
+            for case in cases:
+                entry: Dict[str, Any] = {
+                    "case": case.name,
+                    "processor": case.processor,
+                    "options": case.options,
+                    "output_suffix": case.output_suffix,
+                    "size": size,
+                    "width": width,
+                    "height": height,
+                    "megapixels": pixels / 1e6,
+                }
+                if not _is_available(case.processor):
+                    entry["skipped"] = "processor not installed"
+                elif limits and case.max_pixels is not None and pixels > case.max_pixels:
+                    entry["skipped"] = f"larger than {case.max_pixels} pixels"
+                else:
+                    error = _import_error(case.processor)
+                    if error is not None:
+                        entry["skipped"] = error
+                    else:
+                        input_path = write_input(image, tmp_dir, case.processor, size)
+                        entry.update(run_case(case, input_path, tmp_dir, repeat=repeat, memory=memory))
+                        entry["mp_per_s"] = entry["megapixels"] / entry["best_s"] if entry["best_s"] > 0 else None
+                results.append(entry)
+                if progress is not None:
+                    progress(entry)
+            # Inputs of one size are not needed for the next
+            for path in tmp_dir.iterdir():
+                path.unlink()
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "repeat": repeat,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Pair up measurements of the same case and size from two runs.
+
+    `change` is the relative change in best wall time: +0.25 means the
+    current run is 25% slower than the baseline.
+    """
+    def key(entry):
+        return entry["case"], entry["size"]
+
+    old = {key(e): e for e in baseline.get("results", []) if "best_s" in e}
+    rows = []
+    for entry in current.get("results", []):
+        before = old.get(key(entry))
+        if before is None or "best_s" not in entry:
+            continue
+        rows.append({
+            "case": entry["case"],
+            "size": entry["size"],
+            "baseline_s": before["best_s"],
+            "current_s": entry["best_s"],
+            "change": entry["best_s"] / before["best_s"] - 1.0 if before["best_s"] > 0 else None,
+            "baseline_peak_bytes": before.get("peak_bytes"),
+            "current_peak_bytes": entry.get("peak_bytes"),
+        })
+    return rows
@@ -0,0 +1,94 @@
+import json
+import sys
+from pathlib import Path
+import click
+
+from segimage.cli.main import main
+
+
+@main.command()
+@click.option('--sizes', '-s', default='64,256,1k', show_default=True,
+              help='Comma separated image sizes: 64, 256, 512, 1k, 2k, 4k, 8k, or "all"')
+@click.option('--processor', '-p', 'processors', multiple=True,
+              help='Only benchmark this processor (repeatable; default: all)')
+@click.option('--repeat', '-r', type=click.IntRange(1), default=3, show_default=True,
+              help='Timed runs per case; the best one is reported')
+@click.option('--memory/--no-memory', default=True, show_default=True,
+              help='Measure peak traced memory in one extra run per case')
+@click.option('--no-limits', is_flag=True,
+              help='Also run cases on sizes they are normally skipped for (e.g. GraphML above 1 MP)')
+@click.option('--seed', type=int, default=0, show_default=True, help='Seed of the synthetic images')
+@click.option('--output', '-o', type=click.Path(dir_okay=False, path_type=Path), default=None,
+              help='Write the results as JSON to this file')
+@click.option('--compare', 'baseline_path', type=click.Path(exists=True, dir_okay=False, path_type=Path), default=None,
+              help='Compare against results JSON from an earlier run')
+@click.option('--max-regression', type=float, default=None,
+              help='With --compare, exit with status 1 if any case is more than this many percent slower')
+@click.pass_obj
+def bench(ctx, sizes: str, processors: tuple, repeat: int, memory: bool, no_limits: bool, seed: int,
+          output: Path | None, baseline_path: Path | None, max_regression: float | None):
+    """
+    Benchmark every processor on synthetic images.
+
+    Reports throughput in megapixels per second and peak memory per
+    processor, option set and image size.
+    """
+    from segimage.bench import compare_results, parse_sizes, run_benchmarks, select_cases
+
+    try:
+        size_labels = parse_sizes(sizes)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--sizes'")
+    try:
+        cases = select_cases(processors)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--processor'")
+
+    quiet = bool(ctx.get('quiet', False))
+    if not quiet:
+        click.echo(f"{'case':<30}{'size':>6}{'MP':>8}{'best [s]':>10}{'MP/s':>9}{'peak [MB]':>11}")
+
+    def report(entry):
+        if quiet:
+            return
+        head = f"{entry['case']:<30}{entry['size']:>6}{entry['megapixels']:>8.3f}"
+        if "skipped" in entry:
+            click.echo(f"{head}  skipped: {entry['skipped']}")
+            return
+        peak = "-" if entry["peak_bytes"] is None else f"{entry['peak_bytes'] / (1024 * 1024):.1f}"
+        status = "" if entry["success"] else "  FAILED"
+        click.echo(f"{head}{entry['best_s']:>10.4f}{entry['mp_per_s']:>9.2f}{peak:>11}{status}")
+
+    results = run_benchmarks(size_labels, cases, repeat=repeat, memory=memory, limits=not no_limits,
+                             seed=seed, progress=report)
+
+    if output is not None:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+        if not quiet:
+            click.echo(f"Wrote results: {output}")
+
+    failed = [e for e in results["results"] if e.get("success") is False]
+    if failed:
+        click.echo(f"❌ {len(failed)} benchmark case(s) failed", err=True)
+
+    regressed = []
+    if baseline_path is not None:
+        with open(baseline_path) as f:
+            rows = compare_results(json.load(f), results)
+        if not quiet:
+            click.echo(f"\nCompared with {baseline_path}:")
+            click.echo(f"{'case':<30}{'size':>6}{'before [s]':>12}{'now [s]':>10}{'change':>9}")
+        for row in rows:
+            change = row["change"]
+            if max_regression is not None and change is not None and change * 100 > max_regression:
+                regressed.append(row)
+            if not quiet:
+                shown = "-" if change is None else f"{change * 100:+.1f}%"
+                click.echo(f"{row['case']:<30}{row['size']:>6}{row['baseline_s']:>12.4f}{row['current_s']:>10.4f}{shown:>9}")
+        if regressed:
+            click.echo(f"❌ {len(regressed)} case(s) slower than the baseline by more than {max_regression}%", err=True)
+
+    if failed or regressed:
+        sys.exit(1)
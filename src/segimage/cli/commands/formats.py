@@ -1,18 +1,15 @@
 import click
 
-from segimage.processor import ImageProcessor
 from segimage.cli.main import main
+from segimage.formats import SUPPORTED_INPUT_FORMATS, SUPPORTED_OUTPUT_FORMATS
 
 
 @main.command()
 def formats():
     """Show supported input and output formats."""
-    processor = ImageProcessor()
-    formats = processor.get_supported_formats()
-    
     click.echo("Supported formats:")
-    click.echo(f"  Input:  {', '.join(formats['input'])}")
-    click.echo(f"  Output: {', '.join(formats['output'])}")
+    click.echo(f"  Input:  {', '.join(SUPPORTED_INPUT_FORMATS)}")
+    click.echo(f"  Output: {', '.join(SUPPORTED_OUTPUT_FORMATS)}")
     click.echo("  Note: Graph outputs include .graphml, .gml, .lg/.lgl, .edgelist/.edges/.txt, .pickle/.pkl")
 
 
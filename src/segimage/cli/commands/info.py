@@ -14,6 +14,7 @@ def info():
     click.echo("  inspect  - Inspect MATLAB .mat file contents")
     click.echo("  formats  - Show supported formats")
     click.echo("  info     - Show this information")
+    click.echo("  bench    - Benchmark processors on synthetic images")
     click.echo("\nExample usage:")
     click.echo("  segimage process input.mat output_dir --process-type mat_to_image")
     click.echo("  segimage process input.mat output_dir -t mat_to_image -f png")
@@ -1,7 +1,6 @@
 from pathlib import Path
 import click
 
-from segimage.processor import ImageProcessor
 from segimage.cli.main import main
 
 
@@ -13,6 +12,8 @@ def inspect(input_image_path: Path):
     
     INPUT_IMAGE_PATH: Path to the input MATLAB .mat file
     """
+    from segimage.processor import ImageProcessor
+
     try:
         processor = ImageProcessor()
         success = processor.inspect_mat_file(input_image_path)
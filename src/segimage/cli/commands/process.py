@@ -1,13 +1,16 @@
+import logging
+import os
+import sys
 from pathlib import Path
 import click
 
-from segimage.processor import ImageProcessor
 from segimage.cli.main import main
-from segimage.utils import write_meta_for_image
+from segimage.formats import LABEL_FORMATS, META_FORMATS
+from segimage.logs import logger
 
 
 @main.command()
-@click.argument('input_image_path', type=click.Path(exists=True, path_type=Path))
+@click.argument('input_image_path', type=str)
 @click.argument('output_directory', type=click.Path(file_okay=False, path_type=Path))
 @click.option('--process-type', '-t', 
               default='mat_to_image',
@@ -17,22 +20,80 @@ from segimage.utils import write_meta_for_image
               default='png',
               help='Output format (default: png)')
 @click.option('--k', '-K', type=click.IntRange(1), default=2, help='Max number of communities/clusters (default: 2)')
-@click.option('--palette', type=click.Choice(['bw', 'rainbow']), default='bw', help='Palette for cluster colors (default: bw)')
+@click.option('--palette', type=click.Choice(['bw', 'rainbow', 'hsv']), default='bw', help='Palette for cluster colors and LBP values (default: bw)')
+@click.option('--cluster-method', type=click.Choice(['frequency', 'kmeans', 'median_cut']), default='frequency', help='Color clustering: exact top-K colors, or mini-batch k-means / median cut on a pixel sample (default: frequency)')
+@click.option('--sample-size', type=click.IntRange(1), default=65536, help='Pixels sampled to fit kmeans/median_cut clusters (default: 65536)')
+@click.option('--seed', type=int, default=0, help='Random seed of the kmeans/median_cut pixel sample (default: 0)')
 @click.option('--n-segments', type=int, default=280, help='Approximate number of superpixels for SLICO (default: 280)')
 @click.option('--compactness', type=float, default=2.0, help='Compactness for SLIC/SLICO (default: 2.0)')
 @click.option('--sigma', type=float, default=1.0, help='Sigma for pre-smoothing in SLIC/SLICO (default: 1.0)')
 @click.option('--start-label', type=int, default=1, help='Starting label index for SLIC/SLICO (default: 1)')
+@click.option('--tile-size', type=click.IntRange(16), default=None, help='Run SLICO in overlapping tiles of this many pixels per side, in parallel (default: whole image)')
+@click.option('--tile-overlap', type=click.IntRange(0), default=None, help='Overlap between SLICO tiles in pixels (default: two superpixel widths)')
+@click.option('--labels-format', type=click.Choice(list(LABEL_FORMATS)), default=None, help='Also write the SLICO label map as <output>.labels.<format>: npy, compressed npz or 16-bit png')
+@click.option('--lbp-radius', type=click.IntRange(1), default=1, help='LBP sampling radius in pixels (default: 1)')
+@click.option('--lbp-neighbors', type=click.IntRange(1, 16), default=8, help='LBP neighbors sampled on the circle (default: 8)')
+@click.option('--lbp-method', type=click.Choice(['default', 'ror', 'uniform']), default='default', help='LBP variant: raw codes, rotation invariant (ror) or rotation invariant uniform (default: default)')
+@click.option('--lbp-equalize', type=click.Choice(['rank', 'tied']), default='rank', help='Rainbow LBP normalization: per-pixel ranks, or one color per code (tied) (default: rank)')
+@click.option('--connectivity', type=click.Choice(['4', '8']), default='8', help='Pixel neighborhood for the graph processor (default: 8)')
 @click.option('--verbose', '-v', is_flag=True, help='Enable verbose output')
 @click.option('--save-meta/--no-save-meta', default=None, help='Write a .meta file with per-pixel details alongside outputs')
+@click.option('--meta-format', type=click.Choice(list(META_FORMATS)), default='json', help='Per-pixel metadata format: JSON .meta or columnar .meta.npz (default: json)')
+@click.option('--workers', '-j', type=click.IntRange(1), default=None, help='Worker processes for batch inputs (default: number of CPUs)')
+@click.option('--chunk-size', type=click.IntRange(1), default=4, help='Files handed to a worker at a time in batch mode (default: 4)')
+@click.option('--cache-mb', type=click.FloatRange(0), default=None, help='Memory budget for decoded images in MB, shared by all batch workers; 0 disables the cache (default: $SEGIMAGE_IMAGE_CACHE_MB or 512)')
+@click.option('--profile', is_flag=True, help='Print wall time, CPU time and peak memory per processing stage')
+@click.option('--profile-pstats', type=click.Path(dir_okay=False, path_type=Path), default=None, help='Also run under cProfile and write pstats data to this file')
+@click.option('--profile-trace', type=click.Path(dir_okay=False, path_type=Path), default=None, help='Write the stage spans as a JSON trace (Chrome trace format) to this file')
 @click.pass_obj
-def process(ctx, input_image_path: Path, output_directory: Path, process_type: str, 
-           output_format: str, k: int, palette: str, n_segments: int, compactness: float, sigma: float, start_label: int, verbose: bool, save_meta: bool | None):
+def process(ctx, input_image_path: str, output_directory: Path, process_type: str, 
+           output_format: str, k: int, palette: str, cluster_method: str, sample_size: int, seed: int, n_segments: int, compactness: float, sigma: float, start_label: int, tile_size: int | None, tile_overlap: int | None, labels_format: str | None, lbp_radius: int, lbp_neighbors: int, lbp_method: str, lbp_equalize: str, connectivity: str, verbose: bool, save_meta: bool | None, meta_format: str,
+           workers: int | None, chunk_size: int, cache_mb: float | None, profile: bool, profile_pstats: Path | None, profile_trace: Path | None):
     """
     Process an image file and save the result to the specified output directory.
     
-    INPUT_IMAGE_PATH: Path to the input image file
+    INPUT_IMAGE_PATH: Path to the input image file. A directory, a glob
+    pattern (quote it) or a manifest file (.lst/.txt, one path per line)
+    processes every matching file in batch mode using a pool of workers.
+
     OUTPUT_DIRECTORY: Directory where the processed image will be saved
     """
+    quiet = bool(ctx.get('quiet', False))
+    verbose = verbose and not quiet
+    if verbose:
+        # -v also shows the per-file records and conversion details
+        logger.setLevel(min(logger.getEffectiveLevel(), logging.DEBUG))
+
+    # Imported here so that other commands do not pay for NumPy and friends
+    from segimage.batch import is_batch_spec
+    from segimage.loader import set_image_cache_budget
+    from segimage.processor import ImageProcessor
+    from segimage.utils import meta_path_for, write_meta_for_image
+
+    if cache_mb is not None:
+        # Batch workers split this budget between them
+        set_image_cache_budget(int(cache_mb * 1024 * 1024))
+
+    if profile or profile_pstats or profile_trace:
+        if is_batch_spec(input_image_path) and workers != 1:
+            # Stage spans are collected in this process only
+            click.echo("Profiling runs the batch in a single process (-j 1)", err=True)
+            workers = 1
+        _start_profiling(profile, profile_pstats, profile_trace)
+
+    options = _processor_options(process_type, k, palette, n_segments, compactness, sigma, start_label, connectivity,
+                                 labels_format, tile_size, tile_overlap, lbp_radius, lbp_neighbors, lbp_method,
+                                 lbp_equalize, cluster_method, sample_size, seed)
+
+    if is_batch_spec(input_image_path):
+        _process_batch(ctx, input_image_path, output_directory, process_type, output_format, options,
+                       verbose, save_meta, meta_format, workers, chunk_size)
+        return
+
+    input_image_path = Path(input_image_path)
+    if not input_image_path.exists():
+        raise click.BadParameter(f"Path '{input_image_path}' does not exist.", param_hint="'INPUT_IMAGE_PATH'")
+
     try:
         # Create output directory if it doesn't exist
         output_directory.mkdir(parents=True, exist_ok=True)
@@ -59,38 +120,35 @@ def process(ctx, input_image_path: Path, output_directory: Path, process_type: s
             click.echo(f"Output format: {output_format}")
             click.echo(f"K (clusters): {k}")
             click.echo(f"Palette: {palette}")
+            click.echo(f"Cluster method: {cluster_method}")
             click.echo(f"SLICO n_segments: {n_segments}")
             click.echo(f"SLICO compactness: {compactness}")
             click.echo(f"SLICO sigma: {sigma}")
             click.echo(f"SLICO start_label: {start_label}")
+            click.echo(f"SLICO labels format: {labels_format or 'none'}")
+            click.echo(f"SLICO tile size: {tile_size or 'none'}")
+            click.echo(f"Graph connectivity: {connectivity}")
             click.echo(f"Save .meta: {effective_save_meta}")
+            click.echo(f"Meta format: {meta_format}")
         
         # Initialize processor and process image
         processor = ImageProcessor()
-        extra_opts = {}
-        pt = process_type.lower()
-        if pt == 'color_cluster':
-            extra_opts = {"K": k, "palette": palette}
-        elif pt == 'slico':
-            extra_opts = {
-                "n_segments": n_segments,
-                "compactness": compactness,
-                "sigma": sigma,
-                "start_label": start_label,
-            }
-        elif pt == 'lbp':
-            extra_opts = {"palette": palette}
+        extra_opts = dict(options)
+        if tile_size and process_type.lower() == 'slico':
+            # A single file can use all workers for its tiles
+            extra_opts["workers"] = workers or os.cpu_count() or 1
         success = processor.process_image(input_image_path, output_path, process_type, **extra_opts)
         
         if success:
-            click.echo(f"✅ Successfully processed image to: {output_path}")
+            if not quiet:
+                click.echo(f"✅ Successfully processed image to: {output_path}")
             # Only write .meta for image outputs
             image_suffixes = {'.png', '.jpg', '.jpeg', '.tif', '.tiff'}
             if effective_save_meta and output_path.suffix.lower() in image_suffixes:
                 try:
-                    if write_meta_for_image(output_path):
+                    if write_meta_for_image(output_path, meta_format):
                         if verbose:
-                            click.echo(f"Wrote metadata: {output_path.with_suffix(output_path.suffix + '.meta')}")
+                            click.echo(f"Wrote metadata: {meta_path_for(output_path, meta_format)}")
                     else:
                         click.echo("Warning: Failed to write .meta file")
                 except Exception as e:
@@ -104,3 +162,90 @@ def process(ctx, input_image_path: Path, output_directory: Path, process_type: s
         raise click.Abort()
 
 
+def _start_profiling(breakdown: bool, pstats_path: Path | None, trace_path: Path | None):
+    """Profile the rest of the command and report when it finishes."""
+    from segimage.profiling import Profiler, profiling
+
+    click_ctx = click.get_current_context()
+    profiler = Profiler(cprofile=pstats_path is not None)
+
+    def report():
+        if breakdown:
+            profiler.write_breakdown(sys.stderr)
+        if pstats_path is not None:
+            profiler.dump_pstats(pstats_path)
+            click.echo(f"Wrote cProfile stats: {pstats_path}", err=True)
+        if trace_path is not None:
+            profiler.write_trace(trace_path)
+            click.echo(f"Wrote trace: {trace_path}", err=True)
+
+    # Close callbacks run last-in first-out: profiling stops, then the report
+    click_ctx.call_on_close(report)
+    click_ctx.with_resource(profiling(profiler))
+
+
+def _processor_options(process_type: str, k: int, palette: str, n_segments: int, compactness: float,
+                       sigma: float, start_label: int, connectivity: str, labels_format: str | None = None,
+                       tile_size: int | None = None, tile_overlap: int | None = None,
+                       lbp_radius: int = 1, lbp_neighbors: int = 8, lbp_method: str = 'default',
+                       lbp_equalize: str = 'rank', cluster_method: str = 'frequency', sample_size: int = 65536,
+                       seed: int = 0) -> dict:
+    """Pick the CLI options that apply to the given processing type."""
+    pt = process_type.lower()
+    if pt == 'color_cluster':
+        return {"K": k, "palette": palette, "method": cluster_method, "sample_size": sample_size, "seed": seed}
+    if pt == 'slico':
+        return {
+            "n_segments": n_segments,
+            "compactness": compactness,
+            "sigma": sigma,
+            "start_label": start_label,
+            "labels_format": labels_format,
+            "tile_size": tile_size,
+            "tile_overlap": tile_overlap,
+        }
+    if pt == 'lbp':
+        return {"palette": palette, "radius": lbp_radius, "neighbors": lbp_neighbors, "method": lbp_method,
+                "equalize": lbp_equalize}
+    if pt == 'graph':
+        return {"connectivity": int(connectivity)}
+    return {}
+
+
+def _process_batch(ctx, spec: str, output_directory: Path, process_type: str, output_format: str, options: dict,
+                   verbose: bool, save_meta: bool | None, meta_format: str, workers: int | None, chunk_size: int):
+    """Process every input named by a directory, glob or manifest."""
+    from segimage.batch import collect_inputs, run_batch
+
+    try:
+        inputs = collect_inputs(spec)
+    except OSError as e:
+        raise click.BadParameter(f"Cannot read manifest '{spec}': {e.strerror or e}", param_hint="'INPUT_IMAGE_PATH'")
+    if not inputs:
+        raise click.BadParameter(f"No input files found for '{spec}'.", param_hint="'INPUT_IMAGE_PATH'")
+
+    output_directory.mkdir(parents=True, exist_ok=True)
+    effective_save_meta = bool(ctx.get('save_meta', False)) if save_meta is None else bool(save_meta)
+    base = Path(spec) if Path(spec).is_dir() else Path(os.path.commonpath([str(p.parent.resolve()) for p in inputs]))
+    inputs = [p.resolve() for p in inputs]
+
+    if verbose:
+        click.echo(f"Batch of {len(inputs)} files from {spec}")
+        click.echo(f"Process type: {process_type}")
+        click.echo(f"Workers: {workers or os.cpu_count()}, chunk size: {chunk_size}")
+
+    failures = 0
+    for result in run_batch(inputs, output_directory, process_type, output_format, options,
+                            save_meta=effective_save_meta, meta_format=meta_format,
+                            workers=workers, chunk_size=chunk_size, base=base.resolve()):
+        if result.success:
+            if verbose:
+                click.echo(f"✅ {result.input_path} -> {result.output_path} ({result.seconds:.2f}s)")
+        else:
+            failures += 1
+            click.echo(f"❌ {result.input_path}: {result.error}", err=True)
+
+    if not ctx.get('quiet', False):
+        click.echo(f"Processed {len(inputs) - failures}/{len(inputs)} files into: {output_directory}")
+    if failures:
+        raise click.Abort()
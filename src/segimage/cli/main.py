@@ -4,6 +4,8 @@ Command-line interface entrypoint.
 
 import click
 
+from segimage.logs import LOG_FORMATS, LOG_LEVELS, configure_logging
+
 
 @click.group()
 @click.version_option()
@@ -12,8 +14,21 @@ import click
     default=False,
     help="If enabled, write a .meta file with per-pixel details alongside outputs.",
 )
+@click.option(
+    "--log-level",
+    type=click.Choice(LOG_LEVELS, case_sensitive=False),
+    default="warning",
+    help="Minimum level of log records written to stderr (default: warning).",
+)
+@click.option(
+    "--log-format",
+    type=click.Choice(LOG_FORMATS),
+    default="text",
+    help="Log record format: plain text or one JSON object per line (default: text).",
+)
+@click.option("--quiet", "-q", is_flag=True, help="Only report errors; suppress progress messages and logs.")
 @click.pass_context
-def main(ctx, save_meta: bool):
+def main(ctx, save_meta: bool, log_level: str, log_format: str, quiet: bool):
     """
     segimage - Image segmentation and processing library
     
@@ -21,6 +36,8 @@ def main(ctx, save_meta: bool):
     """
     ctx.ensure_object(dict)
     ctx.obj["save_meta"] = bool(save_meta)
+    ctx.obj["quiet"] = bool(quiet)
+    configure_logging("error" if quiet else log_level, log_format)
 
 
 # Import command modules to register them with the main group
@@ -29,5 +46,6 @@ from .commands import process as _process  # noqa: F401,E402
 from .commands import inspect as _inspect  # noqa: F401,E402
 from .commands import formats as _formats  # noqa: F401,E402
 from .commands import info as _info  # noqa: F401,E402
+from .commands import bench as _bench  # noqa: F401,E402
 
 
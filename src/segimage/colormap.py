@@ -0,0 +1,132 @@
+"""Colormaps as uint8 lookup tables.
+
+Every palette is a precomputed, read-only table of `size` entries (256 by
+default) and values are mapped with one index computation and one
+`np.take`, so no plotting library is imported and no Python loop runs per
+pixel. Palettes:
+
+- "bw": gray levels round(255 x), one channel (PIL mode 'L'); computed
+  directly rather than through the table, so no value is quantized;
+- "rainbow": matplotlib's "rainbow" (red = |2x - 1/2|, green = sin(pi x),
+  blue = cos(pi x / 2)), with the same table and indexing, so results
+  match `matplotlib.colormaps["rainbow"]` exactly;
+- "hsv": the full-saturation hue circle, red to red, with channels
+  truncated to 8 bits as `int(255 * colorsys.hsv_to_rgb(x, 1, 1))`. Table
+  entries are exact at the table positions; values in between take the
+  entry below them. `palette_colors` computes its colors exactly.
+
+A value x in [0, 1] selects entry min(floor(x * size), size - 1), as in
+matplotlib; values outside [0, 1] are clipped.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+
+COLORMAPS = ("bw", "rainbow", "hsv")
+LUT_SIZE = 256
+
+
+def _check(name: str) -> None:
+    if name not in COLORMAPS:
+        raise ValueError(f"Unknown palette: {name}. Supported: {', '.join(COLORMAPS)}")
+
+
+def _rainbow(x: np.ndarray) -> np.ndarray:
+    return np.stack([np.abs(2.0 * x - 0.5), np.sin(np.pi * x), np.cos(np.pi * x / 2.0)], axis=-1)
+
+
+def _hsv(x: np.ndarray) -> np.ndarray:
+    # colorsys.hsv_to_rgb(h, 1, 1), vectorized with the same float operations
+    h6 = x * 6.0
+    whole = np.floor(h6)
+    sector = whole.astype(np.intp) % 6
+    f = h6 - whole
+    q, t = 1.0 - f, 1.0 - (1.0 - f)
+    one, zero = np.ones_like(f), np.zeros_like(f)
+    rows = np.stack([
+        np.stack([one, t, zero], axis=-1),
+        np.stack([q, one, zero], axis=-1),
+        np.stack([zero, one, t], axis=-1),
+        np.stack([zero, q, one], axis=-1),
+        np.stack([t, zero, one], axis=-1),
+        np.stack([one, zero, q], axis=-1),
+    ])
+    return rows[sector, np.arange(x.size)]
+
+
+def pil_mode(name: str) -> str:
+    """PIL mode of images produced with a palette."""
+    _check(name)
+    return "L" if name == "bw" else "RGB"
+
+
+@lru_cache(maxsize=None)
+def colormap_lut(name: str, size: int = LUT_SIZE) -> np.ndarray:
+    """Read-only uint8 table of a palette: (size,) for "bw", (size, 3) otherwise."""
+    _check(name)
+    if size < 2:
+        raise ValueError(f"Colormap size must be at least 2, got {size}")
+    x = np.linspace(0.0, 1.0, size)
+    if name == "hsv":
+        lut = _hsv_u8(x)
+    else:
+        values = x if name == "bw" else _rainbow(x)
+        lut = (np.clip(values, 0.0, 1.0) * 255.0).round().astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
+
+def _hsv_u8(x: np.ndarray) -> np.ndarray:
+    # Truncated like the colorsys-based code this replaces
+    return (_hsv(x) * 255.0).astype(np.uint8)
+
+
+def _gray_u8(values: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    gray = np.clip(values, 0.0, 1.0) * 255.0
+    np.rint(gray, out=gray)
+    if out is None:
+        return gray.astype(np.uint8)
+    np.copyto(out, gray, casting="unsafe")
+    return out
+
+
+def lut_indices(values: np.ndarray, size: int = LUT_SIZE) -> np.ndarray:
+    """Table index of every value in [0, 1]."""
+    scaled = np.multiply(values, size, dtype=np.float64)
+    np.clip(scaled, 0, size - 1, out=scaled)
+    return scaled.astype(np.intp)
+
+
+def apply_colormap(values: np.ndarray, name: str, *, size: int = LUT_SIZE,
+                   out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Map values in [0, 1] of any shape to uint8 colors.
+
+    Returns shape `values.shape` for "bw" and `values.shape + (3,)` for the
+    color palettes; `out`, if given, must have that shape.
+    """
+    if name == "bw":
+        return _gray_u8(values, out)
+    lut = colormap_lut(name, size)
+    return lut.take(lut_indices(values, size), axis=0, out=out)
+
+
+def palette_colors(count: int, name: str, *, endpoint: bool = True) -> np.ndarray:
+    """`count` evenly spaced colors of a palette.
+
+    With `endpoint`, the first and last colors are the ends of the palette;
+    without, positions are i / count (suited to cyclic palettes such as hsv).
+    """
+    count = max(1, int(count))
+    if endpoint and count > 1:
+        positions = np.linspace(0.0, 1.0, count)
+    else:
+        positions = np.arange(count) / count
+    if name == "hsv":
+        return _hsv_u8(positions)
+    return apply_colormap(positions, name)
+
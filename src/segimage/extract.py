@@ -0,0 +1,171 @@
+"""Numeric data extraction from MATLAB cell and struct arrays.
+
+`loadmat` returns cells as object arrays and structs as structured arrays,
+possibly nested. `extract_numeric` finds the first numeric array inside
+such a value with an iterative depth-first search under an explicit
+budget (depth and number of visited nodes), without printing.
+
+The path to the numeric leaf (field names and element indices) is cached
+per schema signature, so files that share a layout skip most of the
+search. A cached path is only trusted if it is still the path a fresh
+search would take: it must lead to numeric data, and every sibling before
+it (earlier fields and elements along the way) must hold none. Otherwise
+the search runs again.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+
+# Search limits
+MAX_DEPTH = 8
+MAX_NODES = 10_000
+# Elements of an object array inspected per level
+MAX_ITEMS = 10
+# Object arrays of scalars up to this size are converted to float32 as a whole
+MAX_CONVERT_ELEMENTS = 1 << 16
+
+PATH_CACHE_SIZE = 256
+
+Step = Tuple[str, Any]  # ("field", name) or ("item", flat index)
+KeyPath = Tuple[Step, ...]
+
+_PATH_CACHE: "OrderedDict[Hashable, KeyPath]" = OrderedDict()
+
+
+def clear_path_cache() -> None:
+    _PATH_CACHE.clear()
+
+
+def schema_signature(data) -> Hashable:
+    """Cheap description of a value's top-level layout (dtype and rank)."""
+    return (str(getattr(data, "dtype", type(data).__name__)), getattr(data, "ndim", 0))
+
+
+def _is_numeric(node) -> bool:
+    dtype = getattr(node, "dtype", None)
+    return dtype is not None and dtype.names is None and dtype.kind in "biuf" and node.size > 0
+
+
+def _children(node) -> List[Tuple[Step, Any]]:
+    dtype = getattr(node, "dtype", None)
+    if dtype is None:
+        return []
+    if dtype.names:
+        return [(("field", name), node[name]) for name in dtype.names]
+    if dtype == np.object_ and getattr(node, "size", 0):
+        return [(("item", i), node.flat[i]) for i in range(min(node.size, MAX_ITEMS))]
+    return []
+
+
+def _as_numeric(node) -> Optional[np.ndarray]:
+    """Convert a small object array of plain numbers to float32."""
+    if not isinstance(node, np.ndarray) or node.dtype != np.object_ or not 0 < node.size <= MAX_CONVERT_ELEMENTS:
+        return None
+    if not all(isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in node.flat):
+        return None
+    return node.astype(np.float32)
+
+
+def _has_numeric(node, depth: int, budget: List[int]) -> bool:
+    """Whether a search of `node`, `depth` levels deep, meets numeric data.
+
+    Visited nodes are taken from `budget[0]`; running out counts as found,
+    so the caller falls back to a full search (which reports the budget).
+    """
+    stack = [(node, 0)]
+    while stack:
+        node, level = stack.pop()
+        if budget[0] <= 0:
+            return True
+        budget[0] -= 1
+        if _is_numeric(node) or _as_numeric(node) is not None:
+            return True
+        if level < depth:
+            stack.extend((child, level + 1) for _, child in _children(node))
+    return False
+
+
+def _follow(data, path: KeyPath, max_depth: int, max_nodes: int):
+    """Leaf at the end of `path`, if a fresh search would find it there."""
+    if len(path) > max_depth:
+        return None
+    budget = [max_nodes]
+    node = data
+    for level, step in enumerate(path):
+        if _is_numeric(node) or _as_numeric(node) is not None:
+            # A fresh search would stop here
+            return None
+        children = _children(node)
+        steps = [s for s, _ in children]
+        if step not in steps:
+            return None
+        position = steps.index(step)
+        # Earlier siblings are searched first and must not hold numeric data
+        for _, sibling in children[:position]:
+            if _has_numeric(sibling, max_depth - level - 1, budget):
+                return None
+        node = children[position][1]
+    if _is_numeric(node):
+        return node
+    return _as_numeric(node)
+
+
+def format_path(path: KeyPath) -> str:
+    text = "".join(f".{key}" if kind == "field" else f"[{key}]" for kind, key in path)
+    return text or "<root>"
+
+
+def _search(data, max_depth: int, max_nodes: int) -> Tuple[Optional[Any], Optional[KeyPath], str]:
+    stack: List[Tuple[Any, KeyPath]] = [(data, ())]
+    visited = 0
+    while stack:
+        node, path = stack.pop()
+        if visited >= max_nodes:
+            return None, None, f"Search budget of {max_nodes} nodes exhausted"
+        visited += 1
+        if _is_numeric(node):
+            return node, path, ""
+        converted = _as_numeric(node)
+        if converted is not None:
+            return converted, path, ""
+        if len(path) < max_depth:
+            # Reversed so that the first field/element is explored first
+            stack.extend((child, path + (step,)) for step, child in reversed(_children(node)))
+    return None, None, f"No numeric data found within depth {max_depth} ({visited} nodes searched)"
+
+
+def extract_numeric(
+    data,
+    *,
+    cache_key: Hashable = None,
+    max_depth: int = MAX_DEPTH,
+    max_nodes: int = MAX_NODES,
+) -> Tuple[Optional[np.ndarray], str]:
+    """Return (numeric array, message) or (None, reason).
+
+    `cache_key` (e.g. the variable name) is combined with the schema
+    signature of `data` to look up and record the path to the leaf.
+    """
+    if not hasattr(data, "dtype"):
+        return None, f"Data has no dtype attribute: {type(data)}"
+    key = (cache_key, schema_signature(data))
+    path = _PATH_CACHE.get(key)
+    if path is not None:
+        leaf = _follow(data, path, max_depth, max_nodes)
+        if leaf is not None:
+            _PATH_CACHE.move_to_end(key)
+            return leaf, f"Found numeric data at {format_path(path)} (cached path) with shape {leaf.shape} and dtype {leaf.dtype}"
+        del _PATH_CACHE[key]
+
+    leaf, path, reason = _search(data, max_depth, max_nodes)
+    if leaf is None:
+        return None, reason
+    _PATH_CACHE[key] = path
+    while len(_PATH_CACHE) > PATH_CACHE_SIZE:
+        _PATH_CACHE.popitem(last=False)
+    return leaf, f"Found numeric data at {format_path(path)} with shape {leaf.shape} and dtype {leaf.dtype}"
@@ -0,0 +1,21 @@
+"""File formats understood by segimage.
+
+Kept free of heavy imports so the CLI can list formats without loading
+NumPy, SciPy or any processor backend.
+"""
+
+SUPPORTED_INPUT_FORMATS = ('.mat', '.npy', '.tif', '.tiff', '.png', '.jpg', '.jpeg')
+
+SUPPORTED_OUTPUT_FORMATS = (
+    '.png', '.jpg', '.jpeg', '.tif', '.tiff', '.npy',
+    '.graphml', '.gml', '.lg', '.lgl', '.edgelist', '.edges', '.txt', '.pickle', '.pkl',
+)
+
+# Per-pixel metadata formats written next to image outputs
+META_FORMATS = ("json", "npz")
+
+# Label map formats a segmentation can be written in next to its output
+LABEL_FORMATS = ("npy", "npz", "png")
+
+# Image outputs that can store palette-indexed ('P' mode) images
+INDEXED_OUTPUT_FORMATS = ('.png', '.tif', '.tiff')
@@ -0,0 +1,211 @@
+"""Exact color histograms for segimage.
+
+Counts every distinct color of an image. Colors of unsigned integer images
+(up to 64 bits per pixel) are packed into one integer key per pixel, and
+the keys are counted by one of several pluggable strategies:
+
+ - sort:     `np.unique` over the keys; O(N log N), memory O(N)
+ - bincount: dense `np.bincount` table over the whole key space; O(N) but
+             needs 2**bits bins, so it is only used for keys of up to 24 bits
+ - hash:     vectorized multiplicative hashing; O(N) per round, for wide
+             keys (e.g. 16-bit RGB) with comparatively few distinct colors
+
+`strategy="auto"` picks one from the image size, key width and a sampled
+estimate of the number of distinct colors. All strategies return colors in
+the same (ascending key) order, so results do not depend on the strategy.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+
+# strategy(keys, bits, return_inverse) -> (unique_keys, counts, inverse or None)
+HistogramStrategy = Callable[[np.ndarray, int, bool], Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]]
+
+
+_STRATEGIES: Dict[str, HistogramStrategy] = {}
+
+# Widest key space for which a dense bincount table is allowed (16M bins)
+MAX_BINCOUNT_BITS = 24
+
+# Pixels sampled to estimate how many distinct colors an image has
+SAMPLE_SIZE = 4096
+
+# Fibonacci hashing multiplier (2**64 / golden ratio)
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def register_histogram_strategy(name: str, func: HistogramStrategy) -> None:
+    key = name.strip().lower()
+    _STRATEGIES[key] = func
+
+
+def get_histogram_strategy(name: str) -> HistogramStrategy:
+    key = name.strip().lower()
+    return _STRATEGIES.get(key)  # type: ignore[return-value]
+
+
+def available_histogram_strategies() -> Dict[str, HistogramStrategy]:
+    return dict(_STRATEGIES)
+
+
+def _as_pixel_rows(image: np.ndarray) -> np.ndarray:
+    """View an HxW or HxWxC image as (N, C) pixel rows."""
+    if image.ndim == 2:
+        return image.reshape(-1, 1)
+    return image.reshape(-1, image.shape[-1])
+
+
+def pack_colors(image: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Pack each pixel's channels into one unsigned integer key.
+
+    The first channel lands in the most significant bits, so keys sort in the
+    same order as the color rows. Returns (keys, bits); keys are uint32 when
+    `bits <= 32`, uint64 otherwise.
+    """
+    flat = _as_pixel_rows(image)
+    if flat.dtype.kind != "u":
+        raise ValueError(f"Cannot pack colors of dtype {flat.dtype}")
+    channel_bits = flat.dtype.itemsize * 8
+    bits = channel_bits * flat.shape[1]
+    if bits > 64:
+        raise ValueError(f"Cannot pack {bits}-bit colors into a 64-bit key")
+    key_dtype = np.uint32 if bits <= 32 else np.uint64
+    keys = flat[:, 0].astype(key_dtype)
+    for c in range(1, flat.shape[1]):
+        keys <<= key_dtype(channel_bits)
+        keys |= flat[:, c]
+    return keys, bits
+
+
+def unpack_colors(keys: np.ndarray, channels: int, dtype: np.dtype) -> np.ndarray:
+    """Inverse of `pack_colors`: return (N, channels) color rows."""
+    dtype = np.dtype(dtype)
+    channel_bits = dtype.itemsize * 8
+    colors = np.empty((keys.size, channels), dtype=dtype)
+    for c in range(channels):
+        colors[:, c] = keys >> keys.dtype.type(channel_bits * (channels - 1 - c))
+    return colors
+
+
+def _sort_strategy(keys: np.ndarray, bits: int, return_inverse: bool):
+    if return_inverse:
+        uniq, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        return uniq, counts, inverse.reshape(-1)
+    uniq, counts = np.unique(keys, return_counts=True)
+    return uniq, counts, None
+
+
+def _bincount_strategy(keys: np.ndarray, bits: int, return_inverse: bool):
+    if bits > MAX_BINCOUNT_BITS:
+        raise ValueError(f"bincount strategy supports keys up to {MAX_BINCOUNT_BITS} bits, got {bits}")
+    table = np.bincount(keys, minlength=1 << bits)
+    uniq = np.flatnonzero(table)
+    counts = table[uniq]
+    if not return_inverse:
+        return uniq.astype(keys.dtype), counts, None
+    # Reuse the table as a key -> color index lookup
+    index = table.astype(np.intp, copy=False)
+    index[uniq] = np.arange(uniq.size)
+    return uniq.astype(keys.dtype), counts, index[keys]
+
+
+def _sample_distinct(keys: np.ndarray, size: int = SAMPLE_SIZE) -> Tuple[int, int]:
+    """Return (distinct keys, sampled keys) over an evenly strided sample."""
+    sample = keys[:: max(1, keys.size // size)][:size]
+    return int(np.unique(sample).size), int(sample.size)
+
+
+def _hash_strategy(keys: np.ndarray, bits: int, return_inverse: bool):
+    # Each round hashes the remaining keys into a table with several slots
+    # per expected distinct key. A slot is kept by the key written last;
+    # pixels whose key lost its slot go to the next round. All pixels of one
+    # key share a slot, so every key is resolved in exactly one round.
+    n = keys.size
+    distinct, sampled = _sample_distinct(keys)
+    expected = 8 * distinct if distinct * 2 < sampled else n
+    round_keys = []
+    round_slots = []
+    pending = np.arange(n)
+    while pending.size:
+        pending_keys = keys[pending].astype(np.uint64)
+        table_bits = max(4, int(2 * min(expected, pending.size) - 1).bit_length())
+        slot = (pending_keys * _HASH_MULTIPLIER) >> np.uint64(64 - table_bits)
+        slot = slot.astype(np.intp)
+        owner = np.zeros(1 << table_bits, dtype=np.uint64)
+        owner[slot] = pending_keys
+        won = owner[slot] == pending_keys
+        used = np.zeros(1 << table_bits, dtype=bool)
+        used[slot[won]] = True
+        round_keys.append(owner[used])
+        round_slots.append((pending[won], slot[won], np.flatnonzero(used), table_bits))
+        pending = pending[~won]
+
+    uniq = np.concatenate(round_keys)
+    order = np.argsort(uniq)
+    uniq = uniq[order].astype(keys.dtype)
+    rank = np.empty(order.size, dtype=np.intp)
+    rank[order] = np.arange(order.size)
+
+    # Map every resolved pixel to the sorted index of its key
+    inverse = np.empty(n, dtype=np.intp)
+    offset = 0
+    for pixels, slot, used_slots, table_bits in round_slots:
+        slot_index = np.zeros(1 << table_bits, dtype=np.intp)
+        slot_index[used_slots] = rank[offset:offset + used_slots.size]
+        inverse[pixels] = slot_index[slot]
+        offset += used_slots.size
+    counts = np.bincount(inverse, minlength=uniq.size)
+    return uniq, counts, (inverse if return_inverse else None)
+
+
+def choose_histogram_strategy(keys: np.ndarray, bits: int) -> str:
+    """Pick a strategy from the image size, key width and a color estimate.
+
+    A dense bincount pays for its 2**bits table once the image has at least
+    one pixel per 16 bins. Wide keys on large images are hashed when a small
+    sample suggests few distinct colors; everything else is sorted.
+    """
+    if bits <= MAX_BINCOUNT_BITS and keys.size * 16 >= (1 << bits):
+        return "bincount"
+    if bits > MAX_BINCOUNT_BITS and keys.size >= (1 << 20):
+        distinct, sampled = _sample_distinct(keys)
+        if distinct * 2 < sampled:
+            return "hash"
+    return "sort"
+
+
+def color_histogram(image: np.ndarray, *, return_inverse: bool = False, strategy: str = "auto"):
+    """Count exact colors of an HxW or HxWxC image.
+
+    Returns `(colors, counts)` with colors as (U, C) rows sorted ascending,
+    or `(colors, counts, inverse)` when `return_inverse` is set, where
+    `inverse` maps every pixel (row-major) to the index of its color.
+    Images that cannot be packed into integer keys (e.g. floats) are always
+    counted by sorting their rows.
+    """
+    flat = _as_pixel_rows(image)
+    try:
+        keys, bits = pack_colors(image)
+    except ValueError:
+        # Not packable: sort rows viewed as opaque byte strings
+        view = np.ascontiguousarray(flat).view([("c", flat.dtype, flat.shape[1])]).reshape(-1)
+        uniq, inverse, counts = np.unique(view, return_inverse=True, return_counts=True)
+        colors = uniq.view(flat.dtype).reshape(-1, flat.shape[1])
+        return (colors, counts, inverse.reshape(-1)) if return_inverse else (colors, counts)
+
+    name = choose_histogram_strategy(keys, bits) if strategy == "auto" else strategy
+    func = get_histogram_strategy(name)
+    if func is None:
+        raise ValueError(f"Unknown histogram strategy: {name}. Available: {', '.join(sorted(_STRATEGIES))}")
+    uniq, counts, inverse = func(keys, bits, return_inverse)
+    colors = unpack_colors(uniq, flat.shape[1], flat.dtype)
+    return (colors, counts, inverse) if return_inverse else (colors, counts)
+
+
+register_histogram_strategy("sort", _sort_strategy)
+register_histogram_strategy("bincount", _bincount_strategy)
+register_histogram_strategy("hash", _hash_strategy)
@@ -0,0 +1,211 @@
+"""Local Binary Pattern engine.
+
+Computes LBP codes from uint8 images with integer arithmetic only:
+
+- luma is the fixed-point ITU-R 601-2 transform PIL uses for
+  `Image.convert("L")`: (19595 R + 38470 G + 7471 B + 2**15) >> 16;
+- every neighbor comparison is written through shifted views of the gray
+  image into one reusable buffer, so no per-neighbor temporaries are made;
+- codes are uint8 for up to 8 neighbors and uint16 for up to 16.
+
+Neighbors are sampled on a circle of `radius` pixels at the nearest pixel,
+clockwise starting at the top-left (135 degrees); the first neighbor is the
+most significant bit. With the defaults (radius 1, 8 neighbors) these are
+the 8-connected neighbors TL, T, TR, R, BR, B, BL, L as bits 7..0. A
+neighbor outside the image contributes a 0 bit.
+
+Variants (`method`):
+
+- "default": the raw code, 0 .. 2**P - 1;
+- "ror": rotation invariant, the smallest code over all circular bit
+  rotations;
+- "uniform": rotation invariant uniform patterns (riu2): the number of 1
+  bits for patterns with at most two 0/1 transitions, P + 1 otherwise.
+"""
+
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+LUMA_WEIGHTS = (19595, 38470, 7471)
+LUMA_SHIFT = 16
+
+LBP_METHODS = ("default", "ror", "uniform")
+MAX_NEIGHBORS = 16
+
+# Pixels converted per block in `luma_u8`; bounds the uint32 scratch buffer
+LUMA_BLOCK_PIXELS = 1 << 20
+
+
+def luma_u8(image: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Integer luma of a uint8 (H, W) or (H, W, C>=3) image as uint8 (H, W).
+
+    Grayscale input is returned as is (or copied into `out`).
+    """
+    image = np.asarray(image)
+    if image.ndim == 2:
+        if out is None:
+            return image.astype(np.uint8, copy=False)
+        np.copyto(out, image, casting="unsafe")
+        return out
+    if image.ndim != 3 or image.shape[2] < 3:
+        raise ValueError(f"Expected a (H, W) or (H, W, C>=3) image, got shape {image.shape}")
+    height, width = image.shape[:2]
+    if out is None:
+        out = np.empty((height, width), dtype=np.uint8)
+    rows = max(1, LUMA_BLOCK_PIXELS // max(1, width))
+    acc = np.empty((min(rows, height), width), dtype=np.uint32)
+    term = np.empty_like(acc)
+    for y0 in range(0, height, rows):
+        y1 = min(height, y0 + rows)
+        a, t = acc[:y1 - y0], term[:y1 - y0]
+        np.multiply(image[y0:y1, :, 0], np.uint32(LUMA_WEIGHTS[0]), out=a, dtype=np.uint32)
+        np.multiply(image[y0:y1, :, 1], np.uint32(LUMA_WEIGHTS[1]), out=t, dtype=np.uint32)
+        a += t
+        np.multiply(image[y0:y1, :, 2], np.uint32(LUMA_WEIGHTS[2]), out=t, dtype=np.uint32)
+        a += t
+        a += np.uint32(1 << (LUMA_SHIFT - 1))
+        a >>= np.uint32(LUMA_SHIFT)
+        np.copyto(out[y0:y1], a, casting="unsafe")
+    return out
+
+
+def _check(radius: int, neighbors: int, method: str) -> None:
+    if int(radius) < 1:
+        raise ValueError(f"LBP radius must be at least 1, got {radius}")
+    if not 1 <= int(neighbors) <= MAX_NEIGHBORS:
+        raise ValueError(f"LBP neighbors must be between 1 and {MAX_NEIGHBORS}, got {neighbors}")
+    if method not in LBP_METHODS:
+        raise ValueError(f"Unknown LBP method: {method}. Supported: {', '.join(LBP_METHODS)}")
+
+
+def neighbor_offsets(radius: int = 1, neighbors: int = 8) -> Tuple[Tuple[int, int], ...]:
+    """(dy, dx) of each sampled neighbor, most significant bit first."""
+    offsets = []
+    for k in range(neighbors):
+        angle = 3 * math.pi / 4 - 2 * math.pi * k / neighbors
+        offsets.append((-round(radius * math.sin(angle)), round(radius * math.cos(angle))))
+    return tuple(offsets)
+
+
+def code_dtype(neighbors: int, method: str = "default") -> np.dtype:
+    """Smallest unsigned dtype holding every code of the variant."""
+    return np.dtype(np.uint8 if max_code(neighbors, method) <= 0xFF else np.uint16)
+
+
+def max_code(neighbors: int, method: str = "default") -> int:
+    """Largest code the variant produces."""
+    return neighbors + 1 if method == "uniform" else (1 << neighbors) - 1
+
+
+@lru_cache(maxsize=None)
+def _variant_lut(neighbors: int, method: str) -> np.ndarray:
+    """Map every raw code to its rotation invariant (or riu2) code."""
+    mask = (1 << neighbors) - 1
+    codes = np.arange(1 << neighbors, dtype=np.uint32)
+
+    def rotate(values: np.ndarray, n: int) -> np.ndarray:
+        return ((values >> np.uint32(n)) | (values << np.uint32(neighbors - n))) & np.uint32(mask)
+
+    if method == "ror":
+        lut = codes.copy()
+        for n in range(1, neighbors):
+            np.minimum(lut, rotate(codes, n), out=lut)
+    else:
+        ones = np.zeros(codes.size, dtype=np.uint32)
+        transitions = np.zeros(codes.size, dtype=np.uint32)
+        changed = codes ^ rotate(codes, 1)
+        for bit in range(neighbors):
+            ones += (codes >> np.uint32(bit)) & np.uint32(1)
+            transitions += (changed >> np.uint32(bit)) & np.uint32(1)
+        lut = np.where(transitions <= 2, ones, neighbors + 1)
+    lut = lut.astype(code_dtype(neighbors, method))
+    lut.flags.writeable = False
+    return lut
+
+
+def lbp_codes(gray: np.ndarray, *, radius: int = 1, neighbors: int = 8, method: str = "default") -> np.ndarray:
+    """LBP code of every pixel of a uint8 (H, W) gray image."""
+    _check(radius, neighbors, method)
+    gray = np.asarray(gray)
+    if gray.ndim != 2:
+        raise ValueError(f"Expected a (H, W) gray image, got shape {gray.shape}")
+    height, width = gray.shape
+    dtype = code_dtype(neighbors)
+    codes = np.zeros((height, width), dtype=dtype)
+    scratch = np.empty((height, width), dtype=dtype)
+    for k, (dy, dx) in enumerate(neighbor_offsets(radius, neighbors)):
+        # Pixels whose neighbor at (dy, dx) lies inside the image
+        y0, y1 = max(0, -dy), max(max(0, -dy), height - max(0, dy))
+        x0, x1 = max(0, -dx), max(max(0, -dx), width - max(0, dx))
+        center = (slice(y0, y1), slice(x0, x1))
+        neighbor = gray[y0 + dy:y1 + dy, x0 + dx:x1 + dx]
+        bits = scratch[center]
+        np.greater_equal(neighbor, gray[center], out=bits, casting="unsafe")
+        np.left_shift(bits, dtype.type(neighbors - 1 - k), out=bits)
+        np.bitwise_or(codes[center], bits, out=codes[center])
+    if method != "default":
+        return _variant_lut(neighbors, method).take(codes)
+    return codes
+
+
+def lbp_from_image(image: np.ndarray, *, radius: int = 1, neighbors: int = 8, method: str = "default") -> np.ndarray:
+    """LBP codes of a uint8 (H, W) or (H, W, C>=3) image via integer luma."""
+    return lbp_codes(luma_u8(image), radius=radius, neighbors=neighbors, method=method)
+
+
+# Pixels ranked per block in `rank_blocks`; bounds the int64 temporaries
+RANK_BLOCK_PIXELS = 1 << 20
+
+EQUALIZE_MODES = ("rank", "tied")
+
+
+def code_histogram(codes: np.ndarray) -> np.ndarray:
+    """Number of pixels with each code value (one bin per possible code)."""
+    levels = 1 << (8 * codes.dtype.itemsize)
+    return np.bincount(codes.reshape(-1), minlength=levels)
+
+
+def tied_equalization(counts: np.ndarray) -> np.ndarray:
+    """Value in [0, 1] per code that keeps equal codes equal.
+
+    Each code maps to the middle of the rank range its pixels occupy,
+    i.e. its mid-rank divided by N - 1 (histogram equalization).
+    """
+    total = int(counts.sum())
+    start = np.cumsum(counts) - counts
+    return (start + (counts - 1) / 2.0) / float(max(1, total - 1))
+
+
+def rank_blocks(codes: np.ndarray, block_pixels: int = RANK_BLOCK_PIXELS):
+    """Yield (y0, y1, ranks) with the rank in [0, 1] of every pixel in rows y0:y1.
+
+    Ranks are those of a stable sort of all codes in row-major order, divided
+    by N - 1, so equal codes get increasing ranks in reading order. They are
+    computed in linear time from the code histogram: a pixel's rank is the
+    number of smaller codes plus the number of equal codes before it.
+    """
+    height, width = codes.shape
+    counts = code_histogram(codes)
+    start = np.cumsum(counts) - counts
+    seen = np.zeros_like(counts)
+    denom = float(max(1, codes.size - 1))
+    rows = max(1, block_pixels // max(1, width))
+    for y0 in range(0, height, rows):
+        y1 = min(height, y0 + rows)
+        block = codes[y0:y1].reshape(-1)
+        # Radix sort for 8/16-bit codes: stable and linear
+        order = np.argsort(block, kind="stable")
+        ordered = block[order]
+        block_counts = np.bincount(block, minlength=counts.size)
+        first = np.cumsum(block_counts) - block_counts
+        ranks = np.empty(block.size, dtype=np.float64)
+        ranks[order] = start[ordered] + seen[ordered] + (np.arange(block.size) - first[ordered])
+        seen += block_counts
+        ranks /= denom
+        yield y0, y1, ranks.reshape(y1 - y0, width)
@@ -0,0 +1,183 @@
+"""Shared image loading for segimage.
+
+Decodes image files into NumPy arrays through a process-wide LRU cache so
+that a run decodes each file once, no matter how many processors or
+metadata writers read it. Entries are keyed by resolved path, modification
+time and size, so a file that changes on disk is decoded again.
+
+Processors also register the arrays they have just written to lossless
+outputs (PNG/TIFF) with `remember_saved_image`; reading such an output back
+(e.g. for `.meta` generation) then skips the decode altogether.
+
+Cached arrays are shared and returned read-only.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+# Default memory budget for decoded images (override with SEGIMAGE_IMAGE_CACHE_MB)
+DEFAULT_CACHE_BYTES = int(float(os.environ.get("SEGIMAGE_IMAGE_CACHE_MB", "512")) * 1024 * 1024)
+
+# Outputs whose decoded pixels equal the array that was saved
+LOSSLESS_SUFFIXES = (".png", ".tif", ".tiff")
+
+FileKey = Tuple[str, int, int]
+
+
+class ImageCache:
+    """LRU cache of decoded image arrays bounded by a memory budget.
+
+    Each file key maps to one array per PIL mode ("L", "RGB", "RGBA").
+    Arrays larger than the whole budget are never cached.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = int(max_bytes)
+        self._entries: "OrderedDict[FileKey, Dict[str, np.ndarray]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def current_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: FileKey, mode: str) -> Optional[np.ndarray]:
+        with self._lock:
+            variants = self._entries.get(key)
+            if variants is None:
+                return None
+            self._entries.move_to_end(key)
+            return variants.get(mode)
+
+    def variants(self, key: FileKey) -> Dict[str, np.ndarray]:
+        with self._lock:
+            return dict(self._entries.get(key, {}))
+
+    def put(self, key: FileKey, mode: str, array: np.ndarray) -> np.ndarray:
+        """Store `array` and return a read-only view of it."""
+        view = array.view()
+        view.flags.writeable = False
+        if array.nbytes > self.max_bytes:
+            return view
+        with self._lock:
+            # Drop stale entries for the same path (older mtime or size)
+            for stale in [k for k in self._entries if k[0] == key[0] and k != key]:
+                self._drop(stale)
+            variants = self._entries.setdefault(key, {})
+            if mode in variants:
+                self._bytes -= variants[mode].nbytes
+            variants[mode] = view
+            self._bytes += view.nbytes
+            self._entries.move_to_end(key)
+            self._evict()
+        return view
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def resize(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = int(max_bytes)
+            self._evict()
+
+    def _drop(self, key: FileKey) -> None:
+        for array in self._entries.pop(key).values():
+            self._bytes -= array.nbytes
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+
+
+_CACHE = ImageCache()
+
+
+def get_image_cache() -> ImageCache:
+    return _CACHE
+
+
+def set_image_cache_budget(max_bytes: int) -> None:
+    """Set the memory budget of the shared cache; 0 disables caching."""
+    _CACHE.resize(max_bytes)
+
+
+def _file_key(path: Path) -> FileKey:
+    path = Path(path).resolve()
+    st = path.stat()
+    return str(path), int(st.st_mtime_ns), int(st.st_size)
+
+
+def to_rgb_array(array: np.ndarray) -> np.ndarray:
+    """Convert an L, RGB or RGBA uint8 array to RGB as PIL's convert() would."""
+    if array.ndim == 2:
+        return np.repeat(array[:, :, None], 3, axis=-1)
+    if array.ndim == 3 and array.shape[-1] == 4:
+        return np.ascontiguousarray(array[:, :, :3])
+    if array.ndim == 3 and array.shape[-1] == 3:
+        return array
+    raise ValueError(f"Cannot convert array of shape {array.shape} to RGB")
+
+
+def _convert_array(array: np.ndarray, mode: str) -> Optional[np.ndarray]:
+    """Derive `mode` from a cached array of another mode, if PIL-exact."""
+    if mode == "RGB" and _array_mode(array) in ("L", "RGBA"):
+        return to_rgb_array(array)
+    return None
+
+
+def _array_mode(array: np.ndarray) -> Optional[str]:
+    if array.dtype != np.uint8:
+        return None
+    if array.ndim == 2:
+        return "L"
+    if array.ndim == 3:
+        return {3: "RGB", 4: "RGBA"}.get(array.shape[-1])
+    return None
+
+
+def image_mode(input_path: Path) -> str:
+    """Return the PIL mode of an image file without decoding its pixels."""
+    with Image.open(input_path) as img:
+        return img.mode
+
+
+def load_image_array(input_path: Path, mode: str = "RGB") -> np.ndarray:
+    """Load an image file as a read-only uint8 array in the given PIL mode.
+
+    "RGB" yields (H, W, 3), "RGBA" (H, W, 4) and "L" (H, W).
+    """
+    key = _file_key(input_path)
+    cached = _CACHE.get(key, mode)
+    if cached is not None:
+        return cached
+    for array in _CACHE.variants(key).values():
+        converted = _convert_array(array, mode)
+        if converted is not None:
+            return _CACHE.put(key, mode, converted)
+    with Image.open(input_path) as img:
+        array = np.array(img.convert(mode), dtype=np.uint8)
+    return _CACHE.put(key, mode, array)
+
+
+def remember_saved_image(output_path: Path, array: np.ndarray) -> None:
+    """Register the uint8 array just saved to `output_path` with the cache.
+
+    Only lossless outputs are remembered, so a later load returns exactly
+    what decoding the file would.
+    """
+    output_path = Path(output_path)
+    mode = _array_mode(array)
+    if mode is None or output_path.suffix.lower() not in LOSSLESS_SUFFIXES or not output_path.exists():
+        return
+    _CACHE.put(_file_key(output_path), mode, np.ascontiguousarray(array))
@@ -0,0 +1,161 @@
+"""Logging for segimage.
+
+Everything segimage reports goes through the "segimage" logger, which has
+no handler until an application (such as the CLI) calls
+`configure_logging`. Two formats are supported: human readable text and
+one JSON object per line for log aggregation.
+
+Each processing step emits a single structured INFO record from
+`log_step`. Code running inside the step attributes its time to stages
+with `stage("load")`, `stage("compute")`, `stage("encode")` and
+`stage("write")` (plus `stage("colormap")` where a palette is applied),
+and the record carries the per-stage seconds in a `timings` field. Images
+are encoded straight to their files, so "encode" includes writing them;
+"write" covers other outputs (graphs, metadata, label maps).
+Outside a step (and without an active profiler), `stage` does nothing.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+
+logger = logging.getLogger("segimage")
+logger.addHandler(logging.NullHandler())
+
+STAGES = ("load", "compute", "colormap", "encode", "write")
+LOG_FORMATS = ("text", "json")
+LOG_LEVELS = ("debug", "info", "warning", "error", "critical")
+
+TEXT_FORMAT = "%(levelname)s %(name)s: %(message)s"
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects including `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def configure_logging(level: str = "warning", fmt: str = "text", stream=None) -> None:
+    """Send segimage's records to `stream` (stderr) at `level` in `fmt`.
+
+    Calling it again replaces the handler installed by the previous call.
+    """
+    for handler in [h for h in logger.handlers if getattr(h, "_segimage", False)]:
+        logger.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler._segimage = True  # type: ignore[attr-defined]
+    handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+    logger.addHandler(handler)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+
+
+def logging_config() -> Optional[Dict[str, Any]]:
+    """Return the arguments of the active `configure_logging` call, if any.
+
+    Used to configure worker processes the same way as the parent.
+    """
+    for handler in logger.handlers:
+        if getattr(handler, "_segimage", False):
+            fmt = "json" if isinstance(handler.formatter, JsonFormatter) else "text"
+            return {"level": logging.getLevelName(logger.level).lower(), "fmt": fmt}
+    return None
+
+
+class StepRecord:
+    """Fields and per-stage seconds collected for one processing step."""
+
+    def __init__(self, event: str, fields: Dict[str, Any]):
+        self.event = event
+        self.fields = fields
+        self.timings: Dict[str, float] = {}
+
+    def add_time(self, stage_name: str, seconds: float) -> None:
+        self.timings[stage_name] = self.timings.get(stage_name, 0.0) + seconds
+
+
+_CURRENT_STEP: "contextvars.ContextVar[Optional[StepRecord]]" = contextvars.ContextVar("segimage_step", default=None)
+
+# Set by segimage.profiling while a profiler is active
+_STAGE_PROFILER = None
+
+
+def set_stage_profiler(profiler) -> None:
+    """Make every `stage` block also a span of `profiler` (None to stop)."""
+    global _STAGE_PROFILER
+    _STAGE_PROFILER = profiler
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Attribute the time spent in the block to stage `name` of the current step."""
+    step = _CURRENT_STEP.get()
+    profiler = _STAGE_PROFILER
+    if step is None and profiler is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        if profiler is None:
+            yield
+        else:
+            with profiler.span(name):
+                yield
+    finally:
+        if step is not None:
+            step.add_time(name, time.perf_counter() - start)
+
+
+@contextmanager
+def log_step(event: str, **fields: Any) -> Iterator[StepRecord]:
+    """Time a processing step and log it as one structured record.
+
+    Set `step.fields["success"]` inside the block; an exception marks the
+    step as failed and is re-raised.
+    """
+    step = StepRecord(event, dict(fields))
+    token = _CURRENT_STEP.set(step)
+    start = time.perf_counter()
+    try:
+        yield step
+    except BaseException:
+        step.fields["success"] = False
+        raise
+    finally:
+        _CURRENT_STEP.reset(token)
+        total = time.perf_counter() - start
+        if logger.isEnabledFor(logging.INFO):
+            timings = {name: round(seconds, 6) for name, seconds in step.timings.items()}
+            timings["total"] = round(total, 6)
+            success = step.fields.get("success")
+            logger.info(
+                "%s %s -> %s %s in %.3fs",
+                event,
+                step.fields.get("input", "-"),
+                step.fields.get("output", "-"),
+                "failed" if success is False else "done",
+                total,
+                extra={"event": event, **step.fields, "timings": timings},
+            )
@@ -0,0 +1,182 @@
+"""MATLAB .mat file access for segimage.
+
+Lists the variables of a .mat file without reading their payloads and
+loads only the variable that is actually needed:
+
+- v4/v5/v7 files go through SciPy: `whosmat` for the listing and
+  `loadmat(variable_names=[...])` for the selected variable, so the other
+  variables are skipped instead of being decompressed.
+- v7.3 files are HDF5 containers and are opened with h5py (an optional
+  dependency). Their numeric variables are returned as `LazyMatArray`
+  objects that read from disk only the parts that are indexed.
+
+SciPy and h5py are imported on demand.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+
+# v7.3 files are HDF5 files with a 512 byte MATLAB header as user block
+HDF5_SIGNATURE = b"\x89HDF\r\n\x1a\n"
+HDF5_USERBLOCK = 512
+
+# HDF5 groups that hold MATLAB internals rather than user variables
+_HDF5_INTERNAL = ("#refs#", "#subsystem#")
+
+# MATLAB_class -> NumPy dtype of the values MATLAB stores for it
+_MATLAB_NUMERIC = {
+    "double": np.float64,
+    "single": np.float32,
+    "int8": np.int8,
+    "uint8": np.uint8,
+    "int16": np.int16,
+    "uint16": np.uint16,
+    "int32": np.int32,
+    "uint32": np.uint32,
+    "int64": np.int64,
+    "uint64": np.uint64,
+    "logical": np.uint8,
+    "char": np.uint16,
+}
+
+
+class MatVariable(NamedTuple):
+    name: str
+    shape: Tuple[int, ...]
+    matlab_class: str
+
+    @property
+    def dtype(self) -> Optional[np.dtype]:
+        """NumPy dtype of a numeric variable, None for cells, structs etc."""
+        dtype = _MATLAB_NUMERIC.get(self.matlab_class)
+        return None if dtype is None else np.dtype(dtype)
+
+
+def is_hdf5_mat(path: Union[str, Path]) -> bool:
+    """Return True if `path` is a MATLAB v7.3 (HDF5) file."""
+    with open(path, "rb") as f:
+        f.seek(HDF5_USERBLOCK)
+        return f.read(len(HDF5_SIGNATURE)) == HDF5_SIGNATURE
+
+
+def _open_hdf5(path: Union[str, Path]):
+    try:
+        import h5py
+    except ImportError as e:
+        raise ImportError(
+            "Reading MATLAB v7.3 files requires h5py; install it with `pip install h5py`"
+        ) from e
+    return h5py.File(str(path), "r")
+
+
+def _hdf5_class(node) -> str:
+    value = node.attrs.get("MATLAB_class", b"")
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def _hdf5_shape(node) -> Tuple[int, ...]:
+    if not hasattr(node, "shape"):
+        return (1, 1)
+    if node.attrs.get("MATLAB_empty", 0):
+        # Empty arrays store their (column-major) dimensions as data
+        return tuple(int(d) for d in np.asarray(node)[::-1])
+    # HDF5 holds MATLAB's column-major arrays with the axes reversed
+    return tuple(int(d) for d in node.shape[::-1])
+
+
+def list_variables(path: Union[str, Path]) -> List[MatVariable]:
+    """List the variables of a .mat file in file order without loading them."""
+    path = Path(path)
+    if is_hdf5_mat(path):
+        with _open_hdf5(path) as f:
+            return [
+                MatVariable(name, _hdf5_shape(node), _hdf5_class(node))
+                for name, node in f.items()
+                if name not in _HDF5_INTERNAL
+            ]
+    from scipy import io
+    return [MatVariable(name, tuple(shape), cls) for name, shape, cls in io.whosmat(str(path))]
+
+
+class LazyMatArray:
+    """A numeric v7.3 variable that is read from disk on demand.
+
+    Indexing follows MATLAB's axis order (the order `shape` reports), so
+    `arr[i0:i1]` reads just those rows. `np.asarray(arr)` reads everything.
+    The file stays open until `close()` is called or the array is garbage
+    collected.
+    """
+
+    def __init__(self, path: Union[str, Path], name: str):
+        self._file = _open_hdf5(path)
+        node = self._file[name]
+        matlab_class = _hdf5_class(node)
+        if not hasattr(node, "shape") or matlab_class not in _MATLAB_NUMERIC:
+            self._file.close()
+            raise ValueError(f"Variable '{name}' is a MATLAB {matlab_class or 'object'}, not a numeric array")
+        self.name = name
+        self.matlab_class = matlab_class
+        self._dataset = node
+        self.shape = _hdf5_shape(node)
+        self.dtype = np.dtype(_MATLAB_NUMERIC[matlab_class])
+        self._empty = bool(node.attrs.get("MATLAB_empty", 0))
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape, dtype=np.int64))
+
+    @property
+    def chunks(self):
+        """HDF5 chunk shape in MATLAB axis order, or None if contiguous."""
+        chunks = self._dataset.chunks
+        return None if chunks is None else tuple(chunks[::-1])
+
+    def __getitem__(self, key) -> np.ndarray:
+        if self._empty:
+            return np.empty(self.shape, dtype=self.dtype)[key]
+        if not isinstance(key, tuple):
+            key = (key,)
+        if any(k is Ellipsis or k is None for k in key):
+            raise IndexError("LazyMatArray supports integer and slice indices only")
+        key = key + (slice(None),) * (self.ndim - len(key))
+        # Reversed key on the stored array, then reverse the remaining axes
+        block = np.asarray(self._dataset[key[::-1]], dtype=self.dtype)
+        return block.transpose()
+
+    def __array__(self, dtype=None, copy=None):
+        array = np.ascontiguousarray(self[()]) if self.ndim else np.asarray(self._dataset[()], dtype=self.dtype)
+        return array if dtype is None else array.astype(dtype, copy=False)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __repr__(self) -> str:
+        return f"<LazyMatArray {self.name!r} shape={self.shape} dtype={self.dtype}>"
+
+
+def load_variable(path: Union[str, Path], name: str):
+    """Load the single variable `name` from a .mat file.
+
+    Returns a NumPy array for v4–v7 files (other variables are not read)
+    and a `LazyMatArray` for v7.3 files.
+    """
+    path = Path(path)
+    if is_hdf5_mat(path):
+        return LazyMatArray(path, name)
+    from scipy import io
+    mat_data = io.loadmat(str(path), variable_names=[name])
+    if name not in mat_data:
+        raise KeyError(f"Variable '{name}' not found in {path}")
+    return mat_data[name]
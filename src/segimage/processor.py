@@ -6,18 +6,22 @@ Handles various image processing operations including MATLAB file conversion.
 from pathlib import Path
 from typing import Union, Optional, Dict, Any
 import numpy as np
-from scipy import io
 from PIL import Image
-from .processors import get_processor, available_processors
-from .utils import save_array_as_image, normalize_to_uint8
+from .extract import MAX_DEPTH, extract_numeric
+from .logs import log_step, logger, stage
+from .formats import SUPPORTED_INPUT_FORMATS, SUPPORTED_OUTPUT_FORMATS
+from .matfile import LazyMatArray, is_hdf5_mat, list_variables, load_variable
+from .processors import available_processors, get_processor, instrument
+from .streaming import convert_to_image, image_dtype
+from .utils import save_array_as_image, normalize_to_uint8, value_range
 
 
 class ImageProcessor:
     """Main image processor class for handling various image operations."""
     
     def __init__(self):
-        self.supported_input_formats = ['.mat', '.npy', '.tif', '.tiff', '.png', '.jpg', '.jpeg']
-        self.supported_output_formats = ['.png', '.jpg', '.jpeg', '.tif', '.tiff', '.npy', '.graphml', '.gml', '.lg', '.lgl', '.edgelist', '.edges', '.txt', '.pickle', '.pkl']
+        self.supported_input_formats = list(SUPPORTED_INPUT_FORMATS)
+        self.supported_output_formats = list(SUPPORTED_OUTPUT_FORMATS)
     
     def process_mat_to_image(self, input_path: Union[str, Path], output_path: Union[str, Path], 
                            output_format: str = '.png') -> bool:
@@ -47,36 +51,37 @@ class ImageProcessor:
             if output_format.lower() not in ['.png', '.jpg', '.jpeg', '.tif', '.tiff']:
                 raise ValueError(f"Unsupported output format: {output_format}. Supported: .png, .jpg, .jpeg, .tif, .tiff")
             
-            # Load MATLAB file
-            mat_data = io.loadmat(str(input_path))
+            # List variables without reading them, then load only the first one
+            with stage("load"):
+                variables = list_variables(input_path)
+                if not variables:
+                    raise ValueError("No data arrays found in MATLAB file")
+                main_key = variables[0].name
+                image_data = load_variable(input_path, main_key)
+            if isinstance(image_data, LazyMatArray):
+                # v7.3 variables are converted out of core, band by band
+                try:
+                    return self._stream_as_image(image_data, input_path, output_path, output_format)
+                finally:
+                    image_data.close()
             
-            # Find the main data array (exclude metadata keys)
-            data_keys = [key for key in mat_data.keys() if not key.startswith('__')]
-            
-            if not data_keys:
-                raise ValueError("No data arrays found in MATLAB file")
-            
-            # Use the first data array found
-            main_key = data_keys[0]
-            image_data = mat_data[main_key]
-            
-            print(f"Found data key: {main_key}")
-            print(f"Data type: {type(image_data)}")
-            print(f"Data shape: {image_data.shape if hasattr(image_data, 'shape') else 'N/A'}")
+            logger.debug("Found data key: %s", main_key)
+            logger.debug("Data type: %s", type(image_data))
+            logger.debug("Data shape: %s", image_data.shape if hasattr(image_data, 'shape') else 'N/A')
             
             # Handle different MATLAB data types
             if hasattr(image_data, 'dtype'):
                 # It's a numpy array
-                if image_data.dtype == np.object_:
+                if image_data.dtype == np.object_ or image_data.dtype.names:
                     # Handle object arrays (cell arrays, structs)
-                    print("Detected object array, attempting to extract numeric data...")
+                    logger.debug("Detected object array, attempting to extract numeric data...")
                     
-                    # Use recursive extraction function
-                    numeric_data, message = self._extract_numeric_data(image_data)
+                    with stage("compute"):
+                        numeric_data, message = self._extract_numeric_data(image_data, cache_key=main_key)
                     
                     if numeric_data is not None:
                         image_data = numeric_data
-                        print(f"✅ {message}")
+                        logger.debug("%s", message)
                     else:
                         raise ValueError(f"Could not extract numeric data: {message}")
                 
@@ -88,15 +93,14 @@ class ImageProcessor:
                 elif image_data.dtype == np.uint64:
                     image_data = image_data.astype(np.uint32)
                 
-                print(f"Final data shape: {image_data.shape}")
-                print(f"Final data type: {image_data.dtype}")
+                logger.debug("Final data shape: %s", image_data.shape)
+                logger.debug("Final data type: %s", image_data.dtype)
                 
                 # Convert to PIL Image and save
                 success = self._save_as_image(image_data, output_path, output_format)
                 
                 if success:
-                    print(f"Successfully converted {input_path} to {output_path}")
-                    print(f"Data shape: {image_data.shape}, Data type: {image_data.dtype}")
+                    logger.debug("Converted %s to %s (shape %s, dtype %s)", input_path, output_path, image_data.shape, image_data.dtype)
                     return True
                 else:
                     return False
@@ -104,108 +108,58 @@ class ImageProcessor:
                 raise ValueError(f"Unexpected data type: {type(image_data)}")
             
         except Exception as e:
-            print(f"Error processing file: {e}")
+            logger.error("Error processing file: %s", e)
+            return False
+    
+    def _stream_as_image(self, image_data: LazyMatArray, input_path: Path, output_path: Path, output_format: str) -> bool:
+        """Convert a lazily read v7.3 variable without loading it into memory."""
+        logger.debug("Found data key: %s", image_data.name)
+        logger.debug("Data shape: %s, MATLAB class: %s", image_data.shape, image_data.matlab_class)
+        if not convert_to_image(image_data, output_path, output_format):
             return False
+        logger.debug("Converted %s to %s (shape %s, dtype %s)", input_path, output_path,
+                     image_data.shape, image_dtype(image_data.dtype))
+        return True
     
     def _save_as_image(self, image_data: np.ndarray, output_path: Path, output_format: str) -> bool:
         """Save numpy array as image file using shared utilities."""
         return save_array_as_image(image_data, output_path, output_format)
     
-    def _extract_numeric_data(self, data, max_depth=5, current_depth=0):
+    def _extract_numeric_data(self, data, max_depth=MAX_DEPTH, cache_key=None):
         """
-        Recursively extract numeric data from nested object arrays and structured arrays.
+        Extract numeric data from nested object arrays and structured arrays.
         
         Args:
             data: The data to extract from
-            max_depth: Maximum recursion depth to prevent infinite loops
-            current_depth: Current recursion depth
+            max_depth: Maximum nesting depth to search
+            cache_key: Key (e.g. the variable name) under which the path to the
+                numeric data is cached for files with the same layout
             
         Returns:
             tuple: (numeric_data, success_message) or (None, error_message)
         """
-        if current_depth >= max_depth:
-            return None, f"Maximum recursion depth ({max_depth}) reached"
-        
-        if not hasattr(data, 'dtype'):
-            return None, f"Data has no dtype attribute: {type(data)}"
-        
-        # If it's already numeric, return it
-        if data.dtype != np.object_:
-            return data, f"Found numeric data with shape {data.shape} and dtype {data.dtype}"
-        
-        # Check if it's a structured array (record array)
-        if hasattr(data.dtype, 'names') and data.dtype.names:
-            print(f"  {'  ' * current_depth}Structured array with fields: {data.dtype.names}")
-            
-            # Try each field
-            for field_name in data.dtype.names:
-                field_data = data[field_name]
-                print(f"  {'  ' * current_depth}Checking field '{field_name}'...")
-                
-                result, message = self._extract_numeric_data(field_data, max_depth, current_depth + 1)
-                if result is not None:
-                    return result, f"Found numeric data in field '{field_name}': {message}"
-            
-            # If no field worked, try to flatten and search
-            print(f"  {'  ' * current_depth}No numeric data in fields, searching flattened structure...")
-            for i, item in enumerate(data.flat):
-                if i > 10:  # Limit search to first 10 items
-                    break
-                result, message = self._extract_numeric_data(item, max_depth, current_depth + 1)
-                if result is not None:
-                    return result, f"Found numeric data at index {i}: {message}"
-        
-        # Regular object array
-        if data.size > 0:
-            print(f"  {'  ' * current_depth}Object array with {data.size} elements")
-            
-            # Try to convert the entire array
-            try:
-                numeric_data = np.array(data, dtype=np.float32)
-                return numeric_data, f"Successfully converted object array to numeric array with shape {numeric_data.shape}"
-            except (ValueError, TypeError):
-                pass
-            
-            # Try individual elements
-            for i in range(min(data.size, 10)):  # Limit search to first 10 elements
-                item = data.flat[i]
-                print(f"  {'  ' * current_depth}Checking element {i}: type={type(item)}, dtype={getattr(item, 'dtype', 'N/A')}")
-                
-                # If this element is a structured array, extract from its fields
-                if hasattr(item, 'dtype') and hasattr(item.dtype, 'names') and item.dtype.names:
-                    print(f"  {'  ' * current_depth}Element {i} is a structured array with fields: {item.dtype.names}")
-                    for field_name in item.dtype.names:
-                        field_value = item[field_name]
-                        print(f"  {'  ' * current_depth}Field '{field_name}' value type: {type(field_value)}, dtype: {getattr(field_value, 'dtype', 'N/A')}")
-                        
-                        if hasattr(field_value, 'dtype') and field_value.dtype != np.object_:
-                            return field_value, f"Found numeric data in element {i}, field '{field_name}' with shape {field_value.shape}"
-                        elif hasattr(field_value, 'dtype') and field_value.dtype == np.object_:
-                            # Go deeper into this field
-                            result, message = self._extract_numeric_data(field_value, max_depth, current_depth + 1)
-                            if result is not None:
-                                return result, f"Found numeric data in element {i}, field '{field_name}': {message}"
-                
-                # Regular recursive search
-                result, message = self._extract_numeric_data(item, max_depth, current_depth + 1)
-                if result is not None:
-                    return result, f"Found numeric data at index {i}: {message}"
-        
-        return None, f"No numeric data found at depth {current_depth}"
+        return extract_numeric(data, cache_key=cache_key, max_depth=max_depth)
     
     def _save_metadata(self, metadata_path: Path, image_data: np.ndarray, original_key: str, output_format: str):
         """Save metadata about the image data for future reference."""
         try:
-            # Get the normalized image data for metadata
-            normalized_data = normalize_to_uint8(image_data.copy())
+            # Get the normalized image data for metadata (normalization never
+            # modifies its input, so no defensive copy is needed)
+            normalized_data = normalize_to_uint8(image_data)
+            original_min = original_max = None
+            if image_data.size > 0:
+                if np.issubdtype(image_data.dtype, np.number):
+                    original_min, original_max = value_range(image_data)
+                else:
+                    original_min, original_max = np.min(image_data), np.max(image_data)
             
             metadata = {
                 "original_key": original_key,
                 "shape": image_data.shape,
                 "original_dtype": str(image_data.dtype),
                 "size": image_data.size,
-                "original_min_value": float(np.min(image_data)) if image_data.size > 0 else None,
-                "original_max_value": float(np.max(image_data)) if image_data.size > 0 else None,
+                "original_min_value": float(original_min) if original_min is not None else None,
+                "original_max_value": float(original_max) if original_max is not None else None,
                 "normalized_min_value": float(np.min(normalized_data)) if normalized_data.size > 0 else None,
                 "normalized_max_value": float(np.max(normalized_data)) if normalized_data.size > 0 else None,
                 "output_format": output_format,
@@ -219,7 +173,7 @@ class ImageProcessor:
                 json.dump(metadata, f, indent=2)
                 
         except Exception as e:
-            print(f"Warning: Could not save metadata: {e}")
+            logger.warning("Could not save metadata: %s", e)
     
     def inspect_mat_file(self, input_path: Union[str, Path]) -> bool:
         """
@@ -241,53 +195,31 @@ class ImageProcessor:
             if input_path.suffix.lower() != '.mat':
                 raise ValueError(f"Input file must be a .mat file, got: {input_path.suffix}")
             
-            # Load MATLAB file
-            mat_data = io.loadmat(str(input_path))
+            # Only the variable directory is read; no array payloads
+            variables = list_variables(input_path)
             
             print(f"\n📁 MATLAB File Contents: {input_path}")
+            print(f"   Format: {'v7.3 (HDF5)' if is_hdf5_mat(input_path) else 'v4-v7'}")
             print("=" * 50)
             
-            # Show all keys
+            # Show all variables
             print("Available data keys:")
-            for key in sorted(mat_data.keys()):
-                if not key.startswith('__'):
-                    data = mat_data[key]
-                    if hasattr(data, 'shape'):
-                        print(f"  📊 {key}: {type(data).__name__} with shape {data.shape}")
-                        if hasattr(data, 'dtype'):
-                            print(f"         Data type: {data.dtype}")
-                            if data.dtype == np.object_:
-                                print(f"         Object array - may contain mixed data types")
-                    else:
-                        print(f"  📄 {key}: {type(data).__name__}")
+            for var in variables:
+                shape = " x ".join(str(d) for d in var.shape)
+                print(f"  📊 {var.name}: {var.matlab_class} with shape ({shape})")
+                if var.dtype is not None:
+                    print(f"         Data type: {var.dtype}")
                 else:
-                    print(f"  🔧 {key}: {type(mat_data[key]).__name__} (metadata)")
+                    print(f"         Object array - may contain mixed data types")
             
             # Show detailed info for first data array
-            data_keys = [key for key in mat_data.keys() if not key.startswith('__')]
-            if data_keys:
-                main_key = data_keys[0]
-                main_data = mat_data[main_key]
-                
-                print(f"\n🔍 Detailed analysis of '{main_key}':")
-                print(f"   Type: {type(main_data).__name__}")
-                
-                if hasattr(main_data, 'shape'):
-                    print(f"   Shape: {main_data.shape}")
-                    print(f"   Size: {main_data.size}")
-                    
-                    if hasattr(main_data, 'dtype'):
-                        print(f"   Data type: {main_data.dtype}")
-                        
-                        if main_data.dtype == np.object_:
-                            print(f"   Object array detected!")
-                            if main_data.size > 0:
-                                first_element = main_data.flat[0]
-                                print(f"   First element type: {type(first_element)}")
-                                if hasattr(first_element, 'dtype'):
-                                    print(f"   First element data type: {first_element.dtype}")
-                                    if hasattr(first_element, 'shape'):
-                                        print(f"   First element shape: {first_element.shape}")
+            if variables:
+                main = variables[0]
+                print(f"\n🔍 Detailed analysis of '{main.name}':")
+                print(f"   MATLAB class: {main.matlab_class}")
+                print(f"   Shape: {main.shape}")
+                print(f"   Data type: {main.dtype if main.dtype is not None else 'object'}")
+                print(f"   Size: {int(np.prod(main.shape, dtype=np.int64))}")
             
             print("=" * 50)
             return True
@@ -310,26 +242,40 @@ class ImageProcessor:
             bool: True if successful, False otherwise
         """
         process_type = process_type.lower()
+        input_path = Path(input_path)
+        output_path = Path(output_path)
         
-        if process_type == "mat_to_image":
-            # Determine output format from output_path extension
-            output_format = output_path.suffix.lower()
-            if output_format not in ['.png', '.jpg', '.jpeg', '.tif', '.tiff']:
-                output_format = '.png'  # Default to PNG
-            return self.process_mat_to_image(input_path, output_path, output_format)
-        elif process_type == "inspect":
+        if process_type == "inspect":
             return self.inspect_mat_file(input_path)
+        
+        if process_type == "mat_to_image":
+            run = instrument(process_type, self._mat_to_image_for_output)
         else:
             # Look up pluggable processors
-            proc = get_processor(process_type)
-            if proc is not None:
-                return bool(proc(Path(input_path), Path(output_path), **options))
-            print(f"Unknown process type: {process_type}")
-            builtins = ["mat_to_image", "inspect"]
-            extra = list(available_processors().keys())
-            all_types = builtins + extra
-            print(f"Supported types: {', '.join(all_types)}")
-            return False
+            try:
+                run = get_processor(process_type)
+            except ImportError as e:
+                logger.error("%s", e)
+                return False
+            if run is None:
+                builtins = ["mat_to_image", "inspect"]
+                extra = list(available_processors().keys())
+                all_types = builtins + extra
+                logger.error("Unknown process type: %s. Supported types: %s", process_type, ', '.join(all_types))
+                return False
+        
+        # One structured record per processed file, with per-stage timings
+        with log_step("process", processor=process_type, input=str(input_path), output=str(output_path)) as step:
+            success = bool(run(input_path, output_path, **options))
+            step.fields["success"] = success
+        return success
+    
+    def _mat_to_image_for_output(self, input_path: Path, output_path: Path) -> bool:
+        # Determine output format from output_path extension
+        output_format = output_path.suffix.lower()
+        if output_format not in ['.png', '.jpg', '.jpeg', '.tif', '.tiff']:
+            output_format = '.png'  # Default to PNG
+        return self.process_mat_to_image(input_path, output_path, output_format)
     
     def get_supported_formats(self) -> dict:
         """Get supported input and output formats."""
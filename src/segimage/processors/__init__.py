@@ -3,15 +3,47 @@ Processors package for segimage.
 
 Defines a simple registry for pluggable processing strategies. Each processor
 implements a `run(input_path, output_path, **options) -> bool` method.
+
+Processors that work on pixels also register an in-memory counterpart,
+`segment(array, **options) -> Segmentation`, which takes a decoded image
+array and returns the visualization (and labels, where the processor has
+them) without touching the filesystem; the file-based `run` functions are
+thin wrappers around it. `segment(array, name, **options)` dispatches to
+it by processor name.
+
+Built-in processors are registered lazily by name with a "module:function"
+entry point, so importing this package is cheap: a backend's module (and
+its heavy dependencies such as igraph or scikit-image) is only imported the
+first time that processor is requested.
 """
 
-from typing import Callable, Dict
+import importlib
+import importlib.util
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from ..logs import log_step
 
 
 ProcessorFunc = Callable[..., bool]
 
 
+class Segmentation(NamedTuple):
+    """Result of running a processor on an in-memory image."""
+
+    # uint8 visualization: (H, W) grayscale, (H, W, 3) RGB or (H, W, 4) RGBA
+    image: Any
+    # Per-pixel labels or codes (H, W), or None if the processor has none
+    labels: Any = None
+
+
+SegmentFunc = Callable[..., Segmentation]
+
+
 _REGISTRY: Dict[str, ProcessorFunc] = {}
+_SEGMENTERS: Dict[str, SegmentFunc] = {}
+
+# name -> (entry point "module:function", top-level modules it requires)
+_LAZY: Dict[str, Tuple[str, Tuple[str, ...]]] = {}
 
 
 def register_processor(name: str, func: ProcessorFunc) -> None:
@@ -19,24 +51,132 @@ def register_processor(name: str, func: ProcessorFunc) -> None:
     _REGISTRY[key] = func
 
 
-def get_processor(name: str) -> ProcessorFunc:
+def register_segmenter(name: str, func: SegmentFunc) -> None:
+    """Register the in-memory `segment(array, **options)` form of a processor."""
     key = name.strip().lower()
-    return _REGISTRY.get(key)  # type: ignore[return-value]
+    _SEGMENTERS[key] = func
 
 
-def available_processors() -> Dict[str, ProcessorFunc]:
-    return dict(_REGISTRY)
+def register_lazy_processor(name: str, entry_point: str, requires: Sequence[str] = ()) -> None:
+    """Register a processor by its "module:function" entry point.
+
+    Relative module names are resolved against this package. The module is
+    imported on first use; processors whose `requires` modules are not
+    installed are left out of `available_processors()`.
+    """
+    key = name.strip().lower()
+    _LAZY[key] = (entry_point, tuple(requires))
+
+
+def _load(key: str) -> ProcessorFunc:
+    """Import a lazily registered processor.
+
+    Raises:
+        ImportError: if its module (or a dependency of it) fails to import
+    """
+    entry_point, _ = _LAZY[key]
+    module_name, func_name = entry_point.split(":")
+    try:
+        module = importlib.import_module(module_name, __name__)
+    except ImportError as e:
+        missing = f" (missing module: {e.name})" if e.name else ""
+        raise ImportError(f"Processor '{key}' could not be imported{missing}: {e}", name=e.name) from e
+    func = getattr(module, func_name)
+    # Importing the module usually registers it already; keep that one
+    return _REGISTRY.setdefault(key, func)
+
+
+def _is_installed(requires: Sequence[str]) -> bool:
+    try:
+        return all(importlib.util.find_spec(name) is not None for name in requires)
+    except (ImportError, ValueError):
+        return False
 
 
-# Import built-in processors to ensure they are registered on package import
-from . import color_cluster  # noqa: E402,F401
-from . import lbp  # noqa: E402,F401
-from . import graph  # noqa: E402,F401
+class _LazyProcessor:
+    """Callable stand-in that imports the real processor when first called."""
 
-# Optional processors with extra dependencies should be imported lazily
-try:  # noqa: SIM105
-    from . import slico  # noqa: E402,F401
-except Exception:  # If scikit-image is not installed, skip registration silently
-    pass
+    def __init__(self, name: str):
+        self.name = name
 
+    def __call__(self, *args, **kwargs) -> bool:
+        func = get_processor(self.name)
+        if func is None:
+            raise ImportError(f"Processor '{self.name}' could not be imported")
+        return func(*args, **kwargs)
 
+    def __repr__(self) -> str:
+        return f"<lazy processor {self.name!r} -> {_LAZY[self.name][0]}>"
+
+
+# Wraps processors handed out by get_processor; set by segimage.profiling
+_INSTRUMENT: Optional[Callable[[str, ProcessorFunc], ProcessorFunc]] = None
+
+
+def set_instrumentation(wrapper: Optional[Callable[[str, ProcessorFunc], ProcessorFunc]]) -> None:
+    """Install `wrapper(name, func) -> func` around every processor lookup."""
+    global _INSTRUMENT
+    _INSTRUMENT = wrapper
+
+
+def instrument(name: str, func: ProcessorFunc) -> ProcessorFunc:
+    """Return `func` wrapped by the active instrumentation, if any."""
+    return func if _INSTRUMENT is None else _INSTRUMENT(name, func)
+
+
+def get_processor(name: str) -> ProcessorFunc:
+    """Return the processor registered as `name`, or None if there is none.
+
+    Raises:
+        ImportError: if the processor is registered but cannot be imported
+    """
+    key = name.strip().lower()
+    func = _REGISTRY.get(key)
+    if func is None and key in _LAZY:
+        func = _load(key)
+    if func is None:
+        return func  # type: ignore[return-value]
+    return instrument(key, func)
+
+
+def get_segmenter(name: str) -> Optional[SegmentFunc]:
+    key = name.strip().lower()
+    if key not in _SEGMENTERS and key in _LAZY:
+        # Importing the processor's module registers its segmenter
+        _load(key)
+    func = _SEGMENTERS.get(key)
+    if func is None:
+        return None
+    return instrument(key, func)
+
+
+def segment(array, process_type: str, **options: Any) -> Segmentation:
+    """Run processor `process_type` on an in-memory image array.
+
+    Raises:
+        ValueError: if no processor of that name works on arrays
+    """
+    func = get_segmenter(process_type)
+    if func is None:
+        supported = sorted(set(_SEGMENTERS) | {k for k, (_, req) in _LAZY.items() if _is_installed(req)})
+        raise ValueError(f"Unknown process type: {process_type}. Supported: {', '.join(supported)}")
+    with log_step("segment", processor=process_type.strip().lower(), shape=getattr(array, "shape", None)) as step:
+        result = func(array, **options)
+        step.fields["success"] = True
+    return result
+
+
+def available_processors() -> Dict[str, ProcessorFunc]:
+    """Return the known processors without importing the lazy ones."""
+    processors: Dict[str, ProcessorFunc] = {}
+    for key, (_, requires) in _LAZY.items():
+        if key not in _REGISTRY and _is_installed(requires):
+            processors[key] = _LazyProcessor(key)
+    processors.update(_REGISTRY)
+    return processors
+
+
+register_lazy_processor("color_cluster", ".color_cluster:color_cluster_run")
+register_lazy_processor("lbp", ".lbp:lbp_run")
+register_lazy_processor("graph", ".graph:graph_run", requires=("igraph",))
+register_lazy_processor("slico", ".slico:slico_run", requires=("skimage",))
@@ -1,11 +1,17 @@
 """
 Color clustering processor.
 
-Groups image pixels into up to K communities/clusters by frequency of exact
-color values. The top K-1 most frequent colors become their own clusters; all
-remaining colors are mapped to a single "remain" cluster. Output is a labeled
-image where each cluster is assigned a display color according to the selected
-palette.
+Groups image pixels into up to K communities/clusters. By default
+(`method="frequency"`) clusters are exact color values: the top K-1 most
+frequent colors become their own clusters; all remaining colors are mapped
+to a single "remain" cluster. For photos with many distinct colors,
+`method="kmeans"` (mini-batch k-means) and `method="median_cut"` find K
+representative colors on a random pixel subsample and assign every pixel
+to its nearest one. Output is a labeled image where each cluster is
+assigned a display color according to the selected palette.
+
+`color_cluster_segment` works on an in-memory array; `color_cluster_run`
+wraps it with file I/O.
 """
 
 from __future__ import annotations
@@ -16,10 +22,29 @@ from typing import Literal, Tuple
 import numpy as np
 from PIL import Image
 
-from . import register_processor
+from . import Segmentation, register_processor, register_segmenter
+from ..colormap import palette_colors
+from ..formats import INDEXED_OUTPUT_FORMATS
+from ..histogram import (
+    choose_histogram_strategy, get_histogram_strategy, pack_colors, unpack_colors,
+)
+from ..loader import load_image_array, remember_saved_image
+from ..logs import stage
+from ..utils import save_pil_image
 
 
-Palette = Literal["bw", "rainbow"]
+Palette = Literal["bw", "rainbow", "hsv"]
+Method = Literal["frequency", "kmeans", "median_cut"]
+
+CLUSTER_METHODS = ("frequency", "kmeans", "median_cut")
+
+# Pixels sampled to fit the approximate methods
+SAMPLE_PIXELS = 1 << 16
+# Mini-batch k-means: pixels per batch and number of batches
+KMEANS_BATCH = 4096
+KMEANS_ITERATIONS = 100
+# Pixel-centroid distances computed per chunk during assignment
+ASSIGN_BLOCK = 1 << 22
 
 
 def _ensure_uint8_image(array: np.ndarray) -> np.ndarray:
@@ -47,139 +72,230 @@ def _ensure_uint8_image(array: np.ndarray) -> np.ndarray:
 
 
 def _load_image(input_path: Path) -> np.ndarray:
-    img = Image.open(input_path)
-    img = img.convert("RGB")
-    return np.array(img, dtype=np.uint8)
-
-
-def _count_colors(image: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
-    # image: HxW (grayscale) or HxWx3 (RGB)
-    if image.ndim == 2:
-        flat = image.reshape(-1, 1)
-    else:
-        flat = image.reshape(-1, image.shape[-1])
-    # Use structured array for unique rows (colors)
-    if flat.shape[1] == 1:
-        colors, counts = np.unique(flat, return_counts=True, axis=0)
-    else:
-        # View as void to enable unique on rows
-        view = flat.view([("c", flat.dtype, flat.shape[1])])
-        uniq, counts = np.unique(view, return_counts=True)
-        colors = uniq.view(flat.dtype).reshape(-1, flat.shape[1])
-    return colors, counts
+    return load_image_array(input_path, "RGB")
 
 
 def _generate_palette(k: int, palette: Palette) -> np.ndarray:
-    if palette == "bw":
-        if k == 1:
-            vals = np.array([0.0], dtype=np.float64)
-        else:
-            vals = np.linspace(0.0, 1.0, k)
-        # grayscale 0..255
-        return (vals * 255.0).round().astype(np.uint8)[:, None]
-    # rainbow palette → generate RGB using matplotlib if available; else HSV fallback
-    try:
-        import matplotlib.pyplot as plt  # type: ignore
-
-        cmap = plt.get_cmap("rainbow")
-        cols = np.array([cmap(i / max(k, 1))[:3] for i in range(k)], dtype=np.float64)
-        return (cols * 255.0).round().astype(np.uint8)
-    except Exception:
-        # Fallback: evenly spaced HSV → RGB
-        import colorsys
-
-        cols = []
-        for i in range(k):
-            h = i / max(k, 1)
-            r, g, b = colorsys.hsv_to_rgb(h, 1.0, 1.0)
-            cols.append([int(r * 255), int(g * 255), int(b * 255)])
-        return np.array(cols, dtype=np.uint8)
+    """K display colors: gray levels (K,) for bw, RGB (K, 3) otherwise."""
+    # Gray levels span black to white; color palettes are sampled at i / K
+    return palette_colors(k, palette, endpoint=palette == "bw")
 
 
 def _map_to_clusters(image: np.ndarray, K: int) -> Tuple[np.ndarray, np.ndarray]:
-    # Count unique colors
-    colors, counts = _count_colors(image)
-    order = np.argsort(-counts)  # descending by frequency
-    colors = colors[order]
+    """Cluster label of every pixel and the K-1 most frequent colors.
 
-    # Take top K-1 as distinct clusters, others merged into remain cluster
+    Labels use the smallest unsigned dtype that holds K - 1 (uint8 for
+    K <= 256). Pixels are labeled straight from their packed color keys
+    through a key -> cluster table, without a per-pixel color index.
+    """
+    keys, bits = pack_colors(image)
     num_distinct = max(0, K - 1)
-    top_colors = colors[:num_distinct]
+    remain_cluster_id = num_distinct  # last cluster index
+    label_dtype = np.min_scalar_type(remain_cluster_id)
+
+    # Count colors; most frequent first
+    counts_of = get_histogram_strategy(choose_histogram_strategy(keys, bits))
+    uniq, counts, _ = counts_of(keys, bits, False)
+    top_keys = uniq[np.argsort(-counts)[:num_distinct]]
+    channels = 1 if image.ndim == 2 else image.shape[-1]
+    top_colors = unpack_colors(top_keys, channels, image.dtype)
+
+    # Cluster id per packed color: its frequency rank, or the remain cluster
+    table = np.full(1 << bits, remain_cluster_id, dtype=label_dtype)
+    table[top_keys] = np.arange(top_keys.size, dtype=label_dtype)
+    labels = table.take(keys)
+    return labels.reshape(image.shape[:2]), top_colors
+
+
+def _pixel_rows(image: np.ndarray) -> np.ndarray:
+    return image.reshape(-1, 1) if image.ndim == 2 else image.reshape(-1, image.shape[-1])
+
+
+def _sample_pixels(image: np.ndarray, size: int, rng: np.random.Generator) -> np.ndarray:
+    """Up to `size` distinct pixels drawn at random, as float32 rows."""
+    flat = _pixel_rows(image)
+    if flat.shape[0] > size:
+        flat = flat[np.sort(rng.choice(flat.shape[0], size, replace=False))]
+    return flat.astype(np.float32)
+
+
+def _nearest(pixels: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """Index of the nearest center of every float32 pixel row."""
+    # |p - c|^2 = |p|^2 - 2 p.c + |c|^2; |p|^2 does not change the argmin
+    distances = pixels @ (-2.0 * centers.T)
+    distances += (centers * centers).sum(axis=1)
+    return distances.argmin(axis=1)
+
+
+def _kmeans_plus_plus(sample: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    centers = [sample[rng.integers(sample.shape[0])]]
+    closest = ((sample - centers[0]) ** 2).sum(axis=1)
+    while len(centers) < k:
+        total = float(closest.sum())
+        if total <= 0:
+            # Fewer distinct colors than clusters
+            break
+        center = sample[rng.choice(sample.shape[0], p=closest / total)]
+        centers.append(center)
+        np.minimum(closest, ((sample - center) ** 2).sum(axis=1), out=closest)
+    return np.array(centers, dtype=np.float32)
+
+
+def _kmeans_centers(sample: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """Mini-batch k-means (k-means++ seeding) on the sampled pixels."""
+    centers = _kmeans_plus_plus(sample, k, rng)
+    k = centers.shape[0]
+    seen = np.zeros(k, dtype=np.float64)
+    for _ in range(KMEANS_ITERATIONS):
+        batch = sample[rng.integers(0, sample.shape[0], size=min(KMEANS_BATCH, sample.shape[0]))]
+        nearest = _nearest(batch, centers)
+        counts = np.bincount(nearest, minlength=k)
+        sums = np.stack([np.bincount(nearest, weights=batch[:, c], minlength=k)
+                         for c in range(batch.shape[1])], axis=1)
+        seen += counts
+        hit = counts > 0
+        # Move each center towards its batch mean with a per-center rate 1 / seen
+        centers[hit] += ((sums[hit] - counts[hit, None] * centers[hit]) / seen[hit, None]).astype(np.float32)
+    return centers
+
+
+def _median_cut_centers(sample: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """Median-cut quantization of the sampled pixels; box means as centers."""
+    boxes = [sample]
+    spans = [np.ptp(sample, axis=0)]
+    while len(boxes) < k:
+        widest = int(np.argmax([span.max() for span in spans]))
+        if spans[widest].max() <= 0:
+            break
+        box, span = boxes.pop(widest), spans.pop(widest)
+        order = np.argsort(box[:, int(np.argmax(span))], kind="stable")
+        half = box.shape[0] // 2
+        for part in (box[order[:half]], box[order[half:]]):
+            boxes.append(part)
+            spans.append(np.ptp(part, axis=0))
+    return np.array([box.mean(axis=0) for box in boxes], dtype=np.float32)
+
+
+_CENTER_FINDERS = {"kmeans": _kmeans_centers, "median_cut": _median_cut_centers}
+
+
+def _assign_to_centers(image: np.ndarray, centers: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """Nearest-center label of every pixel, in chunks of bounded size."""
+    flat = _pixel_rows(image)
+    labels = np.empty(flat.shape[0], dtype=dtype)
+    rows = max(1, ASSIGN_BLOCK // max(1, centers.shape[0]))
+    for start in range(0, flat.shape[0], rows):
+        chunk = flat[start:start + rows].astype(np.float32)
+        labels[start:start + rows] = _nearest(chunk, centers)
+    return labels.reshape(image.shape[:2])
+
+
+def _approximate_clusters(image: np.ndarray, K: int, method: str, *, sample_size: int = SAMPLE_PIXELS,
+                          seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Cluster labels and representative colors from a subsample fit.
+
+    Fitting only sees `sample_size` pixels, so its cost does not grow with
+    the image; assignment is one chunked pass over all pixels. Clusters are
+    numbered by decreasing pixel count, as with the frequency method.
+    """
+    rng = np.random.default_rng(seed)
+    label_dtype = np.min_scalar_type(max(0, K - 1))
+    sample = _sample_pixels(image, max(1, int(sample_size)), rng)
+    centers = _CENTER_FINDERS[method](sample, K, rng)
+    labels = _assign_to_centers(image, centers, label_dtype)
+
+    counts = np.bincount(labels.reshape(-1), minlength=centers.shape[0])
+    order = np.argsort(-counts, kind="stable")
+    rank = np.empty(order.size, dtype=label_dtype)
+    rank[order] = np.arange(order.size, dtype=label_dtype)
+    colors = centers[order].round().clip(0, 255).astype(image.dtype)
+    return rank.take(labels), colors
+
+
+def _prepare_image(array: np.ndarray) -> np.ndarray:
+    """Bring an arbitrary array to uint8 (H, W) or (H, W, 3)."""
+    image = _ensure_uint8_image(np.asarray(array))
+    if image.ndim == 3 and image.shape[-1] not in (1, 3):
+        # Reduce to first 3 channels if more
+        image = image[..., :3]
+    if image.ndim == 3 and image.shape[-1] == 1:
+        image = image[..., 0]
+    return image
+
+
+def _cluster(image: np.ndarray, K: int, palette: Palette, method: Method = "frequency", *,
+             sample_size: int = SAMPLE_PIXELS, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Cluster labels of a prepared image and the display color of each cluster."""
+    if method not in CLUSTER_METHODS:
+        raise ValueError(f"Unknown clustering method: {method}. Supported: {', '.join(CLUSTER_METHODS)}")
+    if K < 1:
+        K = 1
 
-    # Build mapping: color tuple -> cluster_id
-    cluster_ids = {}
-    for idx, col in enumerate(top_colors):
-        key = tuple(col.tolist())
-        cluster_ids[key] = idx
+    with stage("compute"):
+        if method == "frequency":
+            labels, _ = _map_to_clusters(image, K)
+        else:
+            labels, _ = _approximate_clusters(image, K, method, sample_size=sample_size, seed=seed)
 
-    remain_cluster_id = num_distinct  # last cluster index
+    with stage("colormap"):
+        # Build display colors for K clusters
+        pal = _generate_palette(K, palette)
+    return labels, pal
 
-    # Assign clusters per pixel
-    if image.ndim == 2:
-        h, w = image.shape
-        labels = np.empty((h * w,), dtype=np.int32)
-        flat = image.reshape(-1, 1)
-    else:
-        h, w, _ = image.shape
-        labels = np.empty((h * w,), dtype=np.int32)
-        flat = image.reshape(-1, image.shape[-1])
-
-    # Vectorized mapping using hash of rows
-    # Construct a lookup for top colors
-    if flat.shape[1] == 1:
-        top_set = set(int(c[0]) for c in top_colors)
-        for i, v in enumerate(flat[:, 0]):
-            labels[i] = cluster_ids.get((int(v),), remain_cluster_id) if v in top_set else remain_cluster_id
-    else:
-        top_set = set(tuple(int(x) for x in c) for c in top_colors)
-        for i, row in enumerate(flat):
-            key = tuple(int(x) for x in row.tolist())
-            labels[i] = cluster_ids.get(key, remain_cluster_id) if key in top_set else remain_cluster_id
 
-    return labels.reshape(h, w), top_colors
+def _indexed_image(labels: np.ndarray, pal: np.ndarray) -> Image.Image:
+    """'P' mode image of uint8 labels with the cluster colors as its palette."""
+    img = Image.fromarray(labels)
+    rgb = pal if pal.ndim == 2 else np.repeat(pal[:, None], 3, axis=1)
+    img.putpalette(rgb.astype(np.uint8).tobytes())
+    return img
 
 
-def color_cluster_run(input_path: Path, output_path: Path, *, K: int = 2, palette: Palette = "bw") -> bool:
-    # Load image (accept common formats); also accept .npy as raw arrays
-    input_path = Path(input_path)
-    if input_path.suffix.lower() == ".npy":
-        array = np.load(str(input_path))
-        image = _ensure_uint8_image(array)
-        if image.ndim == 3 and image.shape[-1] not in (1, 3):
-            # Reduce to first 3 channels if more
-            image = image[..., :3]
-        if image.ndim == 3 and image.shape[-1] == 1:
-            image = image[..., 0]
-    else:
-        image = _load_image(input_path)
+def color_cluster_segment(image: np.ndarray, *, K: int = 2, palette: Palette = "bw", method: Method = "frequency",
+                          sample_size: int = SAMPLE_PIXELS, seed: int = 0) -> Segmentation:
+    """Cluster the colors of an in-memory image.
 
-    if K < 1:
-        K = 1
+    `image` is a (H, W) or (H, W, C) array; non-uint8 data is scaled to
+    0..255 first. Returns the palette-mapped visualization and the cluster
+    label (0..K-1, uint8 for K <= 256) of every pixel. The "kmeans" and
+    "median_cut" methods fit on `sample_size` random pixels drawn with
+    `seed`, so results are reproducible.
+    """
+    labels, pal = _cluster(_prepare_image(image), K, palette, method, sample_size=sample_size, seed=seed)
+    with stage("colormap"):
+        out = pal.take(labels, axis=0)
+    return Segmentation(out, labels)
 
-    labels, top_colors = _map_to_clusters(image, K)
 
-    # Build display colors for K clusters
-    pal = _generate_palette(K, palette)
-    if palette == "bw":
-        # pal shape: (K,1) representing grayscale 0..255
-        if labels.ndim != 2:
-            raise ValueError("Labels must be 2D")
-        out = pal[labels][:, :, 0]
-        mode = "L"
-    else:
-        # pal shape: (K,3) RGB
-        out = pal[labels]
-        mode = "RGB"
-
-    img = Image.fromarray(out.astype(np.uint8), mode=mode)
-    # Determine format from suffix
-    suffix = output_path.suffix.lower()
-    fmt = "PNG" if suffix == ".png" else "JPEG" if suffix in (".jpg", ".jpeg") else "TIFF" if suffix in (".tif", ".tiff") else None
-    img.save(output_path, fmt) if fmt else img.save(output_path)
+def color_cluster_run(input_path: Path, output_path: Path, *, K: int = 2, palette: Palette = "bw",
+                      method: Method = "frequency", sample_size: int = SAMPLE_PIXELS, seed: int = 0) -> bool:
+    # Load image (accept common formats); also accept .npy as raw arrays
+    input_path = Path(input_path)
+    output_path = Path(output_path)
+    with stage("load"):
+        if input_path.suffix.lower() == ".npy":
+            image = np.load(str(input_path))
+        else:
+            image = _load_image(input_path)
+
+    labels, pal = _cluster(_prepare_image(image), K, palette, method, sample_size=sample_size, seed=seed)
+    indexed = palette != "bw" and labels.dtype == np.uint8
+    if indexed and output_path.suffix.lower() in INDEXED_OUTPUT_FORMATS:
+        # Write the labels with the cluster colors as palette: no RGB
+        # expansion, and PNG packs K <= 16 clusters into 1, 2 or 4 bits.
+        # bw outputs stay single-channel 'L' images of gray levels
+        save_pil_image(_indexed_image(labels, pal), output_path)
+        return True
+
+    with stage("colormap"):
+        out = pal.take(labels, axis=0)
+    save_pil_image(Image.fromarray(out), output_path)
+    remember_saved_image(output_path, out)
     return True
 
 
 # Register the processor
 register_processor("color_cluster", color_cluster_run)
+register_segmenter("color_cluster", color_cluster_segment)
 
 
@@ -1,13 +1,17 @@
 """
 Graph processor using python-igraph.
 
-Builds an undirected 8-neighbor pixel adjacency graph from an image.
-Each pixel is a vertex and has edges to its 8-connected neighbors. The
-graph stores useful attributes:
+Builds an undirected pixel adjacency graph from an image. Each pixel is a
+vertex and has edges to its 8-connected neighbors (or 4-connected with
+`connectivity=4`). The graph stores useful attributes:
  - width, height: image dimensions (graph attributes)
  - For grayscale images: vertex attribute `gray` in [0,255]
  - For RGB images: vertex attributes `r`, `g`, `b` in [0,255]
 
+`graph_from_array` builds the graph of an in-memory image and
+`graph_segment` renders it to an RGBA array; `graph_run` wraps them with
+file I/O.
+
 Outputs are graph file formats determined by the output file suffix:
  - .graphml → GraphML
  - .gml     → GML
@@ -15,22 +19,40 @@ Outputs are graph file formats determined by the output file suffix:
  - .edgelist, .edges, .txt → edge list
  - .pickle, .pkl → igraph's pickled format
 
-Note: Large images create very large graphs (O(H*W) vertices and up to
-8*H*W edges). Consider downsampling prior to running this processor for
-very high-resolution inputs.
+Edge list and LGL outputs only depend on the image size, so they are
+streamed band by band straight from the lattice without building an
+igraph.Graph; memory stays bounded regardless of image size.
+
+Note: Other formats build the full graph, which is very large for large
+images (O(H*W) vertices and up to 4*H*W edges). Consider downsampling
+prior to running this processor for very high-resolution inputs.
 """
 
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Tuple
+from typing import List, Sequence, Tuple
 
 import numpy as np
 from PIL import Image, ImageDraw
 
 from igraph import Graph
 
-from . import register_processor
+from . import Segmentation, register_processor, register_segmenter
+from ..loader import image_mode, load_image_array, remember_saved_image
+from ..logs import logger, stage
+from ..utils import save_pil_image
+
+
+def _prepare_array(arr: np.ndarray) -> Tuple[np.ndarray, bool]:
+    """Return (uint8 array, is_rgb) for a (H, W) or (H, W, C>=3) array."""
+    arr = np.asarray(arr)
+    if arr.ndim == 2:
+        # grayscale
+        return arr.astype(np.uint8), False
+    if arr.ndim == 3 and arr.shape[-1] >= 3:
+        return arr[..., :3].astype(np.uint8), True
+    raise ValueError("Unsupported array shape for graph processor")
 
 
 def _load_image_as_array(input_path: Path) -> Tuple[np.ndarray, bool]:
@@ -43,19 +65,59 @@ def _load_image_as_array(input_path: Path) -> Tuple[np.ndarray, bool]:
     """
     input_path = Path(input_path)
     if input_path.suffix.lower() == ".npy":
-        arr = np.load(str(input_path))
-        if arr.ndim == 2:
-            # grayscale
-            return arr.astype(np.uint8), False
-        if arr.ndim == 3 and arr.shape[-1] >= 3:
-            return arr[..., :3].astype(np.uint8), True
-        raise ValueError("Unsupported array shape for graph processor")
-    img = Image.open(input_path)
+        return _prepare_array(np.load(str(input_path)))
     # Preserve grayscale if already L; otherwise RGB
-    if img.mode == "L":
-        return np.array(img, dtype=np.uint8), False
-    img = img.convert("RGB")
-    return np.array(img, dtype=np.uint8), True
+    if image_mode(input_path) == "L":
+        return load_image_array(input_path, "L"), False
+    return load_image_array(input_path, "RGB"), True
+
+
+# Neighbor displacements (dy, dx) with non-negative direction so each
+# undirected pair is emitted once. Order matters: it fixes the edge order
+# written to edge-list outputs.
+# Right (0,+1), Down (+1,0), Down-Right (+1,+1), Down-Left (+1,-1)
+NEIGHBOR_OFFSETS = {
+    4: ((0, 1), (1, 0)),
+    8: ((0, 1), (1, 0), (1, 1), (1, -1)),
+}
+
+
+def _neighbor_offsets(connectivity: int) -> Tuple[Tuple[int, int], ...]:
+    try:
+        return NEIGHBOR_OFFSETS[int(connectivity)]
+    except KeyError:
+        raise ValueError(f"Unsupported connectivity: {connectivity}. Supported: 4, 8") from None
+
+
+def _build_grid_edges(
+    height: int,
+    width: int,
+    offsets: Sequence[Tuple[int, int]] = NEIGHBOR_OFFSETS[8],
+) -> np.ndarray:
+    """Vectorized generation of undirected lattice edges for an HxW grid.
+
+    For every (dy, dx) in `offsets`, connects each pixel (y, x) to
+    (y + dy, x + dx) when the neighbor lies inside the grid. Edges are grouped
+    by offset and listed in row-major order of the source pixel.
+
+    Returns a contiguous array of shape (E, 2) with vertex index pairs; int32
+    when all vertex ids fit, int64 otherwise.
+    """
+    dtype = np.int32 if height * width <= np.iinfo(np.int32).max else np.int64
+    ids = np.arange(height * width, dtype=dtype).reshape(height, width)
+
+    sizes = [max(0, height - abs(dy)) * max(0, width - abs(dx)) for dy, dx in offsets]
+    edges = np.empty((sum(sizes), 2), dtype=dtype)
+    start = 0
+    for (dy, dx), size in zip(offsets, sizes):
+        if size == 0:
+            continue
+        y0, y1 = max(0, -dy), height - max(0, dy)
+        x0, x1 = max(0, -dx), width - max(0, dx)
+        edges[start:start + size, 0] = ids[y0:y1, x0:x1].reshape(-1)
+        edges[start:start + size, 1] = ids[y0 + dy:y1 + dy, x0 + dx:x1 + dx].reshape(-1)
+        start += size
+    return edges
 
 
 def _build_8_neighbor_edges(height: int, width: int) -> np.ndarray:
@@ -63,32 +125,33 @@ def _build_8_neighbor_edges(height: int, width: int) -> np.ndarray:
 
     Returns an array of shape (E, 2) with vertex index pairs.
     """
-    # For undirected graphs, add each pair once. We'll connect to neighbors
-    # with non-negative direction displacements to avoid duplicates:
-    # Right (0,+1), Down (+1,0), Down-Right (+1,+1), Down-Left (+1,-1)
-    edges = []
-
-    def vid(y: int, x: int) -> int:
-        return y * width + x
-
-    # Right
-    for y in range(height):
-        for x in range(width - 1):
-            edges.append((vid(y, x), vid(y, x + 1)))
-    # Down
-    for y in range(height - 1):
-        for x in range(width):
-            edges.append((vid(y, x), vid(y + 1, x)))
-    # Down-Right
-    for y in range(height - 1):
-        for x in range(width - 1):
-            edges.append((vid(y, x), vid(y + 1, x + 1)))
-    # Down-Left
-    for y in range(height - 1):
-        for x in range(1, width):
-            edges.append((vid(y, x), vid(y + 1, x - 1)))
-
-    return np.array(edges, dtype=np.int64)
+    return _build_grid_edges(height, width, NEIGHBOR_OFFSETS[8])
+
+
+def _build_graph(array: np.ndarray, is_rgb: bool, offsets: Sequence[Tuple[int, int]]) -> Graph:
+    """Build the pixel lattice graph in bulk from a uint8 image array.
+
+    Edges are handed to igraph as the (E, 2) array itself; igraph consumes it
+    row by row, so no (E, 2) list of Python lists is ever built. igraph keeps
+    vertex attributes as Python lists internally, so each channel is passed
+    once as `uint8.tolist()`, whose 0..255 values are shared small ints.
+    """
+    h, w = array.shape[:2]
+    if is_rgb:
+        vertex_attrs = {name: array[:, :, i].reshape(-1).tolist() for i, name in enumerate("rgb")}
+    else:
+        vertex_attrs = {"gray": array.reshape(-1).tolist()}
+
+    g = Graph(
+        n=int(h * w),
+        directed=False,
+        graph_attrs={"width": int(w), "height": int(h)},
+        vertex_attrs=vertex_attrs,
+    )
+    edges = _build_grid_edges(h, w, offsets)
+    if edges.size > 0:
+        g.add_edges(edges)
+    return g
 
 
 def _save_graph(g: Graph, output_path: Path) -> None:
@@ -112,145 +175,249 @@ def _save_graph(g: Graph, output_path: Path) -> None:
     g.write_graphml(str(output_path.with_suffix(".graphml")))
 
 
-def graph_run(input_path: Path, output_path: Path) -> bool:
-    try:
-        array, is_rgb = _load_image_as_array(input_path)
-        if is_rgb:
-            h, w, _ = array.shape
+# Text formats whose content follows from H, W and the neighborhood alone;
+# these are written band by band without building an igraph.Graph.
+STREAMING_SUFFIXES = (".lg", ".lgl", ".edgelist", ".edges", ".txt")
+
+# Upper bound on the number of edges formatted per band of vertices.
+STREAM_BAND_EDGES = 1 << 18
+
+
+def _load_image_shape(input_path: Path) -> Tuple[int, int]:
+    """Return (height, width) of an input without decoding its pixels."""
+    input_path = Path(input_path)
+    if input_path.suffix.lower() == ".npy":
+        arr = np.load(str(input_path), mmap_mode="r")
+        if arr.ndim == 2 or (arr.ndim == 3 and arr.shape[-1] >= 3):
+            return int(arr.shape[0]), int(arr.shape[1])
+        raise ValueError("Unsupported array shape for graph processor")
+    with Image.open(input_path) as img:
+        return int(img.height), int(img.width)
+
+
+def _iter_neighbor_bands(
+    height: int,
+    width: int,
+    offsets: Sequence[Tuple[int, int]],
+    max_edges: int = STREAM_BAND_EDGES,
+):
+    """Yield (ids, neighbors, valid, isolated) for consecutive bands of vertices.
+
+    `ids` holds the band's vertex ids (N,), `neighbors` (N, K) the ids of each
+    vertex's higher-numbered neighbors in ascending order, `valid` (N, K)
+    which of them lie inside the grid and `isolated` (N,) the vertices
+    without any neighbor. Bands are whole rows where they fit; rows with more
+    than `max_edges` neighbor slots are split into column chunks, so memory
+    per band is bounded by `max_edges` for any image width.
+    """
+    forward = sorted(offsets, key=lambda o: o[0] * width + o[1])
+    dy = np.array([o[0] for o in forward], dtype=np.int64)
+    dx = np.array([o[1] for o in forward], dtype=np.int64)
+    step = dy * width + dx
+    band_vertices = max(1, max_edges // max(1, len(forward)))
+    rows_per_band, columns = max(1, band_vertices // width), min(width, band_vertices)
+    for y0 in range(0, height, rows_per_band):
+        y1 = min(height, y0 + rows_per_band)
+        for x0 in range(0, width, columns):
+            # A full-width band spans its rows; a narrower chunk stays in row y0
+            x1 = width if columns == width else min(width, x0 + columns)
+            start, stop = y0 * width + x0, (y1 - 1) * width + x1
+            ids = np.arange(start, stop, dtype=np.int64)
+            ys, xs = (ids // width)[:, None], (ids % width)[:, None]
+            valid = (ys + dy < height) & (xs + dx >= 0) & (xs + dx < width)
+            behind = (ys - dy >= 0) & (xs - dx >= 0) & (xs - dx < width)
+            isolated = ~(valid.any(axis=1) | behind.any(axis=1))
+            yield ids, ids[:, None] + step, valid, isolated
+
+
+def _write_formatted(f, fmt: str, values: np.ndarray) -> None:
+    """Write flat integer `values` through one printf-style `fmt` string."""
+    if values.size:
+        f.write(fmt % tuple(values.tolist()))
+
+
+def _stream_edgelist(height: int, width: int, offsets: Sequence[Tuple[int, int]], output_path: Path) -> None:
+    """Write the lattice in igraph's edge list format, band by band.
+
+    Matches `Graph.write_edgelist`: one "u v" line per edge with u < v,
+    sorted by u, then v.
+    """
+    with open(output_path, "w") as f:
+        for ids, neighbors, valid, _ in _iter_neighbor_bands(height, width, offsets):
+            pairs = np.empty((int(valid.sum()), 2), dtype=np.int64)
+            pairs[:, 0] = np.broadcast_to(ids[:, None], valid.shape)[valid]
+            pairs[:, 1] = neighbors[valid]
+            _write_formatted(f, "%d %d\n" * len(pairs), pairs.reshape(-1))
+
+
+def _stream_lgl(height: int, width: int, offsets: Sequence[Tuple[int, int]], output_path: Path) -> None:
+    """Write the lattice in igraph's LGL format, band by band.
+
+    Matches `Graph.write_lgl` for graphs without names or weights: a "# u"
+    header followed by each higher-numbered neighbor v of u, with isolated
+    vertices listed as a bare header.
+    """
+    with open(output_path, "w") as f:
+        for ids, neighbors, valid, isolated in _iter_neighbor_bands(height, width, offsets):
+            table = np.concatenate([ids[:, None], neighbors], axis=1)
+            keep = np.concatenate([(valid.any(axis=1) | isolated)[:, None], valid], axis=1)
+            is_header = np.zeros(keep.shape, dtype=bool)
+            is_header[:, 0] = True
+            fmt = "".join(np.where(is_header[keep], "# %d\n", "%d\n").tolist())
+            _write_formatted(f, fmt, table[keep])
+
+
+def _stream_graph(height: int, width: int, offsets: Sequence[Tuple[int, int]], output_path: Path) -> None:
+    if output_path.suffix.lower() in (".lg", ".lgl"):
+        _stream_lgl(height, width, offsets, output_path)
+    else:
+        _stream_edgelist(height, width, offsets, output_path)
+
+
+# Render graph on a spaced grid so nodes don't touch. Each pixel becomes a
+# cell of size `RENDER_CELL_SIZE` with a circular node centered in it. The
+# blank space between adjacent nodes is 2x the node diameter D, so the
+# center-to-center distance is D + 2*D = 3*D.
+RENDER_NODE_RADIUS = 2
+RENDER_CELL_SIZE = 3 * (2 * RENDER_NODE_RADIUS)
+
+
+def _stamp_runs(paint) -> List[Tuple[int, int, int, int, int]]:
+    """Rasterize a shape once with PIL and describe it as runs of cell pixels.
+
+    `paint(draw, c)` draws a single shape for a node centered at (c, c) on a
+    blank canvas. Each touched pixel is expressed relative to the node's cell
+    as (cell row shift, row in cell, cell column shift, column in cell), and
+    horizontally adjacent pixels are merged into runs
+    `(qy, ry, qx, rx_start, rx_stop)`. This keeps the vectorized renderer
+    identical to PIL's own rasterization.
+    """
+    cs = RENDER_CELL_SIZE
+    c = 2 * cs + cs // 2
+    canvas = Image.new("L", (2 * c + 1, 2 * c + 1), 0)
+    paint(ImageDraw.Draw(canvas), c)
+    ys, xs = np.nonzero(np.array(canvas))
+
+    runs: List[Tuple[int, int, int, int, int]] = []
+    for y, x in zip(ys.tolist(), xs.tolist()):
+        qy, ry = divmod(y - (c - cs // 2), cs)
+        qx, rx = divmod(x - (c - cs // 2), cs)
+        if runs and runs[-1][:3] == (qy, ry, qx) and runs[-1][4] == rx:
+            runs[-1] = (qy, ry, qx, runs[-1][3], rx + 1)
         else:
-            h, w = array.shape
+            runs.append((qy, ry, qx, rx, rx + 1))
+    return runs
 
-        # If the requested output is an image format, render a grid-plot of the graph
+
+def _render_graph_rgba(array: np.ndarray, is_rgb: bool, diagonals: bool = True) -> np.ndarray:
+    """Render the pixel graph as an RGBA uint8 array with NumPy broadcast writes.
+
+    Edges are drawn as 1px lines colored with the average of their two node
+    colors and nodes as small filled circles on a white background. Each
+    shape is rasterized once by PIL into runs of cell pixels and stamped at
+    every node at once through a (H, cell, W, cell) view of the output, in
+    the same order as drawing every shape one by one: right, down,
+    down-right, down-left edges, then nodes. Only down-right and down-left
+    edges overlap (besides node centers, which nodes cover); the latter wins.
+    """
+    rgb = array[..., :3] if is_rgb else np.repeat(array[..., None], 3, axis=-1)
+    rgb = rgb.astype(np.uint16)
+    h, w = rgb.shape[:2]
+    cs = RENDER_CELL_SIZE
+    r = RENDER_NODE_RADIUS
+
+    # Stamp packed RGBA words so every painted pixel is a single store
+    out = np.full((h * cs, w * cs, 4), 255, dtype=np.uint8)
+    cells = out.view(np.uint32).reshape(h, cs, w, cs)
+
+    def stamp(runs: List[Tuple[int, int, int, int, int]], y0: int, x0: int, colors: np.ndarray) -> None:
+        # colors[i, j] is drawn for the node in cell (y0 + i, x0 + j)
+        n_y, n_x = colors.shape[:2]
+        if n_y == 0 or n_x == 0:
+            return
+        rgba = np.full((n_y, n_x, 4), 255, dtype=np.uint8)
+        rgba[..., :3] = colors
+        packed = rgba.view(np.uint32)
+        for qy, ry, qx, rx0, rx1 in runs:
+            cells[y0 + qy:y0 + qy + n_y, ry, x0 + qx:x0 + qx + n_x, rx0:rx1] = packed
+
+    def line_to(ty: int, tx: int):
+        return lambda draw, c: draw.line([(c, c), (c + tx, c + ty)], fill=255, width=1)
+
+    def avg(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return ((a + b) // 2).astype(np.uint8)
+
+    stamp(_stamp_runs(line_to(0, cs)), 0, 0, avg(rgb[:, :-1], rgb[:, 1:]))
+    stamp(_stamp_runs(line_to(cs, 0)), 0, 0, avg(rgb[:-1, :], rgb[1:, :]))
+    if diagonals:
+        stamp(_stamp_runs(line_to(cs, cs)), 0, 0, avg(rgb[:-1, :-1], rgb[1:, 1:]))
+        stamp(_stamp_runs(line_to(cs, -cs)), 0, 1, avg(rgb[:-1, 1:], rgb[1:, :-1]))
+
+    disk = _stamp_runs(
+        lambda draw, c: draw.ellipse([(c - r, c - r), (c + r, c + r)], fill=255, outline=255, width=1)
+    )
+    stamp(disk, 0, 0, rgb.astype(np.uint8))
+
+    return out
+
+
+def graph_from_array(image: np.ndarray, *, connectivity: int = 8) -> Graph:
+    """Build the pixel adjacency graph of an in-memory image."""
+    offsets = _neighbor_offsets(connectivity)
+    array, is_rgb = _prepare_array(image)
+    with stage("compute"):
+        return _build_graph(array, is_rgb, offsets)
+
+
+def graph_segment(image: np.ndarray, *, connectivity: int = 8) -> Segmentation:
+    """Render the pixel graph of an in-memory image as an RGBA array.
+
+    Use `graph_from_array` for the igraph.Graph itself.
+    """
+    diagonals = (1, 1) in _neighbor_offsets(connectivity)
+    array, is_rgb = _prepare_array(image)
+    with stage("compute"):
+        return Segmentation(_render_graph_rgba(array, is_rgb, diagonals))
+
+
+def graph_run(input_path: Path, output_path: Path, *, connectivity: int = 8) -> bool:
+    try:
+        offsets = _neighbor_offsets(connectivity)
         suffix = output_path.suffix.lower()
+        if suffix in STREAMING_SUFFIXES:
+            with stage("load"):
+                h, w = _load_image_shape(input_path)
+            with stage("write"):
+                _stream_graph(h, w, offsets, output_path)
+            return True
+
+        with stage("load"):
+            array, _ = _load_image_as_array(input_path)
+
+        # If the requested output is an image format, render a grid-plot of the graph
         if suffix in (".png", ".jpg", ".jpeg", ".tif", ".tiff"):
-            # Render graph on a spaced grid so nodes don't touch.
-            # Each pixel becomes a cell of size `cell_size`; the node is a smaller square
-            # centered in the cell, leaving blank margins around it.
-            # Choose circular nodes and set spacing so the blank space between
-            # adjacent nodes is 2x the node diameter. If D is the node diameter
-            # and G is the blank space, we want G = 2*D, and the center-to-center
-            # distance becomes D + G = 3*D. We set cell_size = 3*D.
-            node_radius = 2  # radius in pixels (default)
-            node_diameter = 2 * node_radius
-            cell_size = 3 * node_diameter  # ensures 2x diameter blank space
-            half = cell_size // 2
-
-            out_w = w * cell_size
-            out_h = h * cell_size
-
-            # Background: white for clean spacing
-            img = Image.new("RGBA", (out_w, out_h), (255, 255, 255, 255))
-            draw = ImageDraw.Draw(img, "RGBA")
-
-            # Draw edges between node centers with color as the intermediate
-            # (average) of the two node colors; keep edges as thin as possible.
-            for y in range(h):
-                for x in range(w):
-                    cx = x * cell_size + half
-                    cy = y * cell_size + half
-
-                    def avg_color(px1_y: int, px1_x: int, px2_y: int, px2_x: int) -> tuple[int, int, int, int]:
-                        if is_rgb:
-                            c1 = array[px1_y, px1_x, :3].astype(int)
-                            c2 = array[px2_y, px2_x, :3].astype(int)
-                            avg = ((c1 + c2) // 2).tolist()
-                            return (int(avg[0]), int(avg[1]), int(avg[2]), 255)
-                        else:
-                            v1 = int(array[px1_y, px1_x])
-                            v2 = int(array[px2_y, px2_x])
-                            v = (v1 + v2) // 2
-                            return (v, v, v, 255)
-
-                    # Right neighbor
-                    if x + 1 < w:
-                        nx = (x + 1) * cell_size + half
-                        col = avg_color(y, x, y, x + 1)
-                        draw.line([(cx, cy), (nx, cy)], fill=col, width=1)
-                    # Down neighbor
-                    if y + 1 < h:
-                        ny = (y + 1) * cell_size + half
-                        col = avg_color(y, x, y + 1, x)
-                        draw.line([(cx, cy), (cx, ny)], fill=col, width=1)
-                    # Down-right neighbor
-                    if x + 1 < w and y + 1 < h:
-                        nx = (x + 1) * cell_size + half
-                        ny = (y + 1) * cell_size + half
-                        col = avg_color(y, x, y + 1, x + 1)
-                        draw.line([(cx, cy), (nx, ny)], fill=col, width=1)
-                    # Down-left neighbor
-                    if x - 1 >= 0 and y + 1 < h:
-                        nx = (x - 1) * cell_size + half
-                        ny = (y + 1) * cell_size + half
-                        col = avg_color(y, x, y + 1, x - 1)
-                        draw.line([(cx, cy), (nx, ny)], fill=col, width=1)
-
-            # Draw nodes as small circles colored by pixel value
-            for y in range(h):
-                for x in range(w):
-                    cx = x * cell_size + half
-                    cy = y * cell_size + half
-                    top_left_x = cx - node_radius
-                    top_left_y = cy - node_radius
-                    bottom_right_x = cx + node_radius
-                    bottom_right_y = cy + node_radius
-                    if is_rgb:
-                        r, g, b = [int(v) for v in array[y, x, :3]]
-                    else:
-                        v = int(array[y, x])
-                        r = g = b = v
-                    draw.ellipse(
-                        [(top_left_x, top_left_y), (bottom_right_x, bottom_right_y)],
-                        fill=(r, g, b, 255),
-                        outline=(r, g, b, 255),
-                        width=1,
-                    )
+            rgba = graph_segment(array, connectivity=connectivity).image
+            img = Image.fromarray(rgba, mode="RGBA")
 
             # Save image in requested format
             out_mode_img = img
             if suffix in (".jpg", ".jpeg"):
                 out_mode_img = img.convert("RGB")
 
-            fmt = (
-                "PNG"
-                if suffix == ".png"
-                else "JPEG"
-                if suffix in (".jpg", ".jpeg")
-                else "TIFF"
-                if suffix in (".tif", ".tiff")
-                else None
-            )
-            out_mode_img.save(output_path, fmt) if fmt else out_mode_img.save(output_path)
+            save_pil_image(out_mode_img, output_path)
+            remember_saved_image(output_path, rgba)
             return True
 
         # Otherwise, build and save a graph file
-        num_vertices = int(h * w)
-        g = Graph()
-        g.add_vertices(num_vertices)
-        g["width"] = int(w)
-        g["height"] = int(h)
-
-        # Vertex attributes
-        if is_rgb:
-            g.vs["r"] = array[:, :, 0].reshape(-1).astype(int).tolist()
-            g.vs["g"] = array[:, :, 1].reshape(-1).astype(int).tolist()
-            g.vs["b"] = array[:, :, 2].reshape(-1).astype(int).tolist()
-        else:
-            g.vs["gray"] = array.reshape(-1).astype(int).tolist()
-
-        # Edges (8-connectivity, undirected without duplicates)
-        edges = _build_8_neighbor_edges(h, w)
-        if edges.size > 0:
-            g.add_edges(edges.tolist())
-
-        _save_graph(g, output_path)
+        g = graph_from_array(array, connectivity=connectivity)
+        with stage("write"):
+            _save_graph(g, output_path)
         return True
     except Exception as e:
-        print(f"Error running graph processor: {e}")
+        logger.error("Error running graph processor: %s", e)
         return False
 
 
 # Register the processor
 register_processor("graph", graph_run)
-
-
-
+register_segmenter("graph", graph_segment)
@@ -1,8 +1,15 @@
 """
 LBP scalar visualization processor.
 
-Maps each pixel to its 8-neighbor Local Binary Pattern value (normalized to
-[0,1]) and renders an image using a chosen palette (bw or rainbow).
+Maps each pixel to its Local Binary Pattern code (8 neighbors at radius 1
+by default; any radius, up to 16 neighbors and rotation-invariant or
+uniform variants through `segimage.lbp`) and renders an image using a
+chosen palette (bw, or rainbow/hsv from `segimage.colormap`). Color
+palettes are applied to the rank-normalized codes (histogram ranks, see
+`segimage.lbp.rank_blocks`) or, with `equalize="tied"`, to one equalized
+value per code.
+
+`lbp_segment` works on an in-memory array; `lbp_run` wraps it with file I/O.
 """
 
 from __future__ import annotations
@@ -13,63 +20,115 @@ from typing import Literal
 import numpy as np
 from PIL import Image
 
-from . import register_processor
-from ..utils import load_rgb_image, compute_lbp_float_from_rgb_uint8, colormap_from_unit_scalar
-
-
-Palette = Literal["bw", "rainbow"]
-
-
-def lbp_run(input_path: Path, output_path: Path, *, palette: Palette = "bw") -> bool:
+from . import Segmentation, register_processor, register_segmenter
+from ..loader import remember_saved_image
+from ..logs import logger, stage
+from ..colormap import apply_colormap
+from ..lbp import code_histogram, lbp_from_image, max_code, rank_blocks, tied_equalization
+from ..utils import load_rgb_image, save_pil_image
+
+
+Palette = Literal["bw", "rainbow", "hsv"]
+Method = Literal["default", "ror", "uniform"]
+Equalize = Literal["rank", "tied"]
+
+
+def _ensure_uint8_image(array: np.ndarray) -> np.ndarray:
+    array = np.asarray(array)
+    if array.ndim == 2:
+        # grayscale is its own luma
+        return array.astype(np.uint8, copy=False)
+    if array.ndim == 3 and array.shape[-1] >= 3:
+        return array[..., :3].astype(np.uint8, copy=False)
+    raise ValueError("Unsupported array shape for LBP processor")
+
+
+def _codes_to_u8(codes: np.ndarray, top: int) -> np.ndarray:
+    """Scale codes in 0..top to 0..255 with integer rounding."""
+    if top == 0xFF:
+        return codes.astype(np.uint8, copy=False)
+    scaled = codes.astype(np.uint32) * np.uint32(255) + np.uint32(top // 2)
+    scaled //= np.uint32(max(1, top))
+    return scaled.astype(np.uint8)
+
+
+def lbp_segment(
+    image: np.ndarray,
+    *,
+    palette: Palette = "bw",
+    radius: int = 1,
+    neighbors: int = 8,
+    method: Method = "default",
+    equalize: Equalize = "rank",
+) -> Segmentation:
+    """Compute the LBP visualization of an in-memory image.
+
+    `image` is a (H, W) grayscale or (H, W, C>=3) array, cast to uint8.
+    Returns the palette-mapped visualization and the LBP codes (uint8, or
+    uint16 for more than 8 neighbors). See `segimage.lbp` for `radius`,
+    `neighbors` and the `method` variants.
+
+    With a color palette, `equalize="rank"` spreads pixels evenly over
+    the colormap (equal codes get increasing ranks in reading order);
+    `equalize="tied"` maps every code to the mid-rank of its pixels, so
+    equal codes always get the same color.
+    """
+    if equalize not in ("rank", "tied"):
+        raise ValueError(f"Unknown LBP equalization: {equalize}. Supported: rank, tied")
+    image = _ensure_uint8_image(image)
+
+    with stage("compute"):
+        codes = lbp_from_image(image, radius=radius, neighbors=neighbors, method=method)
+    top = max_code(neighbors, method)
+
+    with stage("colormap"):
+        if palette == "bw":
+            img_array = _codes_to_u8(codes, top)
+        elif equalize == "tied":
+            # One color per code
+            unit = tied_equalization(code_histogram(codes))[:top + 1]
+            img_array = apply_colormap(unit, palette).take(codes, axis=0)
+        else:
+            # Histogram ranks, colormapped block by block
+            img_array = np.empty(codes.shape + (3,), dtype=np.uint8)
+            for y0, y1, ranks in rank_blocks(codes):
+                apply_colormap(ranks, palette, out=img_array[y0:y1])
+
+    return Segmentation(img_array, codes)
+
+
+def lbp_run(
+    input_path: Path,
+    output_path: Path,
+    *,
+    palette: Palette = "bw",
+    radius: int = 1,
+    neighbors: int = 8,
+    method: Method = "default",
+    equalize: Equalize = "rank",
+) -> bool:
     try:
         input_path = Path(input_path)
-        if input_path.suffix.lower() == ".npy":
-            array = np.load(str(input_path))
-            if array.ndim == 2:
-                # grayscale → stack to RGB for LBP pipeline
-                image_rgb = np.stack([array] * 3, axis=-1).astype(np.uint8)
-            elif array.ndim == 3 and array.shape[-1] >= 3:
-                image_rgb = array[..., :3].astype(np.uint8)
+        with stage("load"):
+            if input_path.suffix.lower() == ".npy":
+                image = np.load(str(input_path))
             else:
-                raise ValueError("Unsupported array shape for LBP processor")
-        else:
-            image_rgb = load_rgb_image(input_path)
-
-        lbp_vals = compute_lbp_float_from_rgb_uint8(image_rgb)
-
-        # Rank-normalize for rainbow palette: map ranks to [0,1]
-        if palette == "rainbow":
-            flat = lbp_vals.reshape(-1)
-            # argsort twice to get rank positions; ties get increasing order but we normalize by N-1
-            order = np.argsort(flat, kind="mergesort")
-            ranks = np.empty_like(order)
-            ranks[order] = np.arange(order.size)
-            denom = max(1, ranks.size - 1)
-            lbp_mapped = ranks.reshape(lbp_vals.shape).astype(np.float64) / float(denom)
-            img_array, mode = colormap_from_unit_scalar(lbp_mapped, palette)
-        else:
-            img_array, mode = colormap_from_unit_scalar(lbp_vals, palette)
-
-        img = Image.fromarray(img_array, mode=mode)
-        suffix = output_path.suffix.lower()
-        fmt = (
-            "PNG"
-            if suffix == ".png"
-            else "JPEG"
-            if suffix in (".jpg", ".jpeg")
-            else "TIFF"
-            if suffix in (".tif", ".tiff")
-            else None
-        )
-        img.save(output_path, fmt) if fmt else img.save(output_path)
+                image = load_rgb_image(input_path)
+
+        img_array = lbp_segment(
+            image, palette=palette, radius=radius, neighbors=neighbors, method=method, equalize=equalize
+        ).image
+        save_pil_image(Image.fromarray(img_array), output_path)
+        remember_saved_image(output_path, img_array)
         return True
     except Exception as e:
-        print(f"Error running LBP: {e}")
+        logger.error("Error running LBP: %s", e)
         return False
 
 
 # Register the processor
 register_processor("lbp", lbp_run)
+register_segmenter("lbp", lbp_segment)
 
 
 
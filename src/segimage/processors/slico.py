@@ -4,27 +4,41 @@ SLICO superpixel processor (SLIC with adaptive compactness).
 Generates superpixels using scikit-image's SLIC implementation with
 `slic_zero=True` (also known as SLICO). Outputs a color image where each
 superpixel region is represented by the average color of the underlying
-pixels to provide a visually interpretable segmentation result.
+pixels (computed with `np.bincount`) to provide a visually interpretable
+segmentation result.
+
+`slico_segment` works on an in-memory array and also returns the label
+map; `slico_run` wraps it with file I/O and can write the label map next
+to the visualization (.npy, compressed .npz or 16-bit PNG), so labels and
+visualization come from a single SLIC run.
+
+Large images can be segmented in overlapping tiles (`tile_size`), in
+parallel worker processes and in float32, with superpixels cut by tile
+seams merged back together; memory then grows with the tile size rather
+than the image size.
 """
 
 from __future__ import annotations
 
+from collections import deque
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
 
 import numpy as np
 from PIL import Image
 
 from skimage.segmentation import slic
-from skimage.util import img_as_float
-from skimage.color import label2rgb
+from skimage.util import img_as_float, img_as_float32
 
-from . import register_processor
+from . import Segmentation, register_processor, register_segmenter
+from ..loader import load_image_array, remember_saved_image
+from ..logs import logger, stage
+from ..utils import labels_path_for, save_label_map, save_pil_image
 
 
 def _load_rgb_image(input_path: Path) -> np.ndarray:
-    img = Image.open(input_path)
-    img = img.convert("RGB")
-    return np.array(img, dtype=np.uint8)
+    return load_image_array(input_path, "RGB")
 
 
 def _ensure_rgb_uint8(array: np.ndarray) -> np.ndarray:
@@ -46,31 +60,263 @@ def _ensure_rgb_uint8(array: np.ndarray) -> np.ndarray:
     raise ValueError("Unsupported image array shape for SLICO processor")
 
 
-def slico_run(
-    input_path: Path,
-    output_path: Path,
+# Pixels per block when averaging colors; bounds the float64 temporaries
+AVERAGE_BLOCK_PIXELS = 1 << 22
+
+# Default tile overlap, in expected superpixel widths
+TILE_OVERLAP_STEPS = 2
+
+# Superpixels on both sides of a seam are merged when each is the other's
+# best match and they share at least this fraction of the smaller one's
+# pixels in the overlap band
+SEAM_MATCH_FRACTION = 0.5
+
+
+def average_colors(segments: np.ndarray, image_u8: np.ndarray) -> np.ndarray:
+    """Paint every segment with the mean color of its pixels.
+
+    Per-segment pixel counts and channel sums come from `np.bincount`, so
+    the cost is linear in the number of pixels regardless of how many
+    segments there are. Means are rounded to the nearest integer. Rows are
+    processed in blocks so temporaries stay small on very large images.
+    """
+    out = np.empty(image_u8.shape, dtype=np.uint8)
+    if segments.size == 0:
+        return out
+    low = int(segments.min())
+    n = int(segments.max()) - low + 1
+    channels = 1 if image_u8.ndim == 2 else image_u8.shape[2]
+    rows = max(1, AVERAGE_BLOCK_PIXELS // max(1, segments.shape[1]))
+    counts = np.zeros(n, dtype=np.int64)
+    sums = np.zeros((channels, n), dtype=np.float64)
+    for y0 in range(0, segments.shape[0], rows):
+        index = (segments[y0:y0 + rows] - low).reshape(-1)
+        pixels = image_u8[y0:y0 + rows].reshape(index.size, channels)
+        counts += np.bincount(index, minlength=n)
+        for c in range(channels):
+            sums[c] += np.bincount(index, weights=pixels[:, c], minlength=n)
+    means = np.rint(sums / np.maximum(counts, 1)).astype(np.uint8).T
+    for y0 in range(0, segments.shape[0], rows):
+        index = segments[y0:y0 + rows] - low
+        out[y0:y0 + rows] = means[index].reshape(out[y0:y0 + rows].shape)
+    return out
+
+
+def _tile_grid(height: int, width: int, tile_size: int) -> List[Tuple[int, int, int, int]]:
+    """Core regions (y0, y1, x0, x1) of a row-major grid of tiles."""
+    return [
+        (y0, min(y0 + tile_size, height), x0, min(x0 + tile_size, width))
+        for y0 in range(0, height, tile_size)
+        for x0 in range(0, width, tile_size)
+    ]
+
+
+def _slic_tile(tile_u8: np.ndarray, n_segments: int, compactness: float, sigma: float) -> np.ndarray:
+    """SLICO labels (from 0) of one padded tile, computed in float32."""
+    segments = slic(
+        img_as_float32(tile_u8),
+        n_segments=n_segments,
+        compactness=compactness,
+        sigma=sigma,
+        start_label=0,
+        channel_axis=-1,
+        slic_zero=True,
+    )
+    return segments.astype(np.int32, copy=False)
+
+
+def _label_totals(labels: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Total count of each entry's label, aligned with `labels`."""
+    inverse = np.unique(labels, return_inverse=True)[1]
+    return np.bincount(inverse, weights=counts)[inverse]
+
+
+def _seam_pairs(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Label pairs (a, b) to merge, given both tiles' labels over one band."""
+    keys = (a.reshape(-1).astype(np.int64) << 32) | b.reshape(-1).astype(np.int64)
+    pairs, counts = np.unique(keys, return_counts=True)
+    la, lb = pairs >> 32, pairs & 0xFFFFFFFF
+    # Best partner of every label: its first pair in order of decreasing count
+    order = np.argsort(-counts, kind="stable")
+    best_a = order[np.unique(la[order], return_index=True)[1]]
+    best_b = order[np.unique(lb[order], return_index=True)[1]]
+    mutual = np.intersect1d(best_a, best_b)
+    # Pixels of each pair's labels inside the band
+    size_a, size_b = _label_totals(la, counts), _label_totals(lb, counts)
+    keep = mutual[counts[mutual] >= SEAM_MATCH_FRACTION * np.minimum(size_a[mutual], size_b[mutual])]
+    return np.stack([la[keep], lb[keep]], axis=1)
+
+
+def _band(tile: np.ndarray, py0: int, px0: int, rows: slice, cols: slice) -> np.ndarray:
+    """View of image `rows` x `cols` in a tile whose top-left pixel is (py0, px0)."""
+    return tile[rows.start - py0:rows.stop - py0, cols.start - px0:cols.stop - px0]
+
+
+def tiled_slico_labels(
+    image_u8: np.ndarray,
+    *,
+    n_segments: int,
+    compactness: float,
+    sigma: float,
+    start_label: int,
+    tile_size: int,
+    overlap: Optional[int] = None,
+    workers: int = 1,
+) -> np.ndarray:
+    """SLICO on overlapping tiles, with labels reconciled across seams.
+
+    The image is cut into `tile_size` x `tile_size` cores, each padded by
+    `overlap` pixels on every side (by default two expected superpixel
+    widths). Tiles are segmented in float32, in `workers` processes, with
+    a share of `n_segments` proportional to their padded area, so working
+    memory is bounded by the tile size. Every pixel takes the label its
+    core tile gave it; superpixels cut by a seam are merged when both
+    tiles' labelings of the overlap band agree on them.
+    """
+    height, width = image_u8.shape[:2]
+    n_segments = int(max(1, n_segments))
+    if overlap is None:
+        step = np.sqrt(height * width / n_segments)
+        overlap = int(np.ceil(TILE_OVERLAP_STEPS * step))
+    overlap = max(0, int(overlap))
+    cores = _tile_grid(height, width, int(tile_size))
+    padded = [
+        (max(0, y0 - overlap), min(height, y1 + overlap), max(0, x0 - overlap), min(width, x1 + overlap))
+        for y0, y1, x0, x1 in cores
+    ]
+    jobs = [
+        (
+            image_u8[py0:py1, px0:px1],
+            max(1, round(n_segments * (py1 - py0) * (px1 - px0) / (height * width))),
+            float(compactness),
+            float(sigma),
+        )
+        for py0, py1, px0, px1 in padded
+    ]
+    labels = np.empty((height, width), dtype=np.int32)
+    columns = len(range(0, width, int(tile_size)))
+    # Each tile's labels over the bands it shares with its right and lower
+    # neighbors, kept only until that neighbor arrives
+    strips = {}
+    pairs: List[np.ndarray] = []
+    offset = 0
+    for i, tile in enumerate(_iter_tiles(jobs, workers)):
+        (y0, y1, x0, x1), (py0, _, px0, _) = cores[i], padded[i]
+        # Make labels unique across tiles
+        tile += offset
+        offset = int(tile.max()) + 1
+        labels[y0:y1, x0:x1] = _band(tile, py0, px0, slice(y0, y1), slice(x0, x1))
+
+        # Seams with the left and upper neighbors, which arrived earlier
+        if x0 > 0:
+            cols = slice(max(0, x0 - overlap), min(width, x0 + overlap))
+            pairs.append(_seam_pairs(strips.pop((i - 1, "right")), _band(tile, py0, px0, slice(y0, y1), cols)))
+        if y0 > 0:
+            rows = slice(max(0, y0 - overlap), min(height, y0 + overlap))
+            pairs.append(_seam_pairs(strips.pop((i - columns, "below")), _band(tile, py0, px0, rows, slice(x0, x1))))
+        if x1 < width:
+            cols = slice(max(0, x1 - overlap), min(width, x1 + overlap))
+            strips[(i, "right")] = _band(tile, py0, px0, slice(y0, y1), cols).copy()
+        if y1 < height:
+            rows = slice(max(0, y1 - overlap), min(height, y1 + overlap))
+            strips[(i, "below")] = _band(tile, py0, px0, rows, slice(x0, x1)).copy()
+
+    # Union-find over all tile labels, fed by the seams between neighbors
+    parent = np.arange(offset, dtype=np.int64)
+    for a, b in (np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=np.int64)).tolist():
+        ra, rb = _find(parent, a), _find(parent, b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    # Resolve roots, then number the labels in use consecutively
+    while True:
+        grand = parent[parent]
+        if np.array_equal(grand, parent):
+            break
+        parent = grand
+    used = np.zeros(offset, dtype=bool)
+    used[parent[np.flatnonzero(np.bincount(labels.reshape(-1), minlength=offset))]] = True
+    lut = (np.cumsum(used) - 1 + int(start_label)).astype(np.int32)[parent]
+    # Relabel in place, a band of rows at a time
+    for r0 in range(0, height, int(tile_size)):
+        band_rows = labels[r0:r0 + int(tile_size)]
+        band_rows[...] = lut[band_rows]
+    return labels
+
+
+def _iter_tiles(jobs: List[tuple], workers: int):
+    """Yield the labels of every tile job, in order.
+
+    With several workers, at most two tiles per worker are in flight, so
+    finished tiles do not pile up waiting to be consumed.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield _slic_tile(*job)
+        return
+    workers = min(workers, len(jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(_slic_tile, *job))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _find(parent: np.ndarray, x: int) -> int:
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = int(parent[x])
+    return x
+
+
+def slico_segment(
+    image: np.ndarray,
     *,
     n_segments: int = 280,
     compactness: float = 2.0,
     sigma: float = 1.0,
     start_label: int = 1,
-) -> bool:
-    """Run SLICO superpixel segmentation on an image and save visualization.
+    tile_size: Optional[int] = None,
+    tile_overlap: Optional[int] = None,
+    workers: int = 1,
+) -> Segmentation:
+    """Run SLICO on an in-memory image.
+
+    `image` is a (H, W) grayscale or (H, W, C>=3) array; float color data
+    is taken to be in [0, 1]. Returns the average-color visualization and the
+    superpixel label of every pixel (starting at `start_label`).
 
     Parameters
     - n_segments: approximate number of superpixels to generate
     - compactness: balance between color proximity and space proximity
     - sigma: width of Gaussian smoothing kernel
     - start_label: starting label index for segments
+    - tile_size: if the image is larger than this in either dimension,
+      segment it in overlapping tiles (see `tiled_slico_labels`)
+    - tile_overlap: pixels of overlap between tiles (default: automatic)
+    - workers: processes used for tiles
     """
-    try:
-        input_path = Path(input_path)
-        if input_path.suffix.lower() == ".npy":
-            array = np.load(str(input_path))
-            image_u8 = _ensure_rgb_uint8(array)
-        else:
-            image_u8 = _load_rgb_image(input_path)
+    image_u8 = _ensure_rgb_uint8(np.asarray(image))
 
+    if tile_size and max(image_u8.shape[:2]) > tile_size:
+        with stage("compute"):
+            segments = tiled_slico_labels(
+                image_u8,
+                n_segments=n_segments,
+                compactness=compactness,
+                sigma=sigma,
+                start_label=start_label,
+                tile_size=tile_size,
+                overlap=tile_overlap,
+                workers=workers,
+            )
+        with stage("colormap"):
+            return Segmentation(average_colors(segments, image_u8), segments)
+
+    with stage("compute"):
         # Convert to float in [0,1] for scikit-image
         image_float = img_as_float(image_u8)
 
@@ -87,29 +333,62 @@ def slico_run(
             slic_zero=True,
         )
 
+    with stage("colormap"):
         # Produce an interpretable visualization: average color per superpixel
-        vis_float = label2rgb(segments, image=image_float, kind="avg")
-        vis_u8 = (np.clip(vis_float, 0.0, 1.0) * 255.0).round().astype(np.uint8)
+        vis_u8 = average_colors(segments, image_u8)
 
-        img = Image.fromarray(vis_u8, mode="RGB")
-        suffix = output_path.suffix.lower()
-        fmt = (
-            "PNG"
-            if suffix == ".png"
-            else "JPEG"
-            if suffix in (".jpg", ".jpeg")
-            else "TIFF"
-            if suffix in (".tif", ".tiff")
-            else None
+    return Segmentation(vis_u8, segments)
+
+
+def slico_run(
+    input_path: Path,
+    output_path: Path,
+    *,
+    n_segments: int = 280,
+    compactness: float = 2.0,
+    sigma: float = 1.0,
+    start_label: int = 1,
+    labels_format: Optional[str] = None,
+    tile_size: Optional[int] = None,
+    tile_overlap: Optional[int] = None,
+    workers: int = 1,
+) -> bool:
+    """Run SLICO superpixel segmentation on an image file and save visualization.
+
+    See `slico_segment` for the parameters. With `labels_format` ("npy",
+    "npz" or "png"), the label map of the same run is also written to
+    `<output>.labels.<format>`.
+    """
+    try:
+        input_path = Path(input_path)
+        with stage("load"):
+            if input_path.suffix.lower() == ".npy":
+                image = np.load(str(input_path))
+            else:
+                image = _load_rgb_image(input_path)
+
+        vis_u8, segments = slico_segment(
+            image,
+            n_segments=n_segments,
+            compactness=compactness,
+            sigma=sigma,
+            start_label=start_label,
+            tile_size=tile_size,
+            tile_overlap=tile_overlap,
+            workers=workers,
         )
-        img.save(output_path, fmt) if fmt else img.save(output_path)
+
+        img = Image.fromarray(vis_u8, mode="RGB")
+        save_pil_image(img, output_path)
+        remember_saved_image(output_path, vis_u8)
+        if labels_format:
+            save_label_map(segments, labels_path_for(Path(output_path), labels_format), labels_format)
         return True
     except Exception as e:
-        print(f"Error running SLICO: {e}")
+        logger.error("Error running SLICO: %s", e)
         return False
 
 
 # Register the processor
 register_processor("slico", slico_run)
-
-
+register_segmenter("slico", slico_segment)
@@ -0,0 +1,192 @@
+"""Out-of-core conversion of large arrays to images.
+
+Converts arrays that are read lazily (such as `matfile.LazyMatArray`) to
+8-bit images in bands of rows, so neither the source array nor a full
+float copy of it is ever held in memory:
+
+1. one streaming pass gathers the global min/max for normalization;
+2. a second pass scales each band to uint8 and appends it to the output.
+
+PNG and TIFF outputs are written band by band (an incremental zlib stream
+for PNG, uncompressed strips for TIFF). JPEG has no incremental encoder in
+PIL, so for it only the 8-bit result is assembled in memory.
+
+Pixel values are identical to `normalize_to_uint8` on the whole array.
+"""
+
+from __future__ import annotations
+
+import struct
+import zlib
+from pathlib import Path
+from typing import Iterator, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .logs import logger, stage
+from .utils import save_pil_image, scale_to_uint8
+
+
+# Source bytes read per band
+DEFAULT_BAND_BYTES = 1 << 26
+
+# Classic TIFF offsets are 32-bit
+TIFF_MAX_BYTES = (1 << 32) - 1
+
+# PNG color type and TIFF photometric interpretation per channel count
+_PNG_COLOR_TYPE = {1: 0, 3: 2, 4: 6}
+_TIFF_PHOTOMETRIC = {1: 1, 3: 2, 4: 2}
+
+
+def image_dtype(dtype: np.dtype) -> np.dtype:
+    """Dtype the .mat converter works in: 64-bit types are narrowed."""
+    narrowed = {np.float64: np.float32, np.int64: np.int32, np.uint64: np.uint32}
+    return np.dtype(narrowed.get(np.dtype(dtype).type, dtype))
+
+
+def _channels(shape: Tuple[int, ...]) -> int:
+    if len(shape) == 2:
+        return 1
+    if len(shape) == 3 and shape[2] in (3, 4):
+        return shape[2]
+    raise ValueError(f"Cannot write array of shape {shape} as an image")
+
+
+def band_rows(array, band_bytes: int = DEFAULT_BAND_BYTES) -> int:
+    """Rows per band: about `band_bytes` of source, aligned to storage chunks."""
+    row_bytes = max(1, int(np.prod(array.shape[1:], dtype=np.int64)) * np.dtype(array.dtype).itemsize)
+    rows = max(1, band_bytes // row_bytes)
+    chunks = getattr(array, "chunks", None)
+    if chunks:
+        rows = max(chunks[0], rows - rows % chunks[0])
+    return int(min(rows, array.shape[0]))
+
+
+def iter_bands(array, rows: int) -> Iterator[np.ndarray]:
+    """Yield consecutive row bands of `array`, cast to `image_dtype`."""
+    dtype = image_dtype(array.dtype)
+    for start in range(0, array.shape[0], rows):
+        yield np.asarray(array[start:start + rows]).astype(dtype, copy=False)
+
+
+def streaming_range(array, rows: int):
+    """Global (min, max) of `array` in one pass, typed like `value_range`."""
+    lows, highs = [], []
+    for band in iter_bands(array, rows):
+        lows.append(np.min(band))
+        highs.append(np.max(band))
+    # Reducing the per-band results keeps NaN propagation of np.min/np.max
+    low, high = np.min(np.array(lows)), np.max(np.array(highs))
+    if np.issubdtype(image_dtype(array.dtype), np.floating):
+        return float(low), float(high)
+    return int(low), int(high)
+
+
+def _png_chunk(f, tag: bytes, data: bytes) -> None:
+    f.write(struct.pack(">I", len(data)))
+    f.write(tag)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(tag)) & 0xFFFFFFFF))
+
+
+def write_png_bands(output_path: Path, shape: Tuple[int, ...], bands: Iterator[np.ndarray]) -> None:
+    """Write uint8 row bands as an 8-bit PNG without holding the image."""
+    height, width = shape[:2]
+    channels = _channels(shape)
+    compressor = zlib.compressobj(6)
+    with open(output_path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        _png_chunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, _PNG_COLOR_TYPE[channels], 0, 0, 0))
+        for band in bands:
+            # Each scanline is prefixed with filter type 0 (None)
+            raw = np.zeros((band.shape[0], 1 + width * channels), dtype=np.uint8)
+            raw[:, 1:] = band.reshape(band.shape[0], -1)
+            data = compressor.compress(raw.tobytes())
+            if data:
+                _png_chunk(f, b"IDAT", data)
+        _png_chunk(f, b"IDAT", compressor.flush())
+        _png_chunk(f, b"IEND", b"")
+
+
+def write_tiff_bands(output_path: Path, shape: Tuple[int, ...], bands: Iterator[np.ndarray], rows: int) -> None:
+    """Write uint8 row bands as strips of an uncompressed baseline TIFF."""
+    height, width = shape[:2]
+    channels = _channels(shape)
+    if height * width * channels + 1024 > TIFF_MAX_BYTES:
+        raise ValueError("Image too large for a classic TIFF file")
+    offsets, counts = [], []
+    with open(output_path, "wb") as f:
+        f.write(b"II*\x00\x00\x00\x00\x00")  # IFD offset patched below
+        for band in bands:
+            offsets.append(f.tell())
+            data = np.ascontiguousarray(band).tobytes()
+            counts.append(len(data))
+            f.write(data)
+
+        # Out-of-line tag values
+        def put(fmt: str, values) -> int:
+            if f.tell() % 2:
+                f.write(b"\x00")
+            offset = f.tell()
+            f.write(struct.pack("<%d%s" % (len(values), fmt), *values))
+            return offset
+
+        short, long_ = 3, 4
+        entries = [
+            (256, long_, 1, width),
+            (257, long_, 1, height),
+            (258, short, channels, 8 if channels == 1 else put("H", [8] * channels)),
+            (259, short, 1, 1),
+            (262, short, 1, _TIFF_PHOTOMETRIC[channels]),
+            (273, long_, len(offsets), offsets[0] if len(offsets) == 1 else put("I", offsets)),
+            (277, short, 1, channels),
+            (278, long_, 1, rows),
+            (279, long_, len(counts), counts[0] if len(counts) == 1 else put("I", counts)),
+            (284, short, 1, 1),
+        ]
+        if channels == 4:
+            entries.append((338, short, 1, 2))  # unassociated alpha
+
+        if f.tell() % 2:
+            f.write(b"\x00")
+        ifd_offset = f.tell()
+        f.write(struct.pack("<H", len(entries)))
+        for tag, typ, count, value in entries:
+            packed = struct.pack("<H", value) + b"\x00\x00" if typ == short and count == 1 else struct.pack("<I", value)
+            f.write(struct.pack("<HHI", tag, typ, count) + packed)
+        f.write(struct.pack("<I", 0))
+        f.seek(4)
+        f.write(struct.pack("<I", ifd_offset))
+
+
+def convert_to_image(array, output_path: Path, output_format: str, band_bytes: int = DEFAULT_BAND_BYTES) -> bool:
+    """Normalize a lazily read array to uint8 and save it band by band."""
+    try:
+        fmt = output_format.lower()
+        shape = tuple(array.shape)
+        _channels(shape)
+        if 0 in shape:
+            raise ValueError(f"Cannot write empty array of shape {shape} as an image")
+        rows = band_rows(array, band_bytes)
+        with stage("load"):
+            # The range pass reads the whole variable once
+            min_v, max_v = streaming_range(array, rows)
+        bands = (scale_to_uint8(band, min_v, max_v) for band in iter_bands(array, rows))
+        if fmt in (".png", ".tif", ".tiff"):
+            # Reading, scaling and encoding are interleaved band by band
+            with stage("encode"):
+                if fmt == ".png":
+                    write_png_bands(output_path, shape, bands)
+                else:
+                    write_tiff_bands(output_path, shape, bands, rows)
+        else:
+            with stage("compute"):
+                out = np.empty(shape, dtype=np.uint8)
+                for start, band in zip(range(0, shape[0], rows), bands):
+                    out[start:start + band.shape[0]] = band
+            save_pil_image(Image.fromarray(out), output_path, "JPEG", quality=95)
+        return True
+    except Exception as e:  # pragma: no cover - surfaced by callers
+        logger.error("Error saving image: %s", e)
+        return False
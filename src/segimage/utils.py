@@ -3,37 +3,131 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Tuple, Literal
+from typing import Literal, Optional, Tuple
 
 import numpy as np
 from PIL import Image
 
+from .colormap import apply_colormap, pil_mode
+from .formats import LABEL_FORMATS, META_FORMATS
+from .lbp import lbp_from_image
+from .loader import load_image_array, remember_saved_image, to_rgb_array
+from .logs import logger, stage
 
-def normalize_to_uint8(image_data: np.ndarray) -> np.ndarray:
+
+# Elements processed per block when normalizing; bounds the temporaries
+NORMALIZE_BLOCK_ELEMENTS = 1 << 20
+
+
+def _row_blocks(arr: np.ndarray, block_elements: int):
+    """Yield slices over axis 0 covering about `block_elements` each."""
+    row_size = max(1, int(np.prod(arr.shape[1:], dtype=np.int64)))
+    rows = max(1, int(block_elements) // row_size)
+    for start in range(0, arr.shape[0], rows):
+        yield slice(start, start + rows)
+
+
+def normalize_to_uint8(
+    image_data: np.ndarray,
+    out: Optional[np.ndarray] = None,
+    *,
+    work_dtype=None,
+    block_elements: int = NORMALIZE_BLOCK_ELEMENTS,
+) -> np.ndarray:
     """Normalize numeric array to uint8 0..255.
 
-    Handles float and integer types and preserves shape.
+    Handles float and integer types and preserves shape. Runs in two passes
+    over blocks of rows (min/max, then scale-and-cast into `out`), so the
+    only temporaries are block sized and memory-mapped inputs are read
+    sequentially. `out` may be a preallocated (or memory-mapped) uint8
+    array of the same shape. See `scale_to_uint8` for `work_dtype`.
     """
     arr = image_data
     if arr.size == 0:
-        return np.zeros_like(arr, dtype=np.uint8)
+        return np.zeros_like(arr, dtype=np.uint8) if out is None else out
+    if not (np.issubdtype(arr.dtype, np.floating) or np.issubdtype(arr.dtype, np.integer)):
+        # Fallback: attempt to cast via float then normalize
+        arr = arr.astype(np.float64)
+    min_v, max_v = value_range(arr, block_elements=block_elements)
+    return scale_to_uint8(arr, min_v, max_v, out, work_dtype=work_dtype, block_elements=block_elements)
+
+
+def value_range(arr: np.ndarray, *, block_elements: int = NORMALIZE_BLOCK_ELEMENTS):
+    """Return (min, max) as Python floats for float arrays, ints otherwise.
+
+    Both are gathered in a single blockwise pass over the data.
+    """
+    flat = arr.reshape(1) if arr.ndim == 0 else arr
+    lows, highs = [], []
+    for rows in _row_blocks(flat, block_elements):
+        block = flat[rows]
+        lows.append(np.min(block))
+        highs.append(np.max(block))
+    # Reducing the per-block results keeps NaN propagation of np.min/np.max
+    low, high = np.min(np.array(lows)), np.max(np.array(highs))
     if np.issubdtype(arr.dtype, np.floating):
-        min_v = float(np.min(arr))
-        max_v = float(np.max(arr))
-        if max_v == min_v:
-            return np.zeros_like(arr, dtype=np.uint8)
-        scaled = (arr - min_v) / (max_v - min_v)
-        return (np.clip(scaled, 0.0, 1.0) * 255.0).astype(np.uint8)
-    if np.issubdtype(arr.dtype, np.integer):
-        min_v = int(np.min(arr))
-        max_v = int(np.max(arr))
-        if max_v == min_v:
-            return np.zeros_like(arr, dtype=np.uint8)
-        scaled = (arr.astype(np.float64) - min_v) / (max_v - min_v)
-        return (np.clip(scaled, 0.0, 1.0) * 255.0).astype(np.uint8)
-    # Fallback: attempt to cast via float then normalize
-    arr = arr.astype(np.float64)
-    return normalize_to_uint8(arr)
+        return float(low), float(high)
+    return int(low), int(high)
+
+
+def scale_to_uint8(
+    arr: np.ndarray,
+    min_v,
+    max_v,
+    out: Optional[np.ndarray] = None,
+    *,
+    work_dtype=None,
+    block_elements: int = NORMALIZE_BLOCK_ELEMENTS,
+) -> np.ndarray:
+    """Map [min_v, max_v] to 0..255 as `normalize_to_uint8` does.
+
+    Taking the range as arguments lets chunked callers scale block by block
+    with bounds gathered in an earlier pass. Arithmetic runs in the input's
+    float type (float64 for integers) unless `work_dtype` is given, e.g.
+    np.float32 to halve the scratch memory of float64 inputs.
+    """
+    if out is None:
+        out = np.empty(arr.shape, dtype=np.uint8)
+    elif out.shape != arr.shape or out.dtype != np.uint8:
+        raise ValueError(f"out must be a uint8 array of shape {arr.shape}, got {out.dtype} {out.shape}")
+    if max_v == min_v:
+        out[...] = 0
+        return out
+    if work_dtype is None:
+        work_dtype = arr.dtype if np.issubdtype(arr.dtype, np.floating) else np.float64
+    src = arr.reshape(1) if arr.ndim == 0 else arr
+    dst = out.reshape(1) if out.ndim == 0 else out
+    span = max_v - min_v
+    scratch = None
+    for rows in _row_blocks(src, block_elements):
+        block = src[rows]
+        if scratch is None or scratch.shape != block.shape:
+            scratch = np.empty(block.shape, dtype=work_dtype)
+        # Cast first so integer inputs are offset without overflowing
+        np.copyto(scratch, block, casting="unsafe")
+        np.subtract(scratch, min_v, out=scratch)
+        np.divide(scratch, span, out=scratch)
+        np.clip(scratch, 0.0, 1.0, out=scratch)
+        np.multiply(scratch, 255.0, out=scratch)
+        np.copyto(dst[rows], scratch, casting="unsafe")
+    return out
+
+
+# PIL format names per image output suffix
+IMAGE_FORMATS = {".png": "PNG", ".jpg": "JPEG", ".jpeg": "JPEG", ".tif": "TIFF", ".tiff": "TIFF"}
+
+
+def save_pil_image(img: Image.Image, output_path: Path, fmt: Optional[str] = None, **params) -> None:
+    """Encode `img` straight into `output_path`, timed as the "encode" stage.
+
+    `fmt` defaults to the format implied by the file suffix. The file is
+    written as it is encoded, so the encoded image is never held in memory.
+    """
+    output_path = Path(output_path)
+    suffix = output_path.suffix.lower()
+    fmt = fmt or IMAGE_FORMATS.get(suffix) or Image.registered_extensions().get(suffix)
+    with stage("encode"):
+        img.save(output_path, fmt, **params)
 
 
 def save_array_as_image(image_data: np.ndarray, output_path: Path, output_format: str) -> bool:
@@ -44,29 +138,133 @@ def save_array_as_image(image_data: np.ndarray, output_path: Path, output_format
     """
     try:
         fmt = output_format.lower()
-        array_to_save: np.ndarray
-        if fmt in [".png", ".jpg", ".jpeg", ".tif", ".tiff"]:
-            array_to_save = normalize_to_uint8(image_data)
-        else:
+        with stage("compute"):
             array_to_save = normalize_to_uint8(image_data)
 
         pil_image = Image.fromarray(array_to_save)
-        if fmt == ".png":
-            pil_image.save(output_path, "PNG")
-        elif fmt in [".jpg", ".jpeg"]:
-            pil_image.save(output_path, "JPEG", quality=95)
-        elif fmt in [".tif", ".tiff"]:
-            pil_image.save(output_path, "TIFF")
-        else:
-            pil_image.save(output_path)
+        pil_format = IMAGE_FORMATS.get(fmt)
+        params = {"quality": 95} if pil_format == "JPEG" else {}
+        save_pil_image(pil_image, output_path, pil_format, **params)
+        remember_saved_image(output_path, array_to_save)
         return True
     except Exception as e:  # pragma: no cover - surfaced by callers
-        print(f"Error saving image: {e}")
+        logger.error("Error saving image: %s", e)
         return False
 
 
 
-def write_meta_for_image(output_path: Path) -> bool:
+# Per-pixel record of the JSON .meta file. Floats are passed preformatted
+# with repr(), which is exactly how json.dumps renders them.
+_META_PIXEL_FORMAT = '    {"x": %d, "y": %d, "r": %d, "g": %d, "b": %d, "gray": %s, "LBP": %s}'
+
+# repr() of every normalized LBP value, indexed by LBP code
+_LBP_REPR = np.array([repr(code / 255.0) for code in range(256)], dtype=object)
+
+# Number of pixels formatted per bulk write of the JSON .meta file
+META_CHUNK_PIXELS = 1 << 16
+
+
+def meta_path_for(output_path: Path, meta_format: str = "json") -> Path:
+    """Return the metadata path written next to `output_path`."""
+    suffix = ".meta" if meta_format == "json" else ".meta." + meta_format
+    return output_path.with_suffix(output_path.suffix + suffix)
+
+
+def labels_path_for(output_path: Path, labels_format: str = "npy") -> Path:
+    """Return the label map path written next to `output_path`."""
+    return output_path.with_suffix(output_path.suffix + ".labels." + labels_format)
+
+
+def save_label_map(labels: np.ndarray, path: Path, labels_format: Optional[str] = None) -> None:
+    """Write an integer label map as .npy, compressed .npz or 16-bit PNG.
+
+    Labels are stored as uint16 when they fit (required for PNG) and as
+    uint32 otherwise. The .npz archive holds a single `labels` array.
+    """
+    fmt = (labels_format or Path(path).suffix.lstrip(".")).lower()
+    if fmt not in LABEL_FORMATS:
+        raise ValueError(f"Unsupported label format: {fmt}. Supported: {', '.join(LABEL_FORMATS)}")
+    if labels.size and labels.min() < 0:
+        raise ValueError("Label maps must not contain negative labels")
+    fits_16 = labels.size == 0 or labels.max() <= np.iinfo(np.uint16).max
+    if fmt == "png" and not fits_16:
+        raise ValueError("Too many labels for a 16-bit PNG label map; use npy or npz")
+    labels = labels.astype(np.uint16 if fits_16 else np.uint32, copy=False)
+    with stage("write"):
+        if fmt == "npy":
+            with open(path, "wb") as f:
+                np.save(f, labels)
+        elif fmt == "npz":
+            with open(path, "wb") as f:
+                np.savez_compressed(f, labels=labels)
+        else:
+            Image.fromarray(labels).save(path, format="PNG")
+
+
+def _write_meta_json(meta_path: Path, arr: np.ndarray, gray: np.ndarray, lbp_code: np.ndarray) -> None:
+    """Stream the per-pixel JSON document, formatting whole row chunks at once."""
+    height, width = arr.shape[:2]
+    rows_per_chunk = max(1, META_CHUNK_PIXELS // max(1, width))
+    with open(meta_path, "w") as f:
+        # Write header
+        header = {
+            "width": int(width),
+            "height": int(height),
+            "mode": "RGB",
+            "description": "Per-pixel metadata generated by segimage",
+        }
+        f.write("{\n")
+        f.write("  \"width\": %d,\n" % header["width"])
+        f.write("  \"height\": %d,\n" % header["height"])
+        f.write("  \"mode\": \"%s\",\n" % header["mode"])
+        f.write("  \"description\": \"%s\",\n" % header["description"].replace("\"", r"\\\""))
+        f.write("  \"pixels\": [\n")
+
+        # Stream per-pixel objects row-major, one chunk of rows per write
+        for y0 in range(0, height, rows_per_chunk):
+            y1 = min(height, y0 + rows_per_chunk)
+            n = (y1 - y0) * width
+            if n == 0:
+                continue
+            fields = np.empty((n, 7), dtype=object)
+            fields[:, 0] = np.tile(np.arange(width), y1 - y0).tolist()
+            fields[:, 1] = np.repeat(np.arange(y0, y1), width).tolist()
+            for c in range(3):
+                fields[:, 2 + c] = arr[y0:y1, :, c].reshape(-1).tolist()
+            # Format each distinct gray level once; LBP strings come from a table
+            levels, level_index = np.unique(gray[y0:y1], return_inverse=True)
+            level_repr = np.array([repr(v) for v in levels.tolist()], dtype=object)
+            fields[:, 5] = level_repr[level_index.reshape(-1)]
+            fields[:, 6] = _LBP_REPR[lbp_code[y0:y1].reshape(-1)]
+            if y0 > 0:
+                f.write(",\n")
+            f.write(",\n".join([_META_PIXEL_FORMAT] * n) % tuple(fields.reshape(-1).tolist()))
+        f.write("\n  ]\n}")
+
+
+def _write_meta_npz(meta_path: Path, arr: np.ndarray, gray: np.ndarray, lbp_code: np.ndarray) -> None:
+    """Write the per-pixel fields as flat row-major columns in an .npz archive.
+
+    The archive is uncompressed, so consumers can load single columns
+    without parsing (or even reading) the others.
+    """
+    height, width = arr.shape[:2]
+    ys, xs = np.divmod(np.arange(height * width, dtype=np.int32), np.int32(max(1, width)))
+    np.savez(
+        meta_path,
+        width=np.int64(width),
+        height=np.int64(height),
+        x=xs,
+        y=ys,
+        r=arr[:, :, 0].reshape(-1),
+        g=arr[:, :, 1].reshape(-1),
+        b=arr[:, :, 2].reshape(-1),
+        gray=gray.reshape(-1),
+        LBP=lbp_code.reshape(-1) / 255.0,
+    )
+
+
+def write_meta_for_image(output_path: Path, meta_format: str = "json", image: Optional[np.ndarray] = None) -> bool:
     """Generate a .meta file alongside an image with per-pixel details.
 
     The metadata includes image-level info and, for each pixel, the x,y
@@ -75,22 +273,27 @@ def write_meta_for_image(output_path: Path) -> bool:
     level is computed as the standard luma: 0.299*R + 0.587*G + 0.114*B,
     divided by 255. The LBP (Local Binary Pattern) is computed for each
     pixel using its 8-neighborhood (clockwise order) as a standard 8-bit
-    LBP code and normalized by 255 to a float in [0,1].
+    LBP code of the integer luma (`segimage.lbp`) and normalized by 255 to
+    a float in [0,1].
+
+    With `meta_format="json"` the file is written as JSON and streamed in
+    chunks of rows to avoid building the entire structure in memory. With
+    `meta_format="npz"` the same fields are written as columns x, y, r, g,
+    b, gray and LBP of a `.meta.npz` archive instead.
 
-    The file is written as JSON and streamed to avoid building the entire
-    structure in memory.
+    `image` may carry the uint8 array (L, RGB or RGBA) that was saved to
+    `output_path`, so the file is not decoded again; otherwise it is loaded
+    through the shared image cache.
     """
     try:
-        img = Image.open(output_path)
-        # Ensure RGB for consistent metadata
-        if img.mode not in ("RGB", "L"):
-            img = img.convert("RGB")
-        elif img.mode == "L":
-            # Convert grayscale to RGB by stacking channels
-            img = img.convert("RGB")
+        if meta_format not in META_FORMATS:
+            raise ValueError(f"Unsupported meta format: {meta_format}. Supported: {', '.join(META_FORMATS)}")
 
-        width, height = img.size
-        arr = np.array(img, dtype=np.uint8)  # shape: (H, W, 3)
+        # Ensure RGB for consistent metadata (grayscale is stacked to RGB)
+        if image is not None:
+            arr = to_rgb_array(np.asarray(image, dtype=np.uint8))
+        else:
+            arr = load_image_array(output_path, "RGB")  # shape: (H, W, 3)
 
         # Prepare grayscale levels using luma formula
         r = arr[:, :, 0].astype(np.float64)
@@ -98,149 +301,56 @@ def write_meta_for_image(output_path: Path) -> bool:
         b = arr[:, :, 2].astype(np.float64)
         gray = (0.299 * r + 0.587 * g + 0.114 * b) / 255.0
 
-        # Compute 8-bit LBP code per pixel (normalized to [0,1])
-        # Use 0 for borders where neighbors are missing
-        gray255 = (gray * 255.0).round().astype(np.uint8)
-        center = gray255
-        lbp_code = np.zeros_like(center, dtype=np.uint8)
-
-        # Offsets in clockwise order: TL, T, TR, R, BR, B, BL, L
-        # Bits: 7, 6, 5, 4, 3, 2, 1, 0
-        # TL (-1,-1) → bit 7
-        lbp_code[1:, 1:] |= ((gray255[:-1, :-1] >= center[1:, 1:]).astype(np.uint8) << 7)
-        # T (-1,0) → bit 6
-        lbp_code[1:, :] |= ((gray255[:-1, :] >= center[1:, :]).astype(np.uint8) << 6)
-        # TR (-1,+1) → bit 5
-        lbp_code[1:, :-1] |= ((gray255[:-1, 1:] >= center[1:, :-1]).astype(np.uint8) << 5)
-        # R (0,+1) → bit 4
-        lbp_code[:, :-1] |= ((gray255[:, 1:] >= center[:, :-1]).astype(np.uint8) << 4)
-        # BR (+1,+1) → bit 3
-        lbp_code[:-1, :-1] |= ((gray255[1:, 1:] >= center[:-1, :-1]).astype(np.uint8) << 3)
-        # B (+1,0) → bit 2
-        lbp_code[:-1, :] |= ((gray255[1:, :] >= center[:-1, :]).astype(np.uint8) << 2)
-        # BL (+1,-1) → bit 1
-        lbp_code[:-1, 1:] |= ((gray255[1:, :-1] >= center[:-1, 1:]).astype(np.uint8) << 1)
-        # L (0,-1) → bit 0
-        lbp_code[:, 1:] |= ((gray255[:, :-1] >= center[:, 1:]).astype(np.uint8) << 0)
-
-        lbp_float = (lbp_code.astype(np.float64) / 255.0)
-
-        meta_path = output_path.with_suffix(output_path.suffix + ".meta")
-
-        import json
-
-        with open(meta_path, "w") as f:
-            # Write header
-            header = {
-                "width": int(width),
-                "height": int(height),
-                "mode": "RGB",
-                "description": "Per-pixel metadata generated by segimage",
-            }
-            f.write("{\n")
-            f.write("  \"width\": %d,\n" % header["width"])
-            f.write("  \"height\": %d,\n" % header["height"])
-            f.write("  \"mode\": \"%s\",\n" % header["mode"])
-            f.write("  \"description\": \"%s\",\n" % header["description"].replace("\"", r"\\\""))
-            f.write("  \"pixels\": [\n")
-
-            first = True
-            # Stream per-pixel objects row-major
-            for y in range(height):
-                for x in range(width):
-                    r_v = int(arr[y, x, 0])
-                    g_v = int(arr[y, x, 1])
-                    b_v = int(arr[y, x, 2])
-                    gray_v = float(gray[y, x])
-                    lbp_v = float(lbp_float[y, x])
-                    obj = {
-                        "x": x,
-                        "y": y,
-                        "r": r_v,
-                        "g": g_v,
-                        "b": b_v,
-                        "gray": gray_v,
-                        "LBP": lbp_v,
-                    }
-                    if not first:
-                        f.write(",\n")
-                    first = False
-                    f.write("    " + json.dumps(obj))
-            f.write("\n  ]\n}")
+        # 8-bit LBP code per pixel; 0 bits for neighbors outside the image
+        lbp_code = lbp_from_image(arr)
+
+        meta_path = meta_path_for(output_path, meta_format)
+        if meta_format == "npz":
+            _write_meta_npz(meta_path, arr, gray, lbp_code)
+        else:
+            _write_meta_json(meta_path, arr, gray, lbp_code)
 
         return True
     except Exception as e:  # pragma: no cover - surfaced by callers
-        print(f"Error writing .meta file: {e}")
+        logger.error("Error writing .meta file: %s", e)
         return False
 
 
 
 def load_rgb_image(input_path: Path) -> np.ndarray:
-    """Load an image file as RGB uint8 ndarray (H, W, 3)."""
-    img = Image.open(input_path)
-    img = img.convert("RGB")
-    return np.array(img, dtype=np.uint8)
+    """Load an image file as RGB uint8 ndarray (H, W, 3).
 
+    Decoded through the shared image cache; the returned array is read-only.
+    """
+    return load_image_array(input_path, "RGB")
 
-def compute_lbp_float_from_rgb_uint8(image_rgb_u8: np.ndarray) -> np.ndarray:
-    """Compute normalized 8-neighbor LBP values in [0,1] from an RGB image.
 
-    Uses luma grayscale and returns a float64 array with shape (H, W).
+def compute_lbp_codes_from_rgb_uint8(image_rgb_u8: np.ndarray) -> np.ndarray:
+    """Compute 8-neighbor LBP codes (0..255) from an RGB image.
+
+    Uses integer luma and returns a uint8 array with shape (H, W); see
+    `segimage.lbp` for radius, neighbor count and rotation-invariant
+    variants.
     """
-    r = image_rgb_u8[:, :, 0].astype(np.float64)
-    g = image_rgb_u8[:, :, 1].astype(np.float64)
-    b = image_rgb_u8[:, :, 2].astype(np.float64)
-    gray = (0.299 * r + 0.587 * g + 0.114 * b) / 255.0
+    return lbp_from_image(image_rgb_u8)
 
-    gray255 = (gray * 255.0).round().astype(np.uint8)
-    center = gray255
-    lbp_code = np.zeros_like(center, dtype=np.uint8)
 
-    # TL, T, TR, R, BR, B, BL, L → bits 7..0
-    lbp_code[1:, 1:] |= ((gray255[:-1, :-1] >= center[1:, 1:]).astype(np.uint8) << 7)
-    lbp_code[1:, :] |= ((gray255[:-1, :] >= center[1:, :]).astype(np.uint8) << 6)
-    lbp_code[1:, :-1] |= ((gray255[:-1, 1:] >= center[1:, :-1]).astype(np.uint8) << 5)
-    lbp_code[:, :-1] |= ((gray255[:, 1:] >= center[:, :-1]).astype(np.uint8) << 4)
-    lbp_code[:-1, :-1] |= ((gray255[1:, 1:] >= center[:-1, :-1]).astype(np.uint8) << 3)
-    lbp_code[:-1, :] |= ((gray255[1:, :] >= center[:-1, :]).astype(np.uint8) << 2)
-    lbp_code[:-1, 1:] |= ((gray255[1:, :-1] >= center[:-1, 1:]).astype(np.uint8) << 1)
-    lbp_code[:, 1:] |= ((gray255[:, :-1] >= center[:, 1:]).astype(np.uint8) << 0)
+def compute_lbp_float_from_rgb_uint8(image_rgb_u8: np.ndarray) -> np.ndarray:
+    """Compute normalized 8-neighbor LBP values in [0,1] from an RGB image.
 
-    return lbp_code.astype(np.float64) / 255.0
+    Returns a float64 array with shape (H, W). Prefer the uint8 codes of
+    `compute_lbp_codes_from_rgb_uint8`, which take an eighth of the memory.
+    """
+    return compute_lbp_codes_from_rgb_uint8(image_rgb_u8).astype(np.float64) / 255.0
 
 
-def colormap_from_unit_scalar(values: np.ndarray, palette: Literal["bw", "rainbow"]) -> Tuple[np.ndarray, str]:
+def colormap_from_unit_scalar(values: np.ndarray, palette: Literal["bw", "rainbow", "hsv"]) -> Tuple[np.ndarray, str]:
     """Map scalar values in [0,1] to an image array and PIL mode.
 
     - bw: returns 2D uint8 array (H, W) with mode 'L'
-    - rainbow: returns 3D uint8 array (H, W, 3) with mode 'RGB'
+    - rainbow, hsv: returns 3D uint8 array (H, W, 3) with mode 'RGB'
+
+    See `segimage.colormap` for the lookup tables.
     """
-    vals = np.clip(values, 0.0, 1.0)
-    if palette == "bw":
-        img_u8 = (vals * 255.0).round().astype(np.uint8)
-        return img_u8, "L"
-    # rainbow
-    try:
-        import matplotlib.pyplot as plt  # type: ignore
-
-        cmap = plt.get_cmap("rainbow")
-        # cmap returns RGBA in 0..1 → keep RGB
-        h, w = vals.shape
-        rgb = np.array(cmap(vals)[:, :, :3], dtype=np.float64)
-        img_u8 = (rgb * 255.0).round().astype(np.uint8)
-        return img_u8, "RGB"
-    except Exception:
-        # HSV fallback
-        import colorsys
-
-        h, w = vals.shape
-        out = np.empty((h, w, 3), dtype=np.uint8)
-        # Vectorized mapping through iteration over rows for simplicity
-        for i in range(h):
-            for j in range(w):
-                r_f, g_f, b_f = colorsys.hsv_to_rgb(vals[i, j], 1.0, 1.0)
-                out[i, j, 0] = int(r_f * 255)
-                out[i, j, 1] = int(g_f * 255)
-                out[i, j, 2] = int(b_f * 255)
-        return out, "RGB"
+    return apply_colormap(values, palette), pil_mode(palette)
 
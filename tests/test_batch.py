@@ -0,0 +1,99 @@
+"""
+Tests for batch processing.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+from segimage import batch
+from segimage.batch import _warm_worker, collect_inputs, is_batch_spec, output_path_for, run_batch
+from segimage.cli.main import main
+from segimage.loader import get_image_cache, set_image_cache_budget
+
+
+@pytest.fixture
+def tiles(tmp_path):
+    rng = np.random.default_rng(0)
+    (tmp_path / "in" / "sub").mkdir(parents=True)
+    paths = [tmp_path / "in" / "a.png", tmp_path / "in" / "b.png", tmp_path / "in" / "sub" / "a.png"]
+    for path in paths:
+        Image.fromarray(rng.integers(0, 256, size=(8, 8, 3), dtype=np.uint8)).save(path)
+    (tmp_path / "in" / "notes.md").write_text("not an image")
+    return tmp_path
+
+
+class TestCollectInputs:
+    """Test cases for expanding batch input specs."""
+
+    def test_directory_is_recursive_and_filtered(self, tiles):
+        inputs = collect_inputs(str(tiles / "in"))
+        assert [p.relative_to(tiles / "in").as_posix() for p in inputs] == ["a.png", "b.png", "sub/a.png"]
+
+    def test_glob(self, tiles):
+        assert [p.name for p in collect_inputs(str(tiles / "in" / "*.png"))] == ["a.png", "b.png"]
+
+    def test_manifest(self, tiles):
+        manifest = tiles / "inputs.lst"
+        manifest.write_text("# tiles\nin/b.png\n\n" + str(tiles / "in" / "a.png") + "\n")
+        assert collect_inputs(str(manifest)) == [tiles / "in" / "b.png", tiles / "in" / "a.png"]
+
+    def test_single_file_is_not_batch(self, tiles):
+        assert not is_batch_spec(str(tiles / "in" / "a.png"))
+        assert is_batch_spec(str(tiles / "in"))
+
+    def test_existing_file_with_glob_characters_is_literal(self, tiles):
+        literal = tiles / "in" / "scan[1].png"
+        literal.write_bytes((tiles / "in" / "a.png").read_bytes())
+        assert not is_batch_spec(str(literal))
+        assert collect_inputs(str(literal)) == [literal]
+        assert is_batch_spec(str(tiles / "in" / "scan[12].png"))
+
+    def test_missing_manifest_is_a_cli_error(self, tiles):
+        result = CliRunner().invoke(main, ["process", str(tiles / "missing.lst"), str(tiles / "out")])
+        assert result.exit_code == 2
+        assert "Cannot read manifest" in result.output
+
+
+class TestRunBatch:
+    """Test cases for running a batch."""
+
+    def test_output_path_mirrors_subdirectories(self):
+        out = output_path_for(Path("/data/in/sub/x.png"), Path("/out"), "png", base=Path("/data/in"))
+        assert out == Path("/out/sub/x_processed.png")
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_reports_every_file(self, tiles, workers):
+        inputs = collect_inputs(str(tiles / "in")) + [tiles / "in" / "missing.png"]
+        results = list(
+            run_batch(inputs, tiles / "out", "lbp", "png", {"palette": "bw"},
+                      workers=workers, chunk_size=1, base=tiles / "in")
+        )
+        assert [r.input_path for r in results] == inputs
+        assert [r.success for r in results] == [True, True, True, False]
+        assert (tiles / "out" / "sub" / "a_processed.png").exists()
+        assert (tiles / "out" / "a_processed.png").exists()
+
+    def test_workers_share_the_cache_budget(self, tiles, monkeypatch):
+        seen = {}
+
+        class RecordingPool(batch.ProcessPoolExecutor):
+            def __init__(self, max_workers, initializer, initargs):
+                seen["initargs"] = initargs
+                super().__init__(max_workers=max_workers, initializer=initializer, initargs=initargs)
+
+        monkeypatch.setattr(batch, "ProcessPoolExecutor", RecordingPool)
+        inputs = collect_inputs(str(tiles / "in"))
+        results = list(run_batch(inputs, tiles / "out", "lbp", "png", workers=2, cache_bytes=10 << 20))
+        assert all(r.success for r in results)
+        assert seen["initargs"][-1] == 5 << 20
+
+        budget = get_image_cache().max_bytes
+        try:
+            _warm_worker("lbp", None, 0)
+            assert get_image_cache().max_bytes == 0
+        finally:
+            set_image_cache_budget(budget)
@@ -0,0 +1,96 @@
+"""
+Tests for the benchmark suite.
+"""
+
+import json
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from segimage.bench import (
+    CASES,
+    BenchCase,
+    compare_results,
+    parse_sizes,
+    run_benchmarks,
+    select_cases,
+    synthetic_image,
+)
+from segimage.cli.main import main
+
+
+class TestBenchHelpers:
+    """Test cases for size parsing, case selection and image generation."""
+
+    def test_parse_sizes(self):
+        assert parse_sizes("64, 1K") == ["64", "1k"]
+        assert parse_sizes("all")[-1] == "8k"
+        with pytest.raises(ValueError):
+            parse_sizes("5k")
+
+    def test_select_cases(self):
+        assert select_cases(None) == list(CASES)
+        assert {c.processor for c in select_cases(["LBP"])} == {"lbp"}
+        with pytest.raises(ValueError):
+            select_cases(["nope"])
+
+    def test_synthetic_image_is_deterministic(self):
+        a = synthetic_image(40, 30, seed=1)
+        assert a.shape == (30, 40, 3) and a.dtype == np.uint8
+        np.testing.assert_array_equal(a, synthetic_image(40, 30, seed=1))
+        assert len(np.unique(a.reshape(-1, 3), axis=0)) > 100
+
+
+class TestRunBenchmarks:
+    """Test cases for measuring and comparing runs."""
+
+    def test_results_document(self):
+        cases = [BenchCase("lbp", "bw", {"palette": "bw"}), BenchCase("mat_to_image", "png", {}),
+                 BenchCase("color_cluster", "big", {"K": 2}, max_pixels=100)]
+        seen = []
+        results = run_benchmarks(["64"], cases, repeat=2, progress=seen.append)
+        assert json.loads(json.dumps(results)) == results
+        assert [e["case"] for e in seen] == ["lbp[bw]", "mat_to_image[png]", "color_cluster[big]"]
+        lbp, mat, skipped = results["results"]
+        assert lbp["success"] and mat["success"]
+        assert len(lbp["wall_s"]) == 2 and lbp["best_s"] == min(lbp["wall_s"])
+        assert lbp["mp_per_s"] == pytest.approx(64 * 64 / 1e6 / lbp["best_s"])
+        assert lbp["peak_bytes"] > 64 * 64 * 3
+        assert {"load", "compute", "encode"} <= set(lbp["stages"])
+        assert "skipped" in skipped and "best_s" not in skipped
+        assert results["environment"]["numpy"] == np.__version__
+
+    def test_compare_results(self):
+        def doc(best):
+            return {"results": [{"case": "lbp[bw]", "size": "64", "best_s": best, "peak_bytes": 1}]}
+
+        (row,) = compare_results(doc(0.2), doc(0.3))
+        assert row["change"] == pytest.approx(0.5)
+        assert compare_results(doc(0.2), {"results": [{"case": "lbp[bw]", "size": "256", "best_s": 1.0}]}) == []
+
+
+class TestBenchCli:
+    """Test cases for `segimage bench`."""
+
+    def test_output_and_regression_gate(self, tmp_path):
+        out = tmp_path / "bench.json"
+        runner = CliRunner()
+        result = runner.invoke(main, ["bench", "-s", "64", "-p", "lbp", "-r", "1", "--no-memory", "-o", str(out)])
+        assert result.exit_code == 0, result.output
+        assert "lbp[rainbow]" in result.output
+        baseline = json.loads(out.read_text())
+        assert {e["case"] for e in baseline["results"]} == {"lbp[bw]", "lbp[rainbow]"}
+
+        # A baseline that was impossibly fast makes every case a regression
+        for entry in baseline["results"]:
+            entry["best_s"] = 1e-9
+        out.write_text(json.dumps(baseline))
+        result = runner.invoke(main, ["bench", "-s", "64", "-p", "lbp", "-r", "1", "--no-memory",
+                                      "--compare", str(out), "--max-regression", "50"])
+        assert result.exit_code == 1
+        assert "slower than the baseline" in result.stderr
+
+    def test_unknown_size(self):
+        result = CliRunner().invoke(main, ["bench", "-s", "3k"])
+        assert result.exit_code == 2
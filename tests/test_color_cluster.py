@@ -0,0 +1,137 @@
+"""
+Tests for the color_cluster processor.
+"""
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+from segimage.cli.main import main
+
+from segimage.processors.color_cluster import (
+    _map_to_clusters, color_cluster_run, color_cluster_segment,
+)
+
+
+def _reference_labels(image, K):
+    """Per-pixel dictionary lookup, as the processor used to assign labels."""
+    flat = image.reshape(-1, 1) if image.ndim == 2 else image.reshape(-1, image.shape[-1])
+    view = np.ascontiguousarray(flat).view([("c", flat.dtype, flat.shape[1])]).reshape(-1)
+    uniq, counts = np.unique(view, return_counts=True)
+    colors = uniq.view(flat.dtype).reshape(-1, flat.shape[1])[np.argsort(-counts)]
+    cluster_ids = {tuple(c.tolist()): i for i, c in enumerate(colors[: K - 1])}
+    labels = [cluster_ids.get(tuple(row.tolist()), K - 1) for row in flat]
+    return np.array(labels, dtype=np.int32).reshape(image.shape[:2])
+
+
+class TestMapToClusters:
+    """Test cases for cluster label assignment."""
+
+    @pytest.mark.parametrize("shape", [(1, 1, 3), (12, 9, 3), (10, 7)])
+    @pytest.mark.parametrize("K", [1, 2, 4, 50])
+    def test_matches_reference(self, shape, K):
+        """Vectorized labels equal the per-pixel lookup, ties included."""
+        rng = np.random.default_rng(0)
+        image = (rng.integers(0, 4, size=shape) * 85).astype(np.uint8)
+        labels, top_colors = _map_to_clusters(image, K)
+        assert labels.dtype == np.uint8
+        np.testing.assert_array_equal(labels, _reference_labels(image, K))
+        assert len(top_colors) <= max(0, K - 1)
+
+
+class TestIndexedOutput:
+    """Test cases for palette-indexed outputs."""
+
+    def test_png_is_indexed(self, tmp_path):
+        """PNG outputs store labels plus palette and decode to the visualization."""
+        image = np.random.default_rng(1).integers(0, 6, size=(20, 15, 3), dtype=np.uint8) * 40
+        out = tmp_path / "out.png"
+        assert color_cluster_run(_save(image, tmp_path), out, K=4, palette="rainbow")
+        result = color_cluster_segment(image, K=4, palette="rainbow")
+        with Image.open(out) as img:
+            assert img.mode == "P"
+            np.testing.assert_array_equal(np.array(img), result.labels)
+            np.testing.assert_array_equal(np.array(img.convert("RGB")), result.image)
+
+    def test_bw_png_stays_gray(self, tmp_path):
+        image = np.random.default_rng(1).integers(0, 6, size=(20, 15, 3), dtype=np.uint8) * 40
+        out = tmp_path / "out.png"
+        assert color_cluster_run(_save(image, tmp_path), out, K=4, palette="bw")
+        with Image.open(out) as img:
+            assert img.mode == "L"
+            np.testing.assert_array_equal(np.array(img), color_cluster_segment(image, K=4).image)
+
+    def test_jpeg_and_many_clusters_are_expanded(self, tmp_path):
+        image = np.arange(30 * 20 * 3, dtype=np.uint8).reshape(30, 20, 3)
+        input_path = _save(image, tmp_path)
+        assert color_cluster_run(input_path, tmp_path / "out.jpg", K=3, palette="rainbow")
+        with Image.open(tmp_path / "out.jpg") as img:
+            assert img.mode == "RGB"
+        assert color_cluster_run(input_path, tmp_path / "many.png", K=300, palette="rainbow")
+        result = color_cluster_segment(image, K=300, palette="rainbow")
+        assert result.labels.dtype == np.uint16
+        with Image.open(tmp_path / "many.png") as img:
+            np.testing.assert_array_equal(np.array(img), result.image)
+
+
+class TestApproximateClusters:
+    """Test cases for the kmeans and median_cut methods."""
+
+    @pytest.fixture
+    def blobs(self):
+        """Four well separated colors with a little noise, in unequal areas."""
+        rng = np.random.default_rng(0)
+        base = np.array([[20, 20, 20], [230, 40, 40], [40, 220, 60], [50, 60, 240]], dtype=np.int16)
+        which = np.repeat([0, 0, 0, 0, 1, 1, 1, 2, 2, 3], 60)[rng.permutation(600)].reshape(30, 20)
+        noise = rng.integers(-6, 7, size=(30, 20, 3))
+        return (base[which] + noise).astype(np.uint8), which
+
+    def test_kmeans_recovers_clusters(self, blobs):
+        image, which = blobs
+        result = color_cluster_segment(image, K=4, palette="rainbow", method="kmeans", sample_size=200)
+        assert result.labels.dtype == np.uint8
+        # Largest cluster first; the labeling equals the ground truth
+        np.testing.assert_array_equal(result.labels, which)
+
+    def test_median_cut_splits_widest_box(self):
+        # Noisy halves differing most in the blue channel, whose median separates them
+        halves = np.random.default_rng(1).integers(90, 110, size=(30, 20, 3), dtype=np.uint8)
+        halves[:15, :, 2] -= 60
+        halves[15:, :, 2] += 100
+        labels = color_cluster_segment(halves, K=2, method="median_cut", sample_size=200).labels
+        assert len(np.unique(labels[:15])) == len(np.unique(labels[15:])) == 1
+        assert labels[0, 0] != labels[-1, 0]
+
+    @pytest.mark.parametrize("method", ["kmeans", "median_cut"])
+    def test_seed_is_reproducible(self, method):
+        image = np.random.default_rng(3).integers(0, 256, size=(40, 30, 3), dtype=np.uint8)
+        first = color_cluster_segment(image, K=6, method=method, sample_size=100, seed=7)
+        again = color_cluster_segment(image, K=6, method=method, sample_size=100, seed=7)
+        np.testing.assert_array_equal(first.labels, again.labels)
+        counts = np.bincount(first.labels.reshape(-1))
+        assert list(counts) == sorted(counts, reverse=True)
+
+    def test_few_colors_and_gray(self):
+        image = np.zeros((8, 8), dtype=np.uint8)
+        image[:, 5:] = 200
+        for method in ("kmeans", "median_cut"):
+            labels = color_cluster_segment(image, K=5, method=method).labels
+            np.testing.assert_array_equal(labels, (image == 200).astype(np.uint8))
+        with pytest.raises(ValueError):
+            color_cluster_segment(image, method="octree")
+
+    def test_cli(self, blobs, tmp_path):
+        image, which = blobs
+        result = CliRunner().invoke(main, ["process", str(_save(image, tmp_path)), str(tmp_path / "out"),
+                                           "-t", "color_cluster", "-K", "4", "--palette", "rainbow", "--cluster-method", "kmeans",
+                                           "--sample-size", "300", "--seed", "2"])
+        assert result.exit_code == 0, result.output
+        with Image.open(tmp_path / "out" / "input_processed.png") as img:
+            np.testing.assert_array_equal(np.array(img), which)
+
+
+def _save(image, directory):
+    path = directory / "input.png"
+    Image.fromarray(image).save(path)
+    return path
@@ -0,0 +1,56 @@
+"""
+Tests for the lookup-table colormaps.
+"""
+
+import colorsys
+
+import numpy as np
+import pytest
+
+from segimage.colormap import COLORMAPS, apply_colormap, colormap_lut, palette_colors
+from segimage.processors.color_cluster import color_cluster_segment
+from segimage.processors.lbp import lbp_segment
+from segimage.utils import colormap_from_unit_scalar
+
+
+class TestColormap:
+    """Test cases for colormap tables and their application."""
+
+    def test_tables(self):
+        x = np.linspace(0.0, 1.0, 256)
+        rainbow = np.stack([np.abs(2 * x - 0.5).clip(0, 1), np.sin(np.pi * x), np.cos(np.pi * x / 2)], axis=-1)
+        np.testing.assert_array_equal(colormap_lut("rainbow"), (rainbow * 255).round())
+        hsv = [[int(c * 255) for c in colorsys.hsv_to_rgb(h, 1.0, 1.0)] for h in x]
+        np.testing.assert_array_equal(colormap_lut("hsv"), hsv)
+        np.testing.assert_array_equal(colormap_lut("bw"), np.arange(256))
+        assert not colormap_lut("rainbow").flags.writeable
+
+    def test_apply_indexing_and_shapes(self):
+        values = np.array([[-1.0, 0.0, 0.5 / 256, 1.0 / 256], [0.5, 255.5 / 256, 1.0, 2.0]])
+        # Table entry floor(x * 256); bw is exact round(x * 255)
+        lut = colormap_lut("rainbow")
+        np.testing.assert_array_equal(apply_colormap(values, "rainbow"), lut[[[0, 0, 0, 1], [128, 255, 255, 255]]])
+        np.testing.assert_array_equal(apply_colormap(values, "bw"), (values.clip(0, 1) * 255).round())
+        assert apply_colormap(values, "rainbow").shape == (2, 4, 3)
+        assert apply_colormap(values, "rainbow", size=4096).shape == (2, 4, 3)
+        image, mode = colormap_from_unit_scalar(values, "hsv")
+        assert mode == "RGB" and image.dtype == np.uint8
+        with pytest.raises(ValueError):
+            apply_colormap(values, "jet")
+
+    def test_palette_colors(self):
+        np.testing.assert_array_equal(palette_colors(3, "bw"), [0, 128, 255])
+        np.testing.assert_array_equal(palette_colors(1, "bw"), [0])
+        cyclic = palette_colors(6, "hsv", endpoint=False)
+        np.testing.assert_array_equal(cyclic[[0, 2, 4]], [[255, 0, 0], [0, 255, 0], [0, 0, 255]])
+        # Exactly the colors of the colorsys-based palette this replaces
+        for count in (5, 7, 13):
+            expected = [[int(c * 255) for c in colorsys.hsv_to_rgb(i / count, 1.0, 1.0)] for i in range(count)]
+            np.testing.assert_array_equal(palette_colors(count, "hsv", endpoint=False), expected)
+
+    @pytest.mark.parametrize("palette", COLORMAPS)
+    def test_processors(self, palette):
+        image = np.random.default_rng(0).integers(0, 256, size=(12, 9, 3), dtype=np.uint8)
+        for result in (lbp_segment(image, palette=palette), color_cluster_segment(image, K=4, palette=palette)):
+            assert result.image.dtype == np.uint8
+            assert result.image.shape == (image.shape[:2] if palette == "bw" else image.shape)
@@ -0,0 +1,86 @@
+"""
+Tests for numeric data extraction from MATLAB cells and structs.
+"""
+
+import numpy as np
+import pytest
+from scipy import io
+
+from segimage.extract import clear_path_cache, extract_numeric
+from segimage.processor import ImageProcessor
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    clear_path_cache()
+    yield
+    clear_path_cache()
+
+
+def nested_cell(image):
+    cell = np.empty((1, 2), dtype=object)
+    cell[0, 0] = "label"
+    cell[0, 1] = {"name": "x", "data": {"img": image}}
+    return cell
+
+
+@pytest.fixture
+def mat_variables(tmp_path):
+    io.savemat(tmp_path / "a.mat", {"gt": nested_cell(np.arange(6.0).reshape(2, 3)), "s": {"a": "txt", "b": np.ones((2, 2))}})
+    return io.loadmat(tmp_path / "a.mat")
+
+
+class TestExtractNumeric:
+    """Test cases for the iterative search and its path cache."""
+
+    def test_finds_leaf_in_cell_of_structs(self, mat_variables):
+        data, message = extract_numeric(mat_variables["gt"], cache_key="gt")
+        np.testing.assert_array_equal(data, np.arange(6.0).reshape(2, 3))
+        assert "[1].data[0].img[0]" in message
+
+    def test_finds_leaf_in_struct(self, mat_variables):
+        data, _ = extract_numeric(mat_variables["s"])
+        np.testing.assert_array_equal(data, np.ones((2, 2)))
+
+    def test_cached_path_skips_search(self, mat_variables):
+        extract_numeric(mat_variables["gt"], cache_key="gt")
+        # Too small a budget for a full search, enough to check the cached path
+        data, message = extract_numeric(mat_variables["gt"], cache_key="gt", max_nodes=4)
+        assert data is not None and "cached path" in message
+
+    def test_stale_cached_path_falls_back_to_search(self, tmp_path, mat_variables):
+        extract_numeric(mat_variables["gt"], cache_key="gt")
+        cell = np.empty((1, 2), dtype=object)
+        cell[0, 0] = np.full((3, 3), 2.0)
+        cell[0, 1] = "other layout"
+        io.savemat(tmp_path / "b.mat", {"gt": cell})
+        data, message = extract_numeric(io.loadmat(tmp_path / "b.mat")["gt"], cache_key="gt")
+        np.testing.assert_array_equal(data, np.full((3, 3), 2.0))
+        assert "cached" not in message
+
+    def test_cached_path_matches_fresh_search(self):
+        """A cached path past an empty sibling is not reused once that sibling holds data."""
+        first, second = np.empty(2, dtype=object), np.empty(2, dtype=object)
+        first[0], first[1] = np.empty((0, 0)), np.ones((4, 4))
+        second[0], second[1] = np.zeros((2, 2)), np.ones((4, 4))
+        data, _ = extract_numeric(first, cache_key="gt")
+        assert data.shape == (4, 4)
+        data, message = extract_numeric(second, cache_key="gt")
+        assert data.shape == (2, 2) and "cached" not in message
+        # The original layout again uses the path found for it
+        data, _ = extract_numeric(first, cache_key="gt")
+        assert data.shape == (4, 4)
+
+    def test_budget_and_missing_data(self):
+        cell = np.empty(3, dtype=object)
+        cell[:] = ["a", "b", "c"]
+        assert extract_numeric(cell)[0] is None
+        assert "budget" in extract_numeric(cell, max_nodes=2)[1]
+
+    def test_object_array_of_numbers(self):
+        data, _ = extract_numeric(np.array([1, 2.5, 3], dtype=object))
+        assert data.dtype == np.float32
+
+    def test_process_struct_variable(self, tmp_path):
+        io.savemat(tmp_path / "c.mat", {"s": {"a": "txt", "b": np.arange(12.0).reshape(3, 4)}})
+        assert ImageProcessor().process_mat_to_image(tmp_path / "c.mat", tmp_path / "c.png")
@@ -0,0 +1,150 @@
+"""
+Tests for the graph processor.
+"""
+
+import numpy as np
+import pytest
+
+from PIL import Image, ImageDraw
+
+from segimage.processors.graph import (
+    NEIGHBOR_OFFSETS,
+    RENDER_CELL_SIZE,
+    RENDER_NODE_RADIUS,
+    _build_8_neighbor_edges,
+    _build_graph,
+    _build_grid_edges,
+    _iter_neighbor_bands,
+    _render_graph_rgba,
+    _stream_edgelist,
+    _stream_lgl,
+)
+
+
+def _reference_edges(height, width, offsets):
+    """Loop-based edge list in the order the graph processor has always used."""
+    edges = []
+    for dy, dx in offsets:
+        for y in range(height):
+            for x in range(width):
+                ny, nx = y + dy, x + dx
+                if 0 <= ny < height and 0 <= nx < width:
+                    edges.append((y * width + x, ny * width + nx))
+    return np.array(edges, dtype=np.int64).reshape(-1, 2)
+
+
+class TestGridEdges:
+    """Test cases for the vectorized lattice edge builder."""
+
+    @pytest.mark.parametrize("shape", [(1, 1), (1, 5), (5, 1), (2, 2), (3, 4), (7, 5)])
+    @pytest.mark.parametrize("connectivity", [4, 8])
+    def test_matches_reference_order(self, shape, connectivity):
+        """Edges match the loop-based builder element for element."""
+        h, w = shape
+        offsets = NEIGHBOR_OFFSETS[connectivity]
+        edges = _build_grid_edges(h, w, offsets)
+        assert edges.shape[1] == 2
+        assert edges.flags["C_CONTIGUOUS"]
+        np.testing.assert_array_equal(edges, _reference_edges(h, w, offsets))
+
+    def test_8_neighbor_edge_count(self):
+        """8-connectivity yields the expected number of undirected edges."""
+        h, w = 6, 9
+        edges = _build_8_neighbor_edges(h, w)
+        expected = h * (w - 1) + (h - 1) * w + 2 * (h - 1) * (w - 1)
+        assert edges.shape == (expected, 2)
+        assert edges.dtype == np.int32
+
+
+class TestBuildGraph:
+    """Test cases for bulk igraph construction."""
+
+    def test_rgb_attributes_and_edges(self):
+        """Vertex colors, size attributes and edge order are preserved."""
+        array = np.arange(4 * 3 * 3, dtype=np.uint8).reshape(4, 3, 3)
+        g = _build_graph(array, True, NEIGHBOR_OFFSETS[8])
+        assert g.vcount() == 12
+        assert not g.is_directed()
+        assert g["width"] == 3 and g["height"] == 4
+        assert g.vs["r"] == array[:, :, 0].reshape(-1).tolist()
+        assert g.vs["b"] == array[:, :, 2].reshape(-1).tolist()
+        assert g.get_edgelist() == [tuple(e) for e in _build_8_neighbor_edges(4, 3).tolist()]
+
+    def test_grayscale_attribute(self):
+        """Grayscale inputs expose a single `gray` vertex attribute."""
+        array = np.full((2, 5), 7, dtype=np.uint8)
+        g = _build_graph(array, False, NEIGHBOR_OFFSETS[4])
+        assert g.vs.attributes() == ["gray"]
+        assert g.ecount() == 2 * 4 + 1 * 5
+
+
+class TestStreamingWriters:
+    """Streaming text writers match igraph's own writers byte for byte."""
+
+    @pytest.mark.filterwarnings("ignore::RuntimeWarning")
+    @pytest.mark.parametrize("shape", [(1, 1), (1, 4), (4, 1), (2, 2), (5, 7)])
+    @pytest.mark.parametrize("connectivity", [4, 8])
+    def test_matches_igraph(self, tmp_path, shape, connectivity):
+        h, w = shape
+        offsets = NEIGHBOR_OFFSETS[connectivity]
+        g = _build_graph(np.zeros(shape, dtype=np.uint8), False, offsets)
+        g.write_lgl(str(tmp_path / "ref.lgl"))
+        g.write_edgelist(str(tmp_path / "ref.edgelist"))
+
+        _stream_lgl(h, w, offsets, tmp_path / "out.lgl")
+        _stream_edgelist(h, w, offsets, tmp_path / "out.edgelist")
+
+        assert (tmp_path / "out.lgl").read_text() == (tmp_path / "ref.lgl").read_text()
+        assert (tmp_path / "out.edgelist").read_text() == (tmp_path / "ref.edgelist").read_text()
+
+    @pytest.mark.parametrize("max_edges", [1, 7, 40, 100])
+    @pytest.mark.parametrize("connectivity", [4, 8])
+    def test_wide_rows_are_split(self, max_edges, connectivity):
+        """Bands stay within the edge budget and concatenate to the unsplit result."""
+        h, w = 3, 25
+        offsets = NEIGHBOR_OFFSETS[connectivity]
+        bands = list(_iter_neighbor_bands(h, w, offsets, max_edges=max_edges))
+        (whole,) = _iter_neighbor_bands(h, w, offsets, max_edges=h * w * len(offsets))
+        assert all(band[1].size <= max(max_edges, len(offsets)) for band in bands)
+        for part, expected in zip(zip(*bands), whole):
+            np.testing.assert_array_equal(np.concatenate(part), expected)
+
+
+def _reference_render(rgb):
+    """Draw the graph one PIL call per edge and node, as the renderer used to."""
+    h, w = rgb.shape[:2]
+    cs, half, r = RENDER_CELL_SIZE, RENDER_CELL_SIZE // 2, RENDER_NODE_RADIUS
+    img = Image.new("RGBA", (w * cs, h * cs), (255, 255, 255, 255))
+    draw = ImageDraw.Draw(img, "RGBA")
+    for y in range(h):
+        for x in range(w):
+            for dy, dx in NEIGHBOR_OFFSETS[8]:
+                ny, nx = y + dy, x + dx
+                if 0 <= ny < h and 0 <= nx < w:
+                    col = (rgb[y, x].astype(int) + rgb[ny, nx].astype(int)) // 2
+                    draw.line(
+                        [(x * cs + half, y * cs + half), (nx * cs + half, ny * cs + half)],
+                        fill=tuple(col.tolist()) + (255,),
+                        width=1,
+                    )
+    for y in range(h):
+        for x in range(w):
+            cx, cy = x * cs + half, y * cs + half
+            col = tuple(rgb[y, x].tolist()) + (255,)
+            draw.ellipse([(cx - r, cy - r), (cx + r, cy + r)], fill=col, outline=col, width=1)
+    return np.array(img)
+
+
+class TestRenderGraphImage:
+    """The vectorized renderer matches per-shape PIL drawing pixel for pixel."""
+
+    @pytest.mark.parametrize("shape", [(1, 1), (1, 4), (4, 1), (5, 6)])
+    def test_matches_reference_rgb(self, shape):
+        rgb = np.random.default_rng(0).integers(0, 256, size=shape + (3,), dtype=np.uint8)
+        out = _render_graph_rgba(rgb, True)
+        np.testing.assert_array_equal(out, _reference_render(rgb))
+
+    def test_matches_reference_gray(self):
+        gray = np.random.default_rng(1).integers(0, 256, size=(4, 5), dtype=np.uint8)
+        out = _render_graph_rgba(gray, False)
+        np.testing.assert_array_equal(out, _reference_render(np.repeat(gray[..., None], 3, axis=-1)))
@@ -0,0 +1,74 @@
+"""
+Tests for the exact color histogram engine.
+"""
+
+import numpy as np
+import pytest
+
+from segimage.histogram import (
+    available_histogram_strategies,
+    choose_histogram_strategy,
+    color_histogram,
+    pack_colors,
+    unpack_colors,
+)
+
+
+def _images():
+    rng = np.random.default_rng(0)
+    return [
+        rng.integers(0, 256, size=(40, 30, 3), dtype=np.uint8),
+        (rng.integers(0, 4, size=(40, 30, 3)) * 60).astype(np.uint8),
+        rng.integers(0, 256, size=(25, 20), dtype=np.uint8),
+        rng.integers(0, 65536, size=(30, 20, 3), dtype=np.uint16),
+        (rng.integers(0, 5, size=(30, 20, 4)) * 1000).astype(np.uint16),
+    ]
+
+
+class TestColorHistogram:
+    """Test cases for color_histogram and its strategies."""
+
+    def test_builtin_strategies_registered(self):
+        assert {"sort", "bincount", "hash"} <= set(available_histogram_strategies())
+
+    @pytest.mark.parametrize("index", range(5))
+    @pytest.mark.parametrize("strategy", ["bincount", "hash", "auto"])
+    def test_strategies_agree_with_sort(self, index, strategy):
+        """Every strategy returns the same colors, counts and inverse."""
+        image = _images()[index]
+        _, bits = pack_colors(image)
+        if strategy == "bincount" and bits > 24:
+            pytest.skip("bincount only supports keys up to 24 bits")
+        expected = color_histogram(image, return_inverse=True, strategy="sort")
+        result = color_histogram(image, return_inverse=True, strategy=strategy)
+        for a, b in zip(expected, result):
+            np.testing.assert_array_equal(a, b)
+
+    def test_counts_and_inverse(self):
+        image = np.array([[[1, 2, 3], [0, 9, 9]], [[1, 2, 3], [1, 0, 255]]], dtype=np.uint8)
+        colors, counts, inverse = color_histogram(image, return_inverse=True)
+        np.testing.assert_array_equal(colors, [[0, 9, 9], [1, 0, 255], [1, 2, 3]])
+        np.testing.assert_array_equal(counts, [1, 1, 2])
+        np.testing.assert_array_equal(colors[inverse], image.reshape(-1, 3))
+
+    def test_float_images_fall_back_to_rows(self):
+        image = np.array([[0.5, 0.25], [0.5, 0.5]])
+        colors, counts = color_histogram(image)
+        np.testing.assert_array_equal(colors[:, 0], [0.25, 0.5])
+        np.testing.assert_array_equal(counts, [1, 3])
+
+    def test_pack_roundtrip(self):
+        image = _images()[3]
+        keys, bits = pack_colors(image)
+        assert bits == 48 and keys.dtype == np.uint64
+        np.testing.assert_array_equal(unpack_colors(keys, 3, image.dtype), image.reshape(-1, 3))
+
+    def test_auto_choice(self):
+        small = np.zeros(1000, dtype=np.uint32)
+        assert choose_histogram_strategy(small, 24) == "sort"
+        assert choose_histogram_strategy(np.zeros(1 << 20, dtype=np.uint32), 24) == "bincount"
+        assert choose_histogram_strategy(np.zeros(1 << 20, dtype=np.uint64), 48) == "hash"
+
+    def test_unknown_strategy(self):
+        with pytest.raises(ValueError):
+            color_histogram(np.zeros((2, 2), dtype=np.uint8), strategy="nope")
@@ -0,0 +1,69 @@
+"""
+Import-time regression tests for the CLI and the lazy processor registry.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from segimage.processors import _LazyProcessor, available_processors, get_processor
+
+
+SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "importtime.py"
+
+
+def _imported_modules(code: str) -> set:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        line.rsplit("|", 1)[1].strip()
+        for line in proc.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+
+class TestImportTime:
+    """Test cases for keeping light commands free of heavy imports."""
+
+    @pytest.mark.parametrize("code", [
+        "import segimage",
+        "import segimage.cli.main",
+        "from segimage.processors import available_processors; available_processors()",
+    ])
+    def test_no_heavy_modules(self, code):
+        top_level = {name.split(".")[0] for name in _imported_modules(code)}
+        assert not top_level & {"numpy", "scipy", "PIL", "igraph", "skimage", "matplotlib"}
+
+    def test_benchmark_script_passes(self):
+        proc = subprocess.run(
+            [sys.executable, str(SCRIPT), "--repeat", "1"],
+            capture_output=True,
+            text=True,
+        )
+        assert proc.returncode == 0, proc.stdout
+        assert proc.stdout.startswith("import segimage.cli.main:")
+
+
+class TestLazyRegistry:
+    """Test cases for lazily registered processors."""
+
+    def test_builtins_are_listed(self):
+        assert {"color_cluster", "lbp", "graph"} <= set(available_processors())
+
+    def test_get_processor_imports_backend(self):
+        from segimage.processors.lbp import lbp_run
+
+        assert get_processor("LBP") is lbp_run
+        assert available_processors()["lbp"] is lbp_run
+
+    def test_unknown_processor(self):
+        assert get_processor("does_not_exist") is None
+
+    def test_lazy_proxy_repr(self):
+        assert "graph_run" in repr(_LazyProcessor("graph"))
@@ -0,0 +1,147 @@
+"""
+Tests for the LBP engine.
+"""
+
+import json
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+from segimage.cli.main import main
+from segimage import lbp as lbp_engine
+from segimage.lbp import (
+    _variant_lut, code_histogram, lbp_codes, lbp_from_image, luma_u8, neighbor_offsets, rank_blocks,
+    tied_equalization,
+)
+from segimage.processors.lbp import lbp_segment
+from segimage.utils import meta_path_for, write_meta_for_image
+
+
+def reference_codes(gray):
+    """8-neighbor codes as originally computed, one boolean mask per neighbor."""
+    center = gray
+    code = np.zeros_like(gray, dtype=np.uint8)
+    code[1:, 1:] |= (gray[:-1, :-1] >= center[1:, 1:]).astype(np.uint8) << 7
+    code[1:, :] |= (gray[:-1, :] >= center[1:, :]).astype(np.uint8) << 6
+    code[1:, :-1] |= (gray[:-1, 1:] >= center[1:, :-1]).astype(np.uint8) << 5
+    code[:, :-1] |= (gray[:, 1:] >= center[:, :-1]).astype(np.uint8) << 4
+    code[:-1, :-1] |= (gray[1:, 1:] >= center[:-1, :-1]).astype(np.uint8) << 3
+    code[:-1, :] |= (gray[1:, :] >= center[:-1, :]).astype(np.uint8) << 2
+    code[:-1, 1:] |= (gray[1:, :-1] >= center[:-1, 1:]).astype(np.uint8) << 1
+    code[:, 1:] |= (gray[:, :-1] >= center[:, 1:]).astype(np.uint8) << 0
+    return code
+
+
+@pytest.fixture
+def image():
+    return np.random.default_rng(0).integers(0, 256, size=(23, 17, 3), dtype=np.uint8)
+
+
+class TestLbpEngine:
+    """Test cases for integer luma and LBP codes."""
+
+    def test_luma_matches_pil(self, image, monkeypatch):
+        monkeypatch.setattr("segimage.lbp.LUMA_BLOCK_PIXELS", 40)
+        np.testing.assert_array_equal(luma_u8(image), np.array(Image.fromarray(image).convert("L")))
+
+    def test_default_codes_match_reference(self, image):
+        gray = luma_u8(image)
+        codes = lbp_codes(gray)
+        assert codes.dtype == np.uint8
+        np.testing.assert_array_equal(codes, reference_codes(gray))
+        np.testing.assert_array_equal(lbp_from_image(gray), codes)
+
+    def test_offsets(self):
+        assert neighbor_offsets(1, 8) == ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+        assert neighbor_offsets(2, 4) == ((-1, -1), (-1, 1), (1, 1), (1, -1))
+
+    def test_variant_luts(self):
+        uniform = _variant_lut(8, "uniform")
+        assert uniform[0b00000000] == 0 and uniform[0b00111000] == 3 and uniform[0b01010101] == 9
+        ror = _variant_lut(8, "ror")
+        assert ror[0b10000000] == 1 and ror[0b11000001] == 0b00000111
+        assert _variant_lut(16, "ror").dtype == np.uint16
+
+    @pytest.mark.parametrize("method", ["ror", "uniform"])
+    def test_rotation_invariant(self, image, method):
+        gray = luma_u8(image)
+        np.testing.assert_array_equal(
+            lbp_codes(np.rot90(gray), method=method),
+            np.rot90(lbp_codes(gray, method=method)),
+        )
+
+    def test_wide_codes_and_borders(self, image):
+        gray = luma_u8(image)
+        codes = lbp_codes(gray, radius=2, neighbors=16)
+        assert codes.dtype == np.uint16 and codes.max() > 255
+        assert lbp_codes(gray, radius=2, neighbors=16, method="uniform").max() <= 17
+        assert not lbp_codes(gray[:3, :3], radius=5).any()
+        with pytest.raises(ValueError):
+            lbp_codes(gray, neighbors=17)
+
+
+class TestLbpEqualization:
+    """Test cases for histogram ranks and tie-preserving equalization."""
+
+    def test_ranks_match_argsort(self, image, monkeypatch):
+        codes = lbp_from_image(image)
+        order = np.argsort(codes.reshape(-1), kind="mergesort")
+        expected = np.empty(order.size)
+        expected[order] = np.arange(order.size) / (order.size - 1)
+        # Blocks of a few rows must give the same ranks as one block
+        for block_pixels in (codes.size, 40, 1):
+            got = np.concatenate([r.reshape(-1) for _, _, r in rank_blocks(codes, block_pixels)])
+            np.testing.assert_array_equal(got, expected.reshape(-1))
+        monkeypatch.setattr(lbp_engine, "RANK_BLOCK_PIXELS", 40)
+        wide = lbp_from_image(image, radius=2, neighbors=16)
+        ranks = np.concatenate([r.reshape(-1) for _, _, r in rank_blocks(wide)])
+        assert np.array_equal(np.argsort(ranks), np.argsort(wide.reshape(-1), kind="stable"))
+
+    def test_tied_equalization(self):
+        counts = code_histogram(np.array([[0, 0, 3], [3, 3, 255]], dtype=np.uint8))
+        unit = tied_equalization(counts)
+        assert counts.size == 256
+        np.testing.assert_allclose(unit[[0, 3, 255]], [0.1, 0.6, 1.0])
+
+    def test_rainbow_modes(self, image):
+        ranked = lbp_segment(image, palette="rainbow")
+        tied = lbp_segment(image, palette="rainbow", equalize="tied")
+        assert ranked.image.shape == tied.image.shape == image.shape
+        codes = tied.labels.reshape(-1)
+        colors = tied.image.reshape(-1, 3)
+        for code in np.unique(codes)[:5]:
+            assert len(np.unique(colors[codes == code], axis=0)) == 1
+        with pytest.raises(ValueError):
+            lbp_segment(image, palette="rainbow", equalize="sorted")
+
+
+class TestLbpConsumers:
+    """Test cases for the processor and meta writer using the engine."""
+
+    def test_meta_and_processor_share_codes(self, image, tmp_path):
+        path = tmp_path / "image.png"
+        Image.fromarray(image).save(path)
+        assert write_meta_for_image(path)
+        pixels = json.loads(meta_path_for(path).read_text())["pixels"]
+        codes = lbp_from_image(image)
+        np.testing.assert_array_equal([round(p["LBP"] * 255) for p in pixels], codes.reshape(-1))
+        result = lbp_segment(image)
+        np.testing.assert_array_equal(result.labels, codes)
+        np.testing.assert_array_equal(result.image, codes)
+
+    def test_uniform_visualization_spans_0_255(self, image):
+        result = lbp_segment(image, method="uniform")
+        assert result.labels.max() <= 9
+        np.testing.assert_array_equal(result.image, (result.labels.astype(int) * 255 + 4) // 9)
+
+    def test_cli_options(self, image, tmp_path):
+        path = tmp_path / "image.png"
+        Image.fromarray(image).save(path)
+        result = CliRunner().invoke(main, ["process", str(path), str(tmp_path / "out"), "-t", "lbp",
+                                           "--lbp-radius", "2", "--lbp-neighbors", "16", "--lbp-method", "ror",
+                                           "--palette", "rainbow", "--lbp-equalize", "tied"])
+        assert result.exit_code == 0, result.output
+        out = np.array(Image.open(tmp_path / "out" / "image_processed.png"))
+        assert out.shape == image.shape
@@ -0,0 +1,87 @@
+"""
+Tests for the shared image loader and its cache.
+"""
+
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from segimage.loader import (
+    ImageCache,
+    get_image_cache,
+    load_image_array,
+    remember_saved_image,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    get_image_cache().clear()
+    yield
+    get_image_cache().clear()
+
+
+@pytest.fixture
+def gray_png(tmp_path):
+    path = tmp_path / "gray.png"
+    Image.fromarray(np.arange(12, dtype=np.uint8).reshape(3, 4) * 20).save(path)
+    return path
+
+
+class TestLoadImageArray:
+    """Test cases for cached decoding."""
+
+    def test_decodes_once(self, gray_png):
+        first = load_image_array(gray_png, "RGB")
+        assert first.shape == (3, 4, 3)
+        assert not first.flags.writeable
+        assert load_image_array(gray_png, "RGB") is first
+
+    def test_modified_file_is_decoded_again(self, gray_png):
+        first = load_image_array(gray_png, "L")
+        Image.fromarray(np.zeros((3, 4), dtype=np.uint8)).save(gray_png)
+        st = gray_png.stat()
+        os.utime(gray_png, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        second = load_image_array(gray_png, "L")
+        assert second is not first
+        assert not second.any()
+
+    def test_rgb_derived_from_remembered_output(self, tmp_path):
+        """A saved lossless output is served from memory, converted like PIL."""
+        rgba = np.random.default_rng(0).integers(0, 256, size=(4, 5, 4), dtype=np.uint8)
+        path = tmp_path / "out.png"
+        Image.fromarray(rgba, mode="RGBA").save(path)
+        remember_saved_image(path, rgba)
+        rgb = load_image_array(path, "RGB")
+        np.testing.assert_array_equal(rgb, np.array(Image.open(path).convert("RGB")))
+        assert get_image_cache().current_bytes == rgba.nbytes + rgb.nbytes
+
+    def test_lossy_outputs_are_not_remembered(self, tmp_path):
+        path = tmp_path / "out.jpg"
+        array = np.full((4, 4, 3), 128, dtype=np.uint8)
+        Image.fromarray(array).save(path)
+        remember_saved_image(path, array)
+        assert get_image_cache().current_bytes == 0
+
+
+class TestImageCache:
+    """Test cases for the LRU memory budget."""
+
+    def test_evicts_least_recently_used(self):
+        cache = ImageCache(max_bytes=250)
+        a, b, c = (np.zeros(100, dtype=np.uint8) for _ in range(3))
+        cache.put(("a", 0, 0), "L", a)
+        cache.put(("b", 0, 0), "L", b)
+        cache.get(("a", 0, 0), "L")
+        cache.put(("c", 0, 0), "L", c)
+        assert cache.get(("b", 0, 0), "L") is None
+        assert cache.get(("a", 0, 0), "L") is not None
+        assert cache.current_bytes == 200
+
+    def test_oversized_arrays_are_not_cached(self):
+        cache = ImageCache(max_bytes=10)
+        view = cache.put(("a", 0, 0), "L", np.zeros(100, dtype=np.uint8))
+        assert not view.flags.writeable
+        assert cache.current_bytes == 0
@@ -0,0 +1,107 @@
+"""
+Tests for structured logging and per-step timing records.
+"""
+
+import io
+import json
+import logging
+import sys
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+from segimage.cli.main import main
+from segimage.logs import JsonFormatter, configure_logging, log_step, logger, stage
+from segimage.processor import ImageProcessor
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "in.png"
+    Image.fromarray(np.random.default_rng(0).integers(0, 256, size=(6, 7, 3), dtype=np.uint8)).save(path)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def restore_logger():
+    level, handlers = logger.level, list(logger.handlers)
+    yield
+    logger.setLevel(level)
+    logger.handlers[:] = handlers
+
+
+def step_records(caplog):
+    return [r for r in caplog.records if getattr(r, "event", None) == "process"]
+
+
+class TestLogStep:
+    """Test cases for step records and stage timings."""
+
+    def test_stage_outside_step_is_noop(self):
+        with stage("load"):
+            pass
+
+    def test_records_stages_and_failure(self, caplog):
+        caplog.set_level(logging.INFO, logger="segimage")
+        with pytest.raises(RuntimeError):
+            with log_step("process", input="a", output="b"):
+                with stage("load"):
+                    pass
+                raise RuntimeError("boom")
+        (record,) = step_records(caplog)
+        assert record.success is False
+        assert set(record.timings) == {"load", "total"}
+
+    def test_no_record_below_info(self, caplog):
+        caplog.set_level(logging.WARNING, logger="segimage")
+        with log_step("process"):
+            pass
+        assert not step_records(caplog)
+
+    def test_process_image_emits_one_record(self, image_path, tmp_path, caplog):
+        caplog.set_level(logging.INFO, logger="segimage")
+        assert ImageProcessor().process_image(image_path, tmp_path / "out.png", "lbp")
+        (record,) = step_records(caplog)
+        assert record.processor == "lbp" and record.success is True
+        assert {"load", "compute", "encode", "total"} <= set(record.timings)
+
+
+class TestJsonFormatter:
+    """Test cases for JSON log output."""
+
+    def test_extra_fields_are_serialized(self):
+        stream = io.StringIO()
+        configure_logging("info", "json", stream=stream)
+        with log_step("process", processor="lbp", input="a.png", output="b.png") as step:
+            step.fields["success"] = True
+        payload = json.loads(stream.getvalue().splitlines()[-1])
+        assert payload["level"] == "INFO"
+        assert payload["processor"] == "lbp"
+        assert payload["timings"]["total"] >= 0
+
+    def test_exception_is_included(self):
+        record = logging.makeLogRecord({"msg": "x", "levelname": "ERROR"})
+        try:
+            raise ValueError("bad")
+        except ValueError:
+            record.exc_info = sys.exc_info()
+        assert "ValueError: bad" in json.loads(JsonFormatter().format(record))["exception"]
+
+
+class TestCliLogging:
+    """Test cases for --quiet and --log-level."""
+
+    def test_quiet_suppresses_progress(self, image_path, tmp_path):
+        result = CliRunner().invoke(main, ["-q", "process", str(image_path), str(tmp_path / "out"), "-t", "lbp"])
+        assert result.exit_code == 0
+        assert result.output == ""
+
+    def test_json_records_on_stderr(self, image_path, tmp_path):
+        result = CliRunner().invoke(
+            main, ["--log-level", "info", "--log-format", "json", "process", str(image_path), str(tmp_path / "out"), "-t", "lbp"]
+        )
+        assert result.exit_code == 0
+        (line,) = result.stderr.splitlines()
+        assert json.loads(line)["event"] == "process"
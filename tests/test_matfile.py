@@ -0,0 +1,129 @@
+"""
+Tests for selective MATLAB .mat file access.
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+from scipy import io
+
+from segimage.matfile import LazyMatArray, is_hdf5_mat, list_variables, load_variable
+from segimage.processor import ImageProcessor
+from segimage.streaming import convert_to_image
+from segimage.utils import normalize_to_uint8
+
+
+def write_v73(path, variables):
+    """Write `variables` the way MATLAB's -v7.3 does (HDF5, axes reversed)."""
+    h5py = pytest.importorskip("h5py")
+    with h5py.File(path, "w", userblock_size=512) as f:
+        for name, (array, matlab_class) in variables.items():
+            ds = f.create_dataset(name, data=np.asarray(array).T, chunks=True)
+            ds.attrs["MATLAB_class"] = np.bytes_(matlab_class)
+        f.create_group("#refs#")
+    with open(path, "r+b") as f:
+        f.write(b"MATLAB 7.3 MAT-file, Platform: GLNXA64, HDF5 schema 1.00 .".ljust(128))
+
+
+@pytest.fixture
+def v5_mat(tmp_path):
+    path = tmp_path / "v5.mat"
+    io.savemat(path, {
+        "img": np.arange(12.0).reshape(3, 4),
+        "big": np.ones((50, 60), dtype=np.int32),
+        "cells": np.array([[1, "x"]], dtype=object),
+    })
+    return path
+
+
+@pytest.fixture
+def v73_mat(tmp_path):
+    path = tmp_path / "v73.mat"
+    write_v73(path, {
+        "img": (np.arange(20, dtype=np.float32).reshape(4, 5), "single"),
+        "mask": (np.eye(3, dtype=np.uint8), "logical"),
+    })
+    return path
+
+
+class TestV5Files:
+    """Test cases for v4-v7 files read through SciPy."""
+
+    def test_list_variables(self, v5_mat):
+        assert not is_hdf5_mat(v5_mat)
+        variables = list_variables(v5_mat)
+        assert [(v.name, v.shape, v.matlab_class) for v in variables] == [
+            ("img", (3, 4), "double"), ("big", (50, 60), "int32"), ("cells", (1, 2), "cell"),
+        ]
+        assert variables[0].dtype == np.float64
+        assert variables[2].dtype is None
+
+    def test_load_reads_only_selected_variable(self, v5_mat, monkeypatch):
+        calls = []
+        loadmat = io.loadmat
+        monkeypatch.setattr(io, "loadmat", lambda *a, **kw: calls.append(kw) or loadmat(*a, **kw))
+        np.testing.assert_array_equal(load_variable(v5_mat, "img"), np.arange(12.0).reshape(3, 4))
+        assert calls == [{"variable_names": ["img"]}]
+
+    def test_inspect_does_not_load_payloads(self, v5_mat, monkeypatch, capsys):
+        monkeypatch.setattr(io, "loadmat", lambda *a, **kw: pytest.fail("payload read"))
+        assert ImageProcessor().inspect_mat_file(v5_mat)
+        out = capsys.readouterr().out
+        assert "big: int32 with shape (50 x 60)" in out
+        assert "Data type: float64" in out
+
+
+class TestV73Files:
+    """Test cases for HDF5-based v7.3 files."""
+
+    def test_list_variables(self, v73_mat):
+        assert is_hdf5_mat(v73_mat)
+        assert [(v.name, v.shape, v.matlab_class) for v in list_variables(v73_mat)] == [
+            ("img", (4, 5), "single"), ("mask", (3, 3), "logical"),
+        ]
+
+    def test_lazy_array_indexing(self, v73_mat):
+        expected = np.arange(20, dtype=np.float32).reshape(4, 5)
+        arr = load_variable(v73_mat, "img")
+        try:
+            assert isinstance(arr, LazyMatArray)
+            assert arr.shape == (4, 5) and arr.dtype == np.float32
+            np.testing.assert_array_equal(arr[1:3], expected[1:3])
+            np.testing.assert_array_equal(arr[2, 1:4], expected[2, 1:4])
+            np.testing.assert_array_equal(np.asarray(arr), expected)
+        finally:
+            arr.close()
+
+    def test_process_mat_to_image(self, v73_mat, tmp_path):
+        out = tmp_path / "img.png"
+        assert ImageProcessor().process_mat_to_image(v73_mat, out)
+        assert out.exists()
+
+
+class TestStreamingConversion:
+    """Test cases for band-by-band conversion of v7.3 variables."""
+
+    @pytest.mark.parametrize("fmt", [".png", ".tif"])
+    @pytest.mark.parametrize("array, matlab_class", [
+        (np.random.default_rng(0).normal(size=(61, 47)), "double"),
+        (np.random.default_rng(1).integers(-900, 900, size=(40, 30), dtype=np.int16), "int16"),
+        (np.random.default_rng(2).random((25, 20, 3), dtype=np.float32), "single"),
+        (np.random.default_rng(3).integers(0, 256, size=(9, 11, 4), dtype=np.uint8), "uint8"),
+    ])
+    def test_matches_in_memory_normalization(self, tmp_path, fmt, array, matlab_class):
+        path = tmp_path / "v73.mat"
+        write_v73(path, {"x": (array, matlab_class)})
+        expected = normalize_to_uint8(array.astype(np.float32) if array.dtype == np.float64 else array)
+        lazy = load_variable(path, "x")
+        try:
+            # A tiny band size forces many bands and strips
+            assert convert_to_image(lazy, tmp_path / f"x{fmt}", fmt, band_bytes=500)
+        finally:
+            lazy.close()
+        np.testing.assert_array_equal(np.array(Image.open(tmp_path / f"x{fmt}")), expected)
+
+    def test_constant_array_is_black(self, tmp_path):
+        path = tmp_path / "v73.mat"
+        write_v73(path, {"x": (np.full((5, 6), 7.0), "double")})
+        assert ImageProcessor().process_mat_to_image(path, tmp_path / "x.png")
+        assert not np.array(Image.open(tmp_path / "x.png")).any()
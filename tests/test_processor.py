@@ -45,6 +45,18 @@ class TestImageProcessor:
         result = self.processor.process_image("dummy.mat", "dummy.png", "invalid_type")
         assert result is False
     
+    def test_broken_processor_import_is_reported(self, monkeypatch, caplog):
+        """A processor whose module fails to import is not reported as unknown."""
+        from segimage import processors
+
+        monkeypatch.setitem(processors._LAZY, "broken", ("segimage_missing_backend:run", ()))
+        with pytest.raises(ImportError, match="segimage_missing_backend"):
+            processors.get_processor("broken")
+        with caplog.at_level("ERROR", logger="segimage"):
+            assert self.processor.process_image("dummy.png", "dummy_out.png", "broken") is False
+        assert "could not be imported" in caplog.text
+        assert "Unknown process type" not in caplog.text
+    
     def test_process_mat_to_image_nonexistent_file(self):
         """Test that processing non-existent file returns False."""
         result = self.processor.process_mat_to_image("nonexistent.mat", "output.png")
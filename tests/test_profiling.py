@@ -0,0 +1,84 @@
+"""
+Tests for per-stage profiling of processors.
+"""
+
+import json
+import pstats
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+from segimage.cli.main import main
+from segimage.logs import stage
+from segimage.processor import ImageProcessor
+from segimage.processors import get_processor
+from segimage.processors.lbp import lbp_run
+from segimage.profiling import Profiler, active_profiler, profiling
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "in.png"
+    Image.fromarray(np.random.default_rng(0).integers(0, 256, size=(16, 12, 3), dtype=np.uint8)).save(path)
+    return path
+
+
+class TestProfiler:
+    """Test cases for spans, memory peaks and processor instrumentation."""
+
+    def test_nested_peak_memory(self):
+        with profiling() as profiler:
+            with profiler.span("outer"):
+                with stage("alloc"):
+                    block = np.ones(1 << 20)  # 8 MiB
+                    del block
+                with stage("idle"):
+                    pass
+        stats = profiler.summary()
+        assert stats["alloc"]["peak_bytes"] >= 8 << 20
+        assert stats["outer"]["peak_bytes"] >= stats["alloc"]["peak_bytes"]
+        assert stats["idle"]["peak_bytes"] < 1 << 20
+        assert active_profiler() is None
+
+    def test_processors_are_wrapped_only_while_active(self, image_path, tmp_path):
+        assert get_processor("lbp") is lbp_run
+        with profiling() as profiler:
+            assert get_processor("lbp").__wrapped__ is lbp_run
+            assert ImageProcessor().process_image(image_path, tmp_path / "out.png", "lbp")
+        assert get_processor("lbp") is lbp_run
+        assert {"processor:lbp", "load", "compute", "colormap", "encode"} <= set(profiler.stats)
+        assert profiler.stats["processor:lbp"].calls == 1
+
+    def test_only_one_active_profiler(self):
+        with profiling():
+            with pytest.raises(RuntimeError):
+                with profiling():
+                    pass
+
+    def test_trace_events(self, tmp_path):
+        profiler = Profiler(memory=False)
+        with profiling(profiler):
+            with stage("load"):
+                pass
+        profiler.write_trace(tmp_path / "trace.json")
+        trace = json.loads((tmp_path / "trace.json").read_text())
+        (event,) = trace["traceEvents"]
+        assert event["name"] == "load" and event["ph"] == "X"
+        assert trace["stages"]["load"]["calls"] == 1
+
+
+class TestProfileCli:
+    """Test cases for `segimage process --profile`."""
+
+    def test_breakdown_pstats_and_trace(self, image_path, tmp_path):
+        result = CliRunner().invoke(main, [
+            "process", str(image_path), str(tmp_path / "out"), "-t", "color_cluster", "--profile",
+            "--profile-pstats", str(tmp_path / "run.pstats"), "--profile-trace", str(tmp_path / "run.json"),
+        ])
+        assert result.exit_code == 0, result.output
+        assert "processor:color_cluster" in result.stderr
+        assert "colormap" in result.stderr
+        assert pstats.Stats(str(tmp_path / "run.pstats")).total_calls > 0
+        assert json.loads((tmp_path / "run.json").read_text())["traceEvents"]
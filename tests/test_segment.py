@@ -0,0 +1,64 @@
+"""
+Tests for the in-memory processor API.
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import segimage
+from segimage.processors import Segmentation, get_processor, segment
+
+
+OPTIONS = {
+    "lbp": {"palette": "rainbow"},
+    "color_cluster": {"K": 3, "palette": "rainbow"},
+    "slico": {"n_segments": 20},
+    "graph": {"connectivity": 4},
+}
+
+
+@pytest.fixture
+def image():
+    rng = np.random.default_rng(0)
+    return (rng.integers(0, 4, size=(14, 11, 3)) * 85).astype(np.uint8)
+
+
+class TestSegment:
+    """Test cases for `segment(array, process_type, **options)`."""
+
+    @pytest.mark.parametrize("name", sorted(OPTIONS))
+    def test_matches_file_processor(self, name, image, tmp_path):
+        """The file-based processor writes exactly the in-memory result."""
+        if name == "slico":
+            pytest.importorskip("skimage")
+        if name == "graph":
+            pytest.importorskip("igraph")
+        src, out = tmp_path / "in.png", tmp_path / "out.png"
+        Image.fromarray(image).save(src)
+        result = segment(image, name, **OPTIONS[name])
+        assert isinstance(result, Segmentation)
+        assert result.image.dtype == np.uint8
+        assert get_processor(name)(src, out, **OPTIONS[name])
+        with Image.open(out) as img:
+            # Palette-indexed outputs decode to the visualization
+            if img.mode == "P":
+                img = img.convert("L" if result.image.ndim == 2 else "RGB")
+            np.testing.assert_array_equal(np.array(img), result.image)
+
+    def test_labels(self, image):
+        lbp = segment(image, "lbp")
+        assert lbp.labels.shape == image.shape[:2] and lbp.labels.dtype == np.uint8
+        clusters = segment(image, "color_cluster", K=3)
+        assert set(np.unique(clusters.labels)) <= {0, 1, 2}
+        # bw visualizations are grayscale
+        assert clusters.image.shape == image.shape[:2]
+
+    def test_grayscale_and_wide_input(self, image):
+        gray = segment(image[..., 0], "lbp").labels
+        np.testing.assert_array_equal(gray, segment(np.dstack([image[..., 0]] * 4), "lbp").labels)
+
+    def test_top_level_and_unknown(self, image):
+        assert segimage.segment is segment
+        with pytest.raises(ValueError, match="Unknown process type"):
+            segment(image, "nope")
@@ -0,0 +1,131 @@
+"""
+Tests for the SLICO processor.
+"""
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+from PIL import Image
+
+pytest.importorskip("skimage")
+
+from skimage.color import label2rgb
+
+from segimage.cli.main import main
+from segimage.processors.slico import _seam_pairs, average_colors, slico_run, slico_segment
+from segimage.utils import labels_path_for, save_label_map
+
+
+@pytest.fixture
+def image():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(40, 30, 3), dtype=np.uint8)
+
+
+class TestAverageColors:
+    """Test cases for the bincount-based average color visualization."""
+
+    def test_matches_label2rgb(self, image):
+        segments = np.arange(image.shape[0] * image.shape[1]).reshape(image.shape[:2]) // 37 + 1
+        expected = (label2rgb(segments, image=image / 255.0, kind="avg") * 255.0).round()
+        diff = np.abs(average_colors(segments, image).astype(np.int64) - expected)
+        # Only means within float error of .5 may round the other way
+        assert diff.max() <= 1
+        assert (diff > 0).mean() < 0.01
+
+    def test_label_zero_is_averaged(self, image):
+        segments = np.zeros(image.shape[:2], dtype=np.int64)
+        segments[:, 15:] = 1
+        vis = average_colors(segments, image)
+        np.testing.assert_array_equal(vis[0, 0], np.rint(image[:, :15].reshape(-1, 3).mean(axis=0)))
+
+
+class TestTiledSlico:
+    """Test cases for SLICO on overlapping tiles."""
+
+    def test_seam_pairs_mutual_best(self):
+        a = np.array([[1, 1, 2, 2]])
+        b = np.array([[7, 7, 7, 8]])
+        np.testing.assert_array_equal(_seam_pairs(a, b), [[1, 7]])
+
+    def test_labels_and_visualization(self):
+        from segimage.bench import synthetic_image
+
+        image = synthetic_image(200, 150)
+        result = slico_segment(image, n_segments=60, compactness=10, start_label=3, tile_size=64)
+        labels = result.labels
+        assert labels.dtype == np.int32 and labels.shape == image.shape[:2]
+        # Consecutive labels from start_label
+        np.testing.assert_array_equal(np.unique(labels), np.arange(3, labels.max() + 1))
+        sizes = np.bincount(labels.reshape(-1))[3:]
+        assert 30 <= sizes.size <= 90
+        # Seam fragments are merged, but not into oversized segments
+        assert sizes.max() < 4 * np.median(sizes)
+        np.testing.assert_array_equal(result.image, average_colors(labels, image))
+
+    def test_workers_give_same_labels(self):
+        from segimage.bench import synthetic_image
+
+        image = synthetic_image(160, 100)
+        one = slico_segment(image, n_segments=30, tile_size=64, workers=1).labels
+        two = slico_segment(image, n_segments=30, tile_size=64, workers=2).labels
+        np.testing.assert_array_equal(one, two)
+
+    def test_many_tiles(self):
+        """Label offsets grow linearly with the number of tiles."""
+        from segimage.bench import synthetic_image
+
+        image = synthetic_image(320, 320)
+        labels = slico_segment(image, n_segments=400, tile_size=16, tile_overlap=4).labels
+        np.testing.assert_array_equal(np.unique(labels), np.arange(1, labels.max() + 1))
+        assert labels.max() < 1000
+
+    def test_small_image_is_not_tiled(self, image):
+        np.testing.assert_array_equal(
+            slico_segment(image, n_segments=30, tile_size=64).labels,
+            slico_segment(image, n_segments=30).labels,
+        )
+
+
+class TestLabelMaps:
+    """Test cases for writing the SLICO label map next to the visualization."""
+
+    @pytest.mark.parametrize("fmt", ["npy", "npz", "png"])
+    def test_written_in_same_run(self, fmt, image, tmp_path):
+        src, out = tmp_path / "in.png", tmp_path / "out.png"
+        Image.fromarray(image).save(src)
+        assert slico_run(src, out, n_segments=30, labels_format=fmt)
+        path = labels_path_for(out, fmt)
+        assert path.name == f"out.png.labels.{fmt}"
+        if fmt == "npy":
+            labels = np.load(path)
+        elif fmt == "npz":
+            labels = np.load(path)["labels"]
+        else:
+            labels = np.array(Image.open(path))
+        assert labels.dtype == np.uint16
+        expected = slico_segment(image, n_segments=30)
+        np.testing.assert_array_equal(labels, expected.labels)
+        np.testing.assert_array_equal(np.array(Image.open(out)), expected.image)
+
+    def test_png_needs_16_bit_labels(self, tmp_path):
+        with pytest.raises(ValueError, match="16-bit"):
+            save_label_map(np.array([[0, 70000]]), tmp_path / "l.png")
+        save_label_map(np.array([[0, 70000]]), tmp_path / "l.npy")
+        assert np.load(tmp_path / "l.npy").dtype == np.uint32
+
+    def test_cli_option(self, image, tmp_path):
+        src = tmp_path / "in.png"
+        Image.fromarray(image).save(src)
+        result = CliRunner().invoke(main, ["process", str(src), str(tmp_path / "out"), "-t", "slico",
+                                           "--n-segments", "20", "--labels-format", "npz"])
+        assert result.exit_code == 0, result.output
+        assert (tmp_path / "out" / "in_processed.png.labels.npz").exists()
+
+    def test_cli_tiled(self, image, tmp_path):
+        src = tmp_path / "in.png"
+        Image.fromarray(image).save(src)
+        result = CliRunner().invoke(main, ["process", str(src), str(tmp_path / "out"), "-t", "slico",
+                                           "--n-segments", "20", "--tile-size", "16", "-j", "1"])
+        assert result.exit_code == 0, result.output
+        assert (tmp_path / "out" / "in_processed.png").exists()
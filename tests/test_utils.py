@@ -0,0 +1,87 @@
+"""
+Tests for shared utility functions.
+"""
+
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from segimage import utils
+from segimage.utils import meta_path_for, normalize_to_uint8, write_meta_for_image
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    rng = np.random.default_rng(0)
+    path = tmp_path / "image.png"
+    Image.fromarray(rng.integers(0, 256, size=(7, 5, 3), dtype=np.uint8)).save(path)
+    return path
+
+
+class TestWriteMeta:
+    """Test cases for per-pixel metadata files."""
+
+    def test_json_matches_per_pixel_dumps(self, image_path, monkeypatch):
+        """Chunked JSON output is what json.dumps writes per pixel."""
+        monkeypatch.setattr(utils, "META_CHUNK_PIXELS", 8)
+        assert write_meta_for_image(image_path)
+        text = meta_path_for(image_path).read_text()
+        meta = json.loads(text)
+        assert (meta["width"], meta["height"]) == (5, 7)
+        assert len(meta["pixels"]) == 35
+        for line, pixel in zip(text.splitlines()[6:], meta["pixels"]):
+            assert line.rstrip(",") == "    " + json.dumps(pixel)
+        assert meta["pixels"][6]["x"] == 1 and meta["pixels"][6]["y"] == 1
+
+    def test_npz_columns_match_json(self, image_path):
+        assert write_meta_for_image(image_path, "json")
+        assert write_meta_for_image(image_path, "npz")
+        pixels = json.loads(meta_path_for(image_path).read_text())["pixels"]
+        columns = np.load(meta_path_for(image_path, "npz"))
+        for key in ("x", "y", "r", "g", "b", "gray", "LBP"):
+            np.testing.assert_array_equal(columns[key], [p[key] for p in pixels])
+
+    def test_unknown_format(self, image_path):
+        assert write_meta_for_image(image_path, "xml") is False
+
+
+def reference_normalize(arr):
+    """Whole-array normalization as originally implemented."""
+    work = arr if np.issubdtype(arr.dtype, np.floating) else arr.astype(np.float64)
+    min_v, max_v = work.min(), work.max()
+    if max_v == min_v:
+        return np.zeros(arr.shape, dtype=np.uint8)
+    return (np.clip((work - min_v) / (max_v - min_v), 0.0, 1.0) * 255.0).astype(np.uint8)
+
+
+class TestNormalizeToUint8:
+    """Test cases for blockwise normalization."""
+
+    @pytest.mark.parametrize("array", [
+        np.random.default_rng(0).normal(size=(31, 17)).astype(np.float32),
+        np.random.default_rng(1).normal(size=(9, 8, 3)),
+        np.random.default_rng(2).integers(-2**40, 2**40, size=(40, 3), dtype=np.int64),
+        np.random.default_rng(3).integers(0, 65535, size=100, dtype=np.uint16),
+        np.array(2.5),
+    ])
+    def test_blocks_match_whole_array(self, array):
+        expected = reference_normalize(array)
+        np.testing.assert_array_equal(normalize_to_uint8(array, block_elements=7), expected)
+
+    def test_out_buffer_and_memmap_input(self, tmp_path):
+        array = np.lib.format.open_memmap(tmp_path / "x.npy", mode="w+", dtype=np.float32, shape=(64, 50))
+        array[:] = np.random.default_rng(4).random((64, 50))
+        out = np.lib.format.open_memmap(tmp_path / "y.npy", mode="w+", dtype=np.uint8, shape=(64, 50))
+        assert normalize_to_uint8(array, out, block_elements=100) is out
+        np.testing.assert_array_equal(out, reference_normalize(np.asarray(array)))
+
+    def test_float32_arithmetic(self):
+        array = np.linspace(-1.0, 1.0, 1000)
+        result = normalize_to_uint8(array, work_dtype=np.float32)
+        assert np.abs(result.astype(int) - reference_normalize(array)).max() <= 1
+
+    def test_rejects_mismatched_out(self):
+        with pytest.raises(ValueError):
+            normalize_to_uint8(np.ones((2, 3)), np.empty((3, 2), dtype=np.uint8))